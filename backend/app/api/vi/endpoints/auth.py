@@ -3,40 +3,46 @@
 Authentication endpoints for OCI IDCS SSO Platform
 """
 
+import hmac
+import json
 import logging
+from datetime import datetime
 from typing import Any, Dict, Optional
 from urllib.parse import urlencode, quote
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, Form
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.core.config import settings
+from app.core.rate_limit import limiter
 from app.schemas.auth import (
     LoginRequest, LoginResponse, TokenResponse, UserInfo,
     SAMLRequest, SAMLResponse, OAuthCallback
 )
-from app.services.auth.idcs_service import IDCSService
-from app.services.auth.ldap_service import LDAPService
+from app.services.auth.ldap_pool import ldap_authenticator, LDAPPoolTimeout
 from app.services.auth.saml_service import SAMLService
+from app.services.auth.saml_sp import saml_credentials, sp_metadata
 from app.services.auth.jwt_service import JWTService
-from app.services.auth.session_service import SessionService
+from app.services.auth.session_store import session_store, SessionFilter
+from app.services.auth.state_store import state_store
+from app.services.auth.token_verifier import token_verifier, get_verified_user
+from app.services.auth.idp_metadata import jwks_cache, oidc_nonce, saml_settings
+from app.services.auth.idcs_oauth import idcs_oauth
+from app.services.app_registry import app_registry
 from app.core.exceptions import AuthenticationError, AuthorizationError
 from app.core.dependencies import get_current_user, get_current_active_user
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 security = HTTPBearer(auto_error=False)
-limiter = Limiter(key_func=get_remote_address)
+
+# Cookie binding an OAuth state value to the browser that started the flow
+OAUTH_STATE_COOKIE = f"{settings.SESSION_COOKIE_NAME}_state"
 
 # Services
-idcs_service = IDCSService()
-ldap_service = LDAPService()
 saml_service = SAMLService()
 jwt_service = JWTService()
-session_service = SessionService()
 
 
 # =================================================================
@@ -50,11 +56,8 @@ async def oauth_authorize(request: Request, redirect_uri: Optional[str] = None):
     OAuth 2.0 authorization endpoint - redirects to IDCS
     """
     try:
-        # Generate state parameter for CSRF protection
-        state = await session_service.generate_state()
-        
-        # Store state in session
-        await session_service.store_oauth_state(request, state, redirect_uri)
+        # Generate state parameter for CSRF protection (single-use, expires with the flow)
+        state = await state_store.issue_oauth_state(redirect_uri)
         
         # Build authorization URL
         auth_params = {
@@ -62,13 +65,26 @@ async def oauth_authorize(request: Request, redirect_uri: Optional[str] = None):
             'client_id': settings.IDCS_CLIENT_ID,
             'redirect_uri': settings.IDCS_REDIRECT_URI,
             'scope': settings.IDCS_SCOPE,
-            'state': state
+            'state': state,
+            'nonce': oidc_nonce(state)
         }
         
         authorization_url = f"{settings.idcs_authorization_url}?{urlencode(auth_params)}"
         
         logger.info(f"Redirecting to IDCS OAuth authorization: {authorization_url}")
-        return RedirectResponse(url=authorization_url)
+        response = RedirectResponse(url=authorization_url)
+        
+        # Bind the state to this browser
+        response.set_cookie(
+            key=OAUTH_STATE_COOKIE,
+            value=state,
+            max_age=settings.AUTH_STATE_TTL,
+            httponly=True,
+            secure=settings.SESSION_COOKIE_SECURE,
+            samesite="lax"
+        )
+        
+        return response
         
     except Exception as e:
         logger.error(f"OAuth authorization error: {e}")
@@ -99,16 +115,24 @@ async def oauth_callback(
         if not code or not state:
             raise HTTPException(status_code=400, detail="Missing code or state parameter")
         
-        # Verify state parameter
-        stored_state, redirect_uri = await session_service.verify_oauth_state(request, state)
-        if not stored_state:
+        # Verify state parameter: issued to this browser, consumed exactly once
+        state_data = None
+        state_cookie = request.cookies.get(OAUTH_STATE_COOKIE, "")
+        if hmac.compare_digest(state_cookie.encode(), state.encode()):
+            state_data = await state_store.consume_oauth_state(state)
+        if state_data is None:
             raise HTTPException(status_code=400, detail="Invalid state parameter")
+        redirect_uri = state_data.get("redirect_uri")
         
         # Exchange authorization code for tokens
-        token_response = await idcs_service.exchange_code_for_tokens(code)
+        token_response = await idcs_oauth.exchange_code_for_tokens(code)
+        
+        # Validate the id_token against the cached IDCS signing keys
+        if token_response.id_token:
+            await jwks_cache.verify_id_token(token_response.id_token, nonce=oidc_nonce(state))
         
         # Get user information
-        user_info = await idcs_service.get_user_info(token_response.access_token)
+        user_info = await idcs_oauth.get_user_info(token_response.access_token)
         
         # Create local JWT token
         jwt_token = await jwt_service.create_access_token(
@@ -116,6 +140,7 @@ async def oauth_callback(
             email=user_info.email,
             extra_data={
                 "source": "idcs",
+                "token_version": await token_verifier.token_version(user_info.sub),
                 "idcs_user_id": user_info.sub,
                 "groups": user_info.groups,
                 "first_name": user_info.given_name,
@@ -124,7 +149,7 @@ async def oauth_callback(
         )
         
         # Store session
-        await session_service.create_session(
+        await session_store.create_session(
             request,
             user_id=user_info.sub,
             tokens={
@@ -132,7 +157,10 @@ async def oauth_callback(
                 "refresh_token": token_response.refresh_token,
                 "id_token": token_response.id_token,
                 "jwt_token": jwt_token
-            }
+            },
+            source="idcs",
+            email=user_info.email,
+            groups=user_info.groups
         )
         
         logger.info(f"OAuth login successful for user: {user_info.email}")
@@ -151,6 +179,9 @@ async def oauth_callback(
             samesite=settings.SESSION_COOKIE_SAMESITE
         )
         
+        # The state has been consumed
+        response.delete_cookie(OAUTH_STATE_COOKIE)
+        
         return response
         
     except Exception as e:
@@ -169,14 +200,14 @@ async def oauth_refresh(
     """
     try:
         # Get current session
-        session_data = await session_service.get_session(request)
+        session_data = await session_store.get_session(request)
         if not session_data or "refresh_token" not in session_data.get("tokens", {}):
             raise HTTPException(status_code=401, detail="No refresh token available")
         
         refresh_token = session_data["tokens"]["refresh_token"]
         
         # Refresh tokens
-        token_response = await idcs_service.refresh_tokens(refresh_token)
+        token_response = await idcs_oauth.refresh_tokens(refresh_token)
         
         # Update session with new tokens
         session_data["tokens"].update({
@@ -187,7 +218,7 @@ async def oauth_refresh(
         if token_response.refresh_token:
             session_data["tokens"]["refresh_token"] = token_response.refresh_token
         
-        await session_service.update_session(request, session_data)
+        await session_store.update_session(request, session_data)
         
         return TokenResponse(
             access_token=token_response.access_token,
@@ -211,11 +242,11 @@ async def saml_login(request: Request, redirect_uri: Optional[str] = None):
     SAML 2.0 login endpoint - redirects to IDCS SAML IdP
     """
     try:
-        # Generate SAML request
-        saml_request, request_id = await saml_service.create_authn_request()
+        # Generate SAML request against the cached IdP settings
+        saml_request, request_id, idp_sso_url = await saml_settings.authn_request()
         
         # Store request ID for validation
-        await session_service.store_saml_request_id(request, request_id, redirect_uri)
+        await state_store.store_saml_request(request_id, redirect_uri)
         
         # Build SSO URL
         sso_params = {
@@ -223,7 +254,7 @@ async def saml_login(request: Request, redirect_uri: Optional[str] = None):
             'RelayState': redirect_uri or settings.FRONTEND_URL
         }
         
-        sso_url = f"{settings.SAML_IDP_SSO_URL}?{urlencode(sso_params)}"
+        sso_url = f"{idp_sso_url}?{saml_credentials.redirect_query(sso_params)}"
         
         logger.info(f"Redirecting to IDCS SAML SSO: {sso_url}")
         return RedirectResponse(url=sso_url)
@@ -247,11 +278,10 @@ async def saml_acs(
         # Validate SAML response
         user_info = await saml_service.process_saml_response(SAMLResponse)
         
-        # Verify request ID if stored
-        if hasattr(user_info, 'in_response_to'):
-            stored_request_id = await session_service.get_saml_request_id(request)
-            if stored_request_id and stored_request_id != user_info.in_response_to:
-                raise HTTPException(status_code=400, detail="Invalid SAML response")
+        # Responses to our AuthnRequests must match one we issued, once
+        in_response_to = getattr(user_info, 'in_response_to', None)
+        if in_response_to and await state_store.consume_saml_request(in_response_to) is None:
+            raise HTTPException(status_code=400, detail="Invalid SAML response")
         
         # Create JWT token
         jwt_token = await jwt_service.create_access_token(
@@ -259,6 +289,7 @@ async def saml_acs(
             email=user_info.email,
             extra_data={
                 "source": "saml",
+                "token_version": await token_verifier.token_version(user_info.name_id),
                 "saml_name_id": user_info.name_id,
                 "groups": user_info.groups,
                 "first_name": user_info.first_name,
@@ -268,10 +299,13 @@ async def saml_acs(
         )
         
         # Store session
-        await session_service.create_session(
+        await session_store.create_session(
             request,
             user_id=user_info.name_id,
-            tokens={"jwt_token": jwt_token}
+            tokens={"jwt_token": jwt_token},
+            source="saml",
+            email=user_info.email,
+            groups=user_info.groups
         )
         
         logger.info(f"SAML login successful for user: {user_info.email}")
@@ -315,7 +349,7 @@ async def saml_sls(
             logout_request = await saml_service.process_logout_request(SAMLRequest)
             
             # Destroy local session
-            await session_service.destroy_session(request)
+            await session_store.destroy_session(request)
             
             # Create logout response
             logout_response = await saml_service.create_logout_response(logout_request.id)
@@ -326,7 +360,7 @@ async def saml_sls(
                 'RelayState': RelayState or settings.FRONTEND_URL
             }
             
-            slo_url = f"{settings.SAML_IDP_SLO_URL}?{urlencode(slo_params)}"
+            slo_url = f"{await saml_settings.slo_url()}?{saml_credentials.redirect_query(slo_params)}"
             return RedirectResponse(url=slo_url)
             
         elif SAMLResponse:
@@ -334,14 +368,14 @@ async def saml_sls(
             await saml_service.process_logout_response(SAMLResponse)
             
             # Destroy local session
-            await session_service.destroy_session(request)
+            await session_store.destroy_session(request)
             
             # Redirect to login page
             return RedirectResponse(url=RelayState or f"{settings.FRONTEND_URL}/login")
         
         else:
             # Initiate logout
-            await session_service.destroy_session(request)
+            await session_store.destroy_session(request)
             return RedirectResponse(url=f"{settings.FRONTEND_URL}/login")
             
     except Exception as e:
@@ -350,13 +384,18 @@ async def saml_sls(
 
 
 @router.get("/saml/metadata")
-async def saml_metadata():
+async def saml_metadata(request: Request):
     """
     SAML 2.0 Service Provider metadata endpoint
+    
+    Served from the document built at startup; honours If-None-Match and
+    If-Modified-Since with 304 Not Modified.
     """
     try:
-        metadata_xml = await saml_service.get_sp_metadata()
-        return Response(content=metadata_xml, media_type="application/xml")
+        metadata = sp_metadata.get()
+        if metadata.not_modified(request.headers):
+            return Response(status_code=304, headers=metadata.headers)
+        return Response(content=metadata.body, media_type="application/xml", headers=metadata.headers)
         
     except Exception as e:
         logger.error(f"SAML metadata error: {e}")
@@ -377,8 +416,8 @@ async def ldap_login(request: Request, login_data: LoginRequest):
         if not settings.FEATURE_DIRECT_LDAP_LOGIN:
             raise HTTPException(status_code=403, detail="LDAP login is disabled")
         
-        # Authenticate with LDAP
-        user_info = await ldap_service.authenticate(login_data.username, login_data.password)
+        # Authenticate with LDAP (pooled search + rebind)
+        user_info = await ldap_authenticator.authenticate(login_data.username, login_data.password)
         
         # Create JWT token
         jwt_token = await jwt_service.create_access_token(
@@ -386,6 +425,7 @@ async def ldap_login(request: Request, login_data: LoginRequest):
             email=user_info.email,
             extra_data={
                 "source": "ldap",
+                "token_version": await token_verifier.token_version(user_info.uid),
                 "ldap_dn": user_info.dn,
                 "groups": user_info.groups,
                 "first_name": user_info.first_name,
@@ -395,10 +435,13 @@ async def ldap_login(request: Request, login_data: LoginRequest):
         )
         
         # Store session
-        await session_service.create_session(
+        await session_store.create_session(
             request,
             user_id=user_info.uid,
-            tokens={"jwt_token": jwt_token}
+            tokens={"jwt_token": jwt_token},
+            source="ldap",
+            email=user_info.email,
+            groups=user_info.groups
         )
         
         logger.info(f"LDAP login successful for user: {user_info.email}")
@@ -420,6 +463,9 @@ async def ldap_login(request: Request, login_data: LoginRequest):
     except AuthenticationError as e:
         logger.warning(f"LDAP authentication failed: {e}")
         raise HTTPException(status_code=401, detail=str(e))
+    except LDAPPoolTimeout as e:
+        logger.error(f"LDAP login pool exhausted: {e}")
+        raise HTTPException(status_code=503, detail="LDAP service busy, please retry")
     except Exception as e:
         logger.error(f"LDAP login error: {e}")
         raise HTTPException(status_code=500, detail="LDAP login failed")
@@ -433,14 +479,19 @@ async def ldap_login(request: Request, login_data: LoginRequest):
 @limiter.limit("20/minute")
 async def logout(
     request: Request,
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ):
     """
     Logout endpoint - supports both local and SSO logout
     """
     try:
         # Get session data
-        session_data = await session_service.get_session(request)
+        session_data = await session_store.get_session(request)
+        
+        # Revoke the bearer token so cached verifications stop accepting it
+        if credentials:
+            await token_verifier.revoke(credentials.credentials)
         
         # Determine logout type
         user_source = current_user.get("source", "local")
@@ -450,7 +501,7 @@ async def logout(
             logout_request = await saml_service.create_logout_request(current_user.get("saml_name_id"))
             
             # Destroy local session
-            await session_service.destroy_session(request)
+            await session_store.destroy_session(request)
             
             # Redirect to IdP for global logout
             slo_params = {
@@ -458,12 +509,12 @@ async def logout(
                 'RelayState': f"{settings.FRONTEND_URL}/login"
             }
             
-            slo_url = f"{settings.SAML_IDP_SLO_URL}?{urlencode(slo_params)}"
+            slo_url = f"{await saml_settings.slo_url()}?{saml_credentials.redirect_query(slo_params)}"
             return {"message": "Logout initiated", "slo_url": slo_url}
             
         elif user_source == "idcs" and settings.FEATURE_OAUTH_LOGIN:
             # OAuth logout
-            await session_service.destroy_session(request)
+            await session_store.destroy_session(request)
             
             # Build IDCS logout URL
             logout_params = {
@@ -475,7 +526,7 @@ async def logout(
         
         else:
             # Local logout
-            await session_service.destroy_session(request)
+            await session_store.destroy_session(request)
             return {"message": "Logout successful"}
             
     except Exception as e:
@@ -486,10 +537,13 @@ async def logout(
 @router.get("/verify")
 @limiter.limit("100/minute")
 async def verify_token(
-    current_user: Dict[str, Any] = Depends(get_current_active_user)
+    current_user: Dict[str, Any] = Depends(get_verified_user)
 ):
     """
     Verify JWT token and return user information
+    
+    Served from the in-process claims cache and revocation set; no session
+    store round-trip on the common path.
     """
     return {
         "valid": True,
@@ -515,7 +569,7 @@ async def get_session_info(
     Get current session information
     """
     try:
-        session_data = await session_service.get_session(request)
+        session_data = await session_store.get_session(request)
         
         return {
             "user_id": current_user.get("user_id"),
@@ -549,17 +603,13 @@ async def generate_sso_token(
     """
     try:
         # Validate application access
-        external_apps = settings.external_apps_config
-        app_config = next((app for app in external_apps if app["id"] == app_id), None)
+        app_config = app_registry.get(app_id)
         
         if not app_config:
             raise HTTPException(status_code=404, detail="Application not found")
         
         # Check user permissions
-        user_groups = current_user.get("groups", [])
-        required_groups = app_config.get("access_groups", [])
-        
-        if required_groups and not any(group in user_groups for group in required_groups):
+        if not app_registry.can_access(app_id, current_user.get("groups", [])):
             raise HTTPException(status_code=403, detail="Access denied")
         
         # Generate SSO token
@@ -595,27 +645,8 @@ async def get_sso_applications(
     Get list of SSO applications accessible to current user
     """
     try:
-        external_apps = settings.external_apps_config
-        user_groups = current_user.get("groups", [])
-        
-        accessible_apps = []
-        
-        for app in external_apps:
-            required_groups = app.get("access_groups", [])
-            
-            # Check if user has access
-            if not required_groups or any(group in user_groups for group in required_groups):
-                accessible_apps.append({
-                    "id": app["id"],
-                    "name": app["name"],
-                    "description": app["description"],
-                    "icon": app.get("icon"),
-                    "sso_enabled": app.get("sso_enabled", False),
-                    "sso_type": app.get("sso_type", "oauth"),
-                    "iframe_settings": app.get("iframe_settings", {})
-                })
-        
-        return accessible_apps
+        # Union of the precomputed app sets for the user's groups
+        return app_registry.accessible_apps(current_user.get("groups", []))
         
     except Exception as e:
         logger.error(f"Get SSO apps error: {e}")
@@ -661,10 +692,19 @@ async def validate_sso_token(
 @router.get("/admin/sessions")
 @limiter.limit("10/minute")
 async def get_active_sessions(
+    cursor: Optional[str] = None,
+    limit: int = settings.SESSION_LIST_PAGE_SIZE,
+    user_id: Optional[str] = None,
+    source: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    count_only: bool = False,
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     """
-    Get active sessions (admin only)
+    Get active sessions (admin only), one page at a time
+    
+    Filters by user_id, source (ldap/idcs/saml) and creation time. With
+    count_only, returns just the number of matching sessions.
     """
     try:
         # Check admin permissions
@@ -672,14 +712,68 @@ async def get_active_sessions(
         if "admins" not in user_groups:
             raise HTTPException(status_code=403, detail="Admin access required")
         
-        sessions = await session_service.get_all_active_sessions()
-        return sessions
+        session_filter = SessionFilter(
+            user_id=user_id,
+            source=source,
+            created_after=created_after.timestamp() if created_after else None
+        )
+        
+        if count_only:
+            return {"count": await session_store.count_sessions(session_filter)}
+        
+        sessions, next_cursor = await session_store.list_sessions(
+            cursor=cursor,
+            limit=max(1, min(limit, settings.SESSION_LIST_PAGE_SIZE)),
+            session_filter=session_filter
+        )
+        return {"sessions": sessions, "next_cursor": next_cursor}
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Get active sessions error: {e}")
         raise HTTPException(status_code=500, detail="Failed to get active sessions")
 
 
+@router.get("/admin/sessions/export")
+@limiter.limit("5/minute")
+async def export_sessions(
+    user_id: Optional[str] = None,
+    source: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Stream matching sessions as NDJSON, one session per line (admin only)
+    """
+    # Check admin permissions
+    user_groups = current_user.get("groups", [])
+    if "admins" not in user_groups:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    session_filter = SessionFilter(
+        user_id=user_id,
+        source=source,
+        created_after=created_after.timestamp() if created_after else None
+    )
+    
+    async def ndjson_lines():
+        try:
+            async for session in session_store.iter_sessions(session_filter):
+                yield json.dumps(session) + "\n"
+        except Exception as e:
+            logger.error(f"Session export error: {e}")
+            raise
+    
+    return StreamingResponse(
+        ndjson_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=sessions.ndjson"}
+    )
+
+
 @router.delete("/admin/sessions/{session_id}")
 @limiter.limit("10/minute")
 async def revoke_session(
@@ -695,7 +789,11 @@ async def revoke_session(
         if "admins" not in user_groups:
             raise HTTPException(status_code=403, detail="Admin access required")
         
-        await session_service.revoke_session(session_id)
+        session = await session_store.revoke_session(session_id)
+        
+        # The session's JWT must stop verifying too
+        if session and session.get("tokens", {}).get("jwt_token"):
+            await token_verifier.revoke(session["tokens"]["jwt_token"])
         return {"message": "Session revoked successfully"}
         
     except Exception as e:
@@ -703,6 +801,97 @@ async def revoke_session(
         raise HTTPException(status_code=500, detail="Failed to revoke session")
 
 
+@router.post("/admin/sessions/revoke")
+@limiter.limit("10/minute")
+async def bulk_revoke_sessions(
+    user_id: Optional[str] = None,
+    group: Optional[str] = None,
+    source: Optional[str] = None,
+    issued_before: Optional[datetime] = None,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Revoke every session matching the filters (admin only)
+    
+    Also bumps the token version of each affected user, so their JWTs stop
+    verifying without denylisting tokens one by one. Token versions are
+    bumped first: if that fails, no session has been deleted yet.
+    """
+    try:
+        # Check admin permissions
+        user_groups = current_user.get("groups", [])
+        if "admins" not in user_groups:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        session_filter = SessionFilter(
+            user_id=user_id,
+            source=source,
+            group=group,
+            created_before=issued_before.timestamp() if issued_before else None
+        )
+        user_ids = await session_store.session_user_ids(session_filter)
+        
+        # A disabled account may hold tokens without a live session
+        if user_id:
+            user_ids.add(user_id)
+        await token_verifier.revoke_users(user_ids)
+        
+        revoked, revoked_user_ids = await session_store.revoke_sessions(session_filter)
+        
+        # Sessions created while the versions were being bumped
+        late_user_ids = revoked_user_ids - user_ids
+        if late_user_ids:
+            await token_verifier.revoke_users(late_user_ids)
+            user_ids |= late_user_ids
+        
+        logger.info(f"Admin {current_user.get('user_id')} revoked {revoked} sessions for {len(user_ids)} users")
+        return {
+            "message": "Sessions revoked successfully",
+            "revoked_sessions": revoked,
+            "affected_users": len(user_ids)
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Bulk revoke sessions error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to revoke sessions")
+
+
+@router.post("/admin/apps/reload")
+@limiter.limit("10/minute")
+async def reload_applications(
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Reload external application configuration (admin only)
+    
+    Re-reads EXTERNAL_APPS_FILE in this worker and broadcasts the reload to
+    the others through Redis. Apps set through the EXTERNAL_APPS
+    environment variable are fixed at startup and need a restart.
+    """
+    try:
+        # Check admin permissions
+        user_groups = current_user.get("groups", [])
+        if "admins" not in user_groups:
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        app_count = await app_registry.reload_everywhere()
+        return {
+            "message": "Applications reloaded",
+            "count": app_count,
+            "source": "file" if settings.EXTERNAL_APPS_FILE else "environment"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Reload applications error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to reload applications")
+
+
 # =================================================================
 # Health Check Endpoints
 # =================================================================
@@ -721,7 +910,7 @@ async def auth_health_check():
         # Check IDCS connectivity
         if settings.FEATURE_OAUTH_LOGIN or settings.FEATURE_SAML_LOGIN:
             try:
-                await idcs_service.health_check()
+                await idcs_oauth.health_check()
                 health_status["services"]["idcs"] = "healthy"
             except Exception as e:
                 health_status["services"]["idcs"] = f"unhealthy: {str(e)}"
@@ -730,15 +919,16 @@ async def auth_health_check():
         # Check LDAP connectivity
         if settings.FEATURE_DIRECT_LDAP_LOGIN:
             try:
-                await ldap_service.health_check()
+                await ldap_authenticator.health_check()
                 health_status["services"]["ldap"] = "healthy"
             except Exception as e:
                 health_status["services"]["ldap"] = f"unhealthy: {str(e)}"
                 health_status["status"] = "degraded"
+            health_status["ldap_pool"] = ldap_authenticator.metrics()
         
         # Check session store
         try:
-            await session_service.health_check()
+            await session_store.health_check()
             health_status["services"]["session_store"] = "healthy"
         except Exception as e:
             health_status["services"]["session_store"] = f"unhealthy: {str(e)}"
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+In-process TTL/LRU cache with an optional shared Redis tier
+"""
+
+import json
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub channel used to evict keys from every process's local tier
+CACHE_INVALIDATION_CHANNEL = 'cache:invalidate'
+
+
+def create_redis_client(url: str) -> aioredis.Redis:
+    """Create an asyncio Redis client for one of the configured databases"""
+    return aioredis.from_url(
+        url,
+        password=settings.REDIS_PASSWORD or None,
+        decode_responses=True
+    )
+
+
+class TieredCache:
+    """
+    Namespaced TTL/LRU cache backed by an optional Redis tier.
+    
+    Reads check the local tier first, then Redis. Deletes remove the key from
+    Redis and are broadcast on CACHE_INVALIDATION_CHANNEL so other processes
+    (other uvicorn workers, the sync job) evict their local copies as well.
+    Redis errors are logged and the cache degrades to local-only.
+    """
+    
+    def __init__(self, namespace: str, max_size: int, ttl: int, redis_enabled: bool = False):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.redis_enabled = redis_enabled
+        self.local = TTLCache(max_size, ttl)
+        self.redis: Optional[aioredis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+    
+    async def initialize(self, subscribe: bool = True):
+        """Connect the Redis tier and start listening for invalidations"""
+        if not self.redis_enabled:
+            return
+        
+        try:
+            self.redis = create_redis_client(settings.redis_cache_url)
+            await self.redis.ping()
+            if subscribe:
+                self._listener = asyncio.create_task(self._listen_for_invalidations())
+            logger.info(f"Cache '{self.namespace}' connected to Redis")
+        except Exception as e:
+            logger.warning(f"Cache '{self.namespace}' running without Redis: {e}")
+            self.redis = None
+    
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+    
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None or not self.redis:
+            return value
+        
+        try:
+            raw = await self.redis.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"Cache '{self.namespace}' Redis read failed: {e}")
+            return None
+        
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+    
+    async def set(self, key: str, value: Any):
+        self.local.set(key, value)
+        if not self.redis:
+            return
+        
+        try:
+            await self.redis.set(self._redis_key(key), json.dumps(value, default=str), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Cache '{self.namespace}' Redis write failed: {e}")
+    
+    async def delete(self, *keys: str):
+        """Remove keys from every tier and tell other processes to do the same"""
+        if not keys:
+            return
+        
+        for key in keys:
+            self.local.delete(key)
+        if not self.redis:
+            return
+        
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self._redis_key(key) for key in keys))
+                pipe.publish(
+                    CACHE_INVALIDATION_CHANNEL,
+                    json.dumps({'namespace': self.namespace, 'keys': list(keys)})
+                )
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Cache '{self.namespace}' Redis invalidation failed: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': len(self.local),
+            'hits': self.local.hits,
+            'misses': self.local.misses,
+            'redis': self.redis is not None,
+        }
+    
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+    
+    async def _listen_for_invalidations(self):
+        """Evict local entries named in invalidation messages, reconnecting on errors"""
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get('type') != 'message':
+                        continue
+                    payload = json.loads(message['data'])
+                    if payload.get('namespace') == self.namespace:
+                        for key in payload.get('keys', []):
+                            self.local.delete(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Missed messages may leave stale entries; drop the local tier
+                logger.warning(f"Cache '{self.namespace}' invalidation listener error: {e}")
+                self.local.clear()
+                await asyncio.sleep(1)
@@ -4,11 +4,42 @@ Application configuration settings
 """
 
 import os
+import copy
 import json
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from pydantic import BaseSettings, validator, Field
 
 
+@lru_cache(maxsize=32)
+def _parse_attribute_mapping(mapping: str) -> Dict[str, str]:
+    """Parse an "ldap_attr:idcs_path,..." mapping string (cached per value)"""
+    parsed = {}
+    if mapping:
+        for pair in mapping.split(','):
+            if ':' in pair:
+                ldap_attr, idcs_attr = pair.strip().split(':', 1)
+                parsed[ldap_attr.strip()] = idcs_attr.strip()
+    return parsed
+
+
+@lru_cache(maxsize=8)
+def _parse_external_apps(value: str) -> Tuple[Dict[str, Any], ...]:
+    """
+    Parse the EXTERNAL_APPS JSON string (cached per value).
+    
+    The cached dicts are shared; callers get copies through
+    Settings.external_apps_config.
+    """
+    try:
+        apps = json.loads(value)
+    except json.JSONDecodeError:
+        return ()
+    if not isinstance(apps, list):
+        raise ValueError(f"EXTERNAL_APPS must be a JSON array, not {type(apps).__name__}")
+    return tuple(apps)
+
+
 class Settings(BaseSettings):
     """
     Application settings configuration
@@ -51,6 +82,9 @@ class Settings(BaseSettings):
     JWT_EXPIRE_MINUTES: int = 480
     JWT_REFRESH_EXPIRE_DAYS: int = 7
     JWT_ISSUER: str = "oci-idcs-sso-platform"
+    JWT_VERIFY_CACHE_SIZE: int = 10000
+    JWT_VERIFY_CACHE_MAX_TTL: int = 300
+    JWT_REVOCATION_SYNC_SECONDS: int = 1
     
     # =================================================================
     # OCI IDCS Configuration
@@ -69,6 +103,27 @@ class Settings(BaseSettings):
     IDCS_TOKEN_ENDPOINT: str = "/oauth2/v1/token"
     IDCS_USERINFO_ENDPOINT: str = "/oauth2/v1/userinfo"
     IDCS_JWKS_ENDPOINT: str = "/oauth2/v1/keys"
+    IDCS_JWKS_CACHE_TTL: int = 3600
+    IDCS_JWKS_MIN_REFRESH_INTERVAL: int = 30
+    # Expected id_token issuer ("iss")
+    IDCS_ISSUER: str = "https://identity.oraclecloud.com/"
+    IDCS_ADMIN_SCOPE: str = "urn:opc:idm:__myscopes__"
+    IDCS_TOKEN_REFRESH_MARGIN: int = 60
+    
+    # IDCS SCIM Request Scheduling
+    IDCS_SCIM_RATE_INITIAL: float = 10.0
+    IDCS_SCIM_RATE_MIN: float = 1.0
+    IDCS_SCIM_RATE_MAX: float = 50.0
+    IDCS_SCIM_LATENCY_TARGET: float = 2.0
+    IDCS_SCIM_MAX_RETRIES: int = 6
+    IDCS_SCIM_BACKOFF_BASE: float = 0.5
+    IDCS_SCIM_BACKOFF_MAX: float = 60.0
+    
+    # IDCS HTTP Connection Pool
+    IDCS_HTTP_POOL_LIMIT: int = 100
+    IDCS_HTTP_POOL_LIMIT_PER_HOST: int = 50
+    IDCS_HTTP_DNS_CACHE_TTL: int = 300
+    IDCS_HTTP_KEEPALIVE_TIMEOUT: int = 30
     
     # =================================================================
     # SAML Configuration
@@ -83,6 +138,7 @@ class Settings(BaseSettings):
     SAML_IDP_SSO_URL: str = ""
     SAML_IDP_SLO_URL: str = ""
     SAML_IDP_METADATA_URL: str = ""
+    SAML_IDP_METADATA_CACHE_TTL: int = 86400
     
     # SAML Security Settings
     SAML_SIGN_REQUESTS: bool = True
@@ -97,6 +153,9 @@ class Settings(BaseSettings):
     SAML_X509_CERT: str = ""
     SAML_PRIVATE_KEY: str = ""
     
+    # SP metadata is built once at startup; clients may cache it this long
+    SAML_SP_METADATA_MAX_AGE: int = 3600
+    
     # =================================================================
     # LDAP Configuration
     # =================================================================
@@ -132,11 +191,26 @@ class Settings(BaseSettings):
     LDAP_USER_DISPLAY_NAME_ATTR: str = "displayName"
     LDAP_GROUP_NAME_ATTR: str = "cn"
     LDAP_GROUP_MEMBER_ATTR: str = "member"
+    # groupOfNames requires at least one member; used while a group has none
+    LDAP_GROUP_PLACEHOLDER_MEMBER: str = "cn=nobody,dc=company,dc=com"
     
     # LDAP Connection Pool
     LDAP_POOL_SIZE: int = 10
     LDAP_POOL_MAX_SIZE: int = 20
     LDAP_POOL_TIMEOUT: int = 30
+    LDAP_POOL_MAX_LIFETIME: int = 3600
+    LDAP_POOL_HEALTH_CHECK_INTERVAL: int = 60
+    LDAP_OPERATION_TIMEOUT: int = 10
+    LDAP_EXECUTOR_WORKERS: int = 40
+    
+    # LDAP Paged Search (RFC 2696)
+    LDAP_PAGE_SIZE: int = 500
+    
+    # LDAP Authentication Cache (username → DN, DN → attributes/groups)
+    LDAP_CACHE_ENABLED: bool = True
+    LDAP_CACHE_TTL: int = 300
+    LDAP_CACHE_MAX_SIZE: int = 10000
+    LDAP_CACHE_REDIS_ENABLED: bool = False
     
     # =================================================================
     # LDAP ↔ IDCS Synchronization
@@ -147,6 +221,13 @@ class Settings(BaseSettings):
     SYNC_DELETE_MISSING_USERS: bool = False
     SYNC_DELETE_MISSING_GROUPS: bool = False
     SYNC_DRY_RUN: bool = False
+    SYNC_CONCURRENCY: int = 10
+    SYNC_DB_BATCH_SIZE: int = 500
+    SYNC_DB_FLUSH_SECONDS: int = 5
+    SYNC_INCREMENTAL_ENABLED: bool = True
+    SYNC_FULL_INTERVAL_HOURS: int = 24
+    SYNC_RETAIN_RAW_RECORDS: bool = False
+    SYNC_MEMBER_CHUNK_SIZE: int = 500
     
     # Synchronization Mapping
     SYNC_USER_MAPPING: str = "uid:userName,mail:emails[0].value,givenName:name.givenName,sn:name.familyName"
@@ -163,6 +244,10 @@ class Settings(BaseSettings):
     SESSION_COOKIE_SAMESITE: str = "Lax"
     SESSION_EXPIRE_SECONDS: int = 28800
     SESSION_REFRESH_THRESHOLD: int = 1800
+    SESSION_LIST_PAGE_SIZE: int = 100
+    SESSION_LIST_MAX_SCAN: int = 5000
+    AUTH_STATE_TTL: int = 600
+    AUTH_STATE_MEMORY_MAX_SIZE: int = 10000
     
     # =================================================================
     # Security Settings
@@ -177,6 +262,7 @@ class Settings(BaseSettings):
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_REQUESTS_PER_MINUTE: int = 60
     RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_LOCAL_BATCH: int = 4
     
     # Password Policy
     PASSWORD_MIN_LENGTH: int = 8
@@ -204,6 +290,8 @@ class Settings(BaseSettings):
     # External Applications Configuration
     # =================================================================
     EXTERNAL_APPS: str = "[]"
+    EXTERNAL_APPS_FILE: str = ""
+    EXTERNAL_APPS_RELOAD_SECONDS: int = 30
     
     # =================================================================
     # Logging Configuration
@@ -272,15 +360,6 @@ class Settings(BaseSettings):
             return [header.strip() for header in v.split(',')]
         return v
     
-    @validator('EXTERNAL_APPS', pre=True)
-    def validate_external_apps(cls, v):
-        if isinstance(v, str):
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                return []
-        return v
-    
     @validator('JWT_SECRET_KEY')
     def validate_jwt_secret_key(cls, v):
         if len(v) < 32:
@@ -368,34 +447,17 @@ class Settings(BaseSettings):
     @property
     def external_apps_config(self) -> List[Dict[str, Any]]:
         """Get parsed external applications configuration"""
-        if isinstance(self.EXTERNAL_APPS, str):
-            try:
-                return json.loads(self.EXTERNAL_APPS)
-            except json.JSONDecodeError:
-                return []
-        return self.EXTERNAL_APPS
+        return copy.deepcopy(list(_parse_external_apps(self.EXTERNAL_APPS)))
     
     @property
     def sync_user_mapping_dict(self) -> Dict[str, str]:
         """Get parsed user mapping for synchronization"""
-        mapping = {}
-        if self.SYNC_USER_MAPPING:
-            for pair in self.SYNC_USER_MAPPING.split(','):
-                if ':' in pair:
-                    ldap_attr, idcs_attr = pair.strip().split(':', 1)
-                    mapping[ldap_attr.strip()] = idcs_attr.strip()
-        return mapping
+        return dict(_parse_attribute_mapping(self.SYNC_USER_MAPPING))
     
     @property
     def sync_group_mapping_dict(self) -> Dict[str, str]:
         """Get parsed group mapping for synchronization"""
-        mapping = {}
-        if self.SYNC_GROUP_MAPPING:
-            for pair in self.SYNC_GROUP_MAPPING.split(','):
-                if ':' in pair:
-                    ldap_attr, idcs_attr = pair.strip().split(':', 1)
-                    mapping[ldap_attr.strip()] = idcs_attr.strip()
-        return mapping
+        return dict(_parse_attribute_mapping(self.SYNC_GROUP_MAPPING))
     
     class Config:
         """Pydantic configuration"""
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Shared FastAPI dependencies for authenticated routes
+"""
+
+from typing import Any, Dict
+
+from fastapi import Depends, Request
+
+from app.services.auth.session_store import request_token
+from app.services.auth.token_verifier import ensure_active, verified_user
+
+
+async def get_current_user(request: Request) -> Dict[str, Any]:
+    """
+    The caller, from the bearer token or the session cookie.
+    
+    Every route authenticates through TokenVerifier, so per-token
+    revocations and per-user token version bumps apply everywhere, not
+    only on /verify.
+    """
+    return verified_user(request_token(request))
+
+
+async def get_current_active_user(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """The caller, rejected with 403 (and their tokens revoked) if the account is disabled"""
+    return await ensure_active(current_user)
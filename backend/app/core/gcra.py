@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Generic cell rate algorithm (GCRA) used by the rate limiter
+
+Kept free of web and configuration imports: the Redis script and the
+in-process fallback implement the same arithmetic and are tested side by
+side.
+"""
+
+import math
+from typing import NamedTuple, Optional, Tuple
+
+RATE_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# KEYS[1] holds the theoretical arrival time (TAT) in ms. ARGV: emission
+# interval (ms), burst capacity, requested tokens. Grants as many of the
+# requested tokens as the bucket allows and returns {granted,
+# retry_after_ms}. Uses the Redis clock so all workers and hosts agree on
+# "now".
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + t[2] / 1000
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local window = interval * capacity
+local granted = math.min(requested, math.floor((window - (tat - now)) / interval))
+if granted < 1 then
+    return {0, math.ceil(tat + interval - window - now)}
+end
+local new_tat = tat + interval * granted
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {granted, 0}
+"""
+
+
+class RateLimit(NamedTuple):
+    """Emission interval (ms) and the number of requests allowed back-to-back"""
+    interval_ms: float
+    capacity: int
+
+
+def parse_rate(rate: str, burst: Optional[int] = None) -> RateLimit:
+    """Parse "N/period" (e.g. "5/minute"); capacity defaults to N"""
+    count, _, period = rate.partition('/')
+    count = int(count)
+    seconds = RATE_PERIODS[period.strip().rstrip('s')]
+    return RateLimit(interval_ms=seconds * 1000 / count, capacity=max(1, burst if burst is not None else count))
+
+
+def reserve(
+    tat: Optional[float],
+    now: float,
+    limit: RateLimit,
+    requested: int
+) -> Tuple[int, float, Optional[float]]:
+    """
+    Same GCRA as GCRA_SCRIPT, on explicit state.
+    
+    `tat` and `now` are in ms. Returns (granted, retry_after_ms, new_tat);
+    new_tat is None when nothing was granted and the state is unchanged.
+    """
+    tat = max(tat if tat is not None else now, now)
+    window = limit.interval_ms * limit.capacity
+    
+    granted = min(requested, math.floor((window - (tat - now)) / limit.interval_ms))
+    if granted < 1:
+        return 0, tat + limit.interval_ms - window - now, None
+    return granted, 0.0, tat + limit.interval_ms * granted
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP connection pool for calls to IDCS
+"""
+
+import logging
+from typing import Dict, Optional
+
+import aiohttp
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Share of IDCS_API_TIMEOUT allowed per endpoint class. Interactive login
+# calls fail fast; bulk SCIM listing gets the full budget.
+ENDPOINT_TIMEOUT_FACTORS: Dict[str, float] = {
+    'token': 0.5,
+    'userinfo': 0.5,
+    'keys': 0.5,
+    'metadata': 1.0,
+    'scim': 1.0,
+    'health': 0.25,
+}
+
+# Upper bound (seconds) on TCP connect + TLS handshake for any endpoint
+CONNECT_TIMEOUT_MAX = 5
+
+
+def endpoint_timeout(endpoint: str) -> aiohttp.ClientTimeout:
+    """Request timeout for an endpoint class, derived from IDCS_API_TIMEOUT"""
+    total = settings.IDCS_API_TIMEOUT * ENDPOINT_TIMEOUT_FACTORS.get(endpoint, 1.0)
+    return aiohttp.ClientTimeout(total=total, connect=min(CONNECT_TIMEOUT_MAX, total))
+
+
+class IDCSHTTPClient:
+    """
+    One long-lived aiohttp session per process.
+    
+    Keeps TLS connections to IDCS_TENANT_URL alive between calls, caches DNS
+    lookups, and caps concurrent connections per host. Started by the app
+    lifespan and by the sync job, closed on shutdown.
+    """
+    
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def start(self):
+        if self._session and not self._session.closed:
+            return
+        
+        connector = aiohttp.TCPConnector(
+            limit=settings.IDCS_HTTP_POOL_LIMIT,
+            limit_per_host=settings.IDCS_HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=settings.IDCS_HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=settings.IDCS_HTTP_KEEPALIVE_TIMEOUT,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=endpoint_timeout('default'),
+            raise_for_status=False,
+        )
+        logger.info("IDCS HTTP connection pool started")
+    
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+            logger.info("IDCS HTTP connection pool closed")
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session; raises if the pool was not started"""
+        if self._session is None or self._session.closed:
+            raise RuntimeError("IDCS HTTP client is not started")
+        return self._session
+    
+    @property
+    def started(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+
+# Shared client; every IDCS call should go through this session
+idcs_http = IDCSHTTPClient()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Distributed rate limiting (GCRA) shared by every worker through Redis
+"""
+
+import math
+import time
+import inspect
+import logging
+import functools
+from typing import Callable, Tuple
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+from app.core.cache import TTLCache, create_redis_client
+from app.core.gcra import GCRA_SCRIPT, RateLimit, parse_rate, reserve
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on rate-limit keys tracked in process memory
+LOCAL_KEY_LIMIT = 100000
+
+
+def client_address(request: Request) -> str:
+    """Rate-limit key for the calling client"""
+    return request.client.host if request.client else '127.0.0.1'
+
+
+class DistributedRateLimiter:
+    """
+    GCRA rate limiter backed by a Lua script on REDIS_CACHE_DB.
+    
+    Limits are shared by every uvicorn worker and replica. To keep most
+    decisions off the network, a worker may reserve up to
+    RATE_LIMIT_LOCAL_BATCH tokens per key in one round-trip and spend them
+    locally; reservations expire after the time they cover, so an idle
+    worker cannot sit on another worker's budget. Without Redis the same
+    algorithm runs per process.
+    """
+    
+    def __init__(self):
+        self.redis = None
+        self._script = None
+        self._allowances = TTLCache(LOCAL_KEY_LIMIT, ttl=60)
+        self._local_tat = TTLCache(LOCAL_KEY_LIMIT, ttl=60)
+    
+    async def initialize(self):
+        try:
+            self.redis = create_redis_client(settings.redis_cache_url)
+            await self.redis.ping()
+            self._script = self.redis.register_script(GCRA_SCRIPT)
+            logger.info("Rate limiter connected to Redis")
+        except Exception as e:
+            logger.warning(f"Rate limiter falling back to per-process limits: {e}")
+            self.redis = None
+    
+    async def close(self):
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+    
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        """Consume one request for `key`; returns 0 if allowed, else seconds to wait"""
+        allowance = self._allowances.get(key)
+        if allowance and allowance[0] > 0:
+            allowance[0] -= 1
+            return 0.0
+        
+        batch = max(1, min(settings.RATE_LIMIT_LOCAL_BATCH, limit.capacity // 4))
+        granted, retry_after_ms = await self._reserve(key, limit, batch)
+        if granted < 1:
+            return retry_after_ms / 1000
+        
+        if granted > 1:
+            self._allowances.set(key, [granted - 1], ttl=limit.interval_ms * granted / 1000)
+        return 0.0
+    
+    async def check(self, request: Request, scope: str, limit: RateLimit):
+        """Raise HTTP 429 if the client exceeded `limit` for `scope`"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        
+        retry_after = await self.hit(f"{scope}:{client_address(request)}", limit)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={'Retry-After': str(math.ceil(retry_after))}
+            )
+    
+    def limit(self, rate: str) -> Callable:
+        """
+        Endpoint decorator, e.g. @limiter.limit("5/minute").
+        
+        The endpoint's `request` argument is used for the client key; one is
+        injected into the signature if the endpoint does not declare it.
+        """
+        parsed = parse_rate(rate)
+        
+        def decorator(func: Callable) -> Callable:
+            signature = inspect.signature(func)
+            inject_request = 'request' not in signature.parameters
+            scope = f"{func.__module__}.{func.__name__}"
+            
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request = kwargs.pop('request') if inject_request else kwargs['request']
+                await self.check(request, scope, parsed)
+                return await func(*args, **kwargs)
+            
+            if inject_request:
+                request_param = inspect.Parameter(
+                    'request', inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request
+                )
+                wrapper.__signature__ = signature.replace(
+                    parameters=[request_param, *signature.parameters.values()]
+                )
+            wrapper.rate_limited = True
+            return wrapper
+        
+        return decorator
+    
+    async def _reserve(self, key: str, limit: RateLimit, requested: int) -> Tuple[int, float]:
+        if self.redis:
+            try:
+                granted, retry_after_ms = await self._script(
+                    keys=[f"ratelimit:{key}"],
+                    args=[limit.interval_ms, limit.capacity, requested]
+                )
+                return int(granted), float(retry_after_ms)
+            except Exception as e:
+                logger.warning(f"Redis rate limit check failed, using local limits: {e}")
+        return self._reserve_locally(key, limit, requested)
+    
+    def _reserve_locally(self, key: str, limit: RateLimit, requested: int) -> Tuple[int, float]:
+        """Same GCRA as GCRA_SCRIPT, against this process's clock"""
+        now = time.monotonic() * 1000
+        granted, retry_after_ms, new_tat = reserve(self._local_tat.get(key), now, limit, requested)
+        if new_tat is not None:
+            self._local_tat.set(key, new_tat, ttl=(new_tat - now) / 1000)
+        return granted, retry_after_ms
+
+
+# Shared limiter; connected by the application lifespan
+limiter = DistributedRateLimiter()
+
+# Budget for endpoints without their own @limiter.limit
+default_limit = RateLimit(
+    interval_ms=60000 / max(1, settings.RATE_LIMIT_REQUESTS_PER_MINUTE),
+    capacity=max(1, settings.RATE_LIMIT_BURST),
+)
+
+
+async def enforce_default_limit(request: Request):
+    """
+    Router dependency applying RATE_LIMIT_REQUESTS_PER_MINUTE with a burst of
+    RATE_LIMIT_BURST per client, unless the endpoint declares its own limit.
+    """
+    endpoint = request.scope.get('endpoint')
+    if getattr(endpoint, 'rate_limited', False):
+        return
+    await limiter.check(request, 'default', default_limit)
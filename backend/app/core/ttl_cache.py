@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+In-process TTL/LRU cache
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a TTL.
+    
+    Not thread-safe; meant to be used from a single event loop.
+    """
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def delete(self, key: Hashable):
+        self._entries.pop(key, None)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Registry of external SSO applications with a group → application index
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import secrets
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.cache import create_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub channel telling every worker to re-read EXTERNAL_APPS_FILE
+APPS_RELOAD_CHANNEL = 'apps:reload'
+
+
+@dataclass(frozen=True)
+class AppIndex:
+    """Immutable view of the configured applications"""
+    apps: Dict[str, Dict[str, Any]]
+    summaries: Dict[str, Dict[str, Any]]
+    order: Dict[str, int]
+    open_app_ids: FrozenSet[str]
+    group_app_ids: Dict[str, FrozenSet[str]]
+
+
+def _app_summary(app: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields returned by /sso/apps"""
+    return {
+        "id": app["id"],
+        "name": app["name"],
+        "description": app.get("description", ""),
+        "icon": app.get("icon"),
+        "sso_enabled": app.get("sso_enabled", False),
+        "sso_type": app.get("sso_type", "oauth"),
+        "iframe_settings": app.get("iframe_settings", {})
+    }
+
+
+def build_app_index(apps: Iterable[Dict[str, Any]]) -> AppIndex:
+    """Index applications by id and invert access_groups into group → app ids"""
+    by_id: Dict[str, Dict[str, Any]] = {}
+    group_sets: Dict[str, set] = {}
+    open_app_ids = set()
+    
+    for position, app in enumerate(apps):
+        if not isinstance(app, dict) or not app.get("id") or not app.get("name"):
+            logger.error(f"External app entry {position} ignored: an object with 'id' and 'name' is required")
+            continue
+        app_id = app["id"]
+        if app_id in by_id:
+            logger.warning(f"Duplicate external app id ignored: {app_id}")
+            continue
+        by_id[app_id] = app
+        
+        access_groups = app.get("access_groups") or []
+        if not access_groups:
+            open_app_ids.add(app_id)
+        for group in access_groups:
+            group_sets.setdefault(group, set()).add(app_id)
+    
+    return AppIndex(
+        apps=by_id,
+        summaries={app_id: _app_summary(app) for app_id, app in by_id.items()},
+        order={app_id: position for position, app_id in enumerate(by_id)},
+        open_app_ids=frozenset(open_app_ids),
+        group_app_ids={group: frozenset(app_ids) for group, app_ids in group_sets.items()},
+    )
+
+
+class AppRegistry:
+    """
+    External applications, indexed once and swapped atomically on reload.
+    
+    Apps come from EXTERNAL_APPS_FILE when set (re-read when its mtime
+    changes, checked at most every EXTERNAL_APPS_RELOAD_SECONDS) and from
+    the EXTERNAL_APPS setting otherwise. Access checks cost one set lookup
+    per user group.
+    
+    Each worker holds its own index. `reload_everywhere` publishes on
+    APPS_RELOAD_CHANNEL so every worker connected to Redis re-reads the
+    file. EXTERNAL_APPS is read from the environment at startup, so apps
+    configured that way only change on restart.
+    """
+    
+    def __init__(self):
+        self._index = build_app_index([])
+        self._file_mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._instance_id = secrets.token_hex(8)
+        self.redis = None
+        self._listener: Optional[asyncio.Task] = None
+        try:
+            self.reload()
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load external applications: {e}")
+    
+    async def initialize(self):
+        """Listen for reloads requested through other workers"""
+        if not settings.EXTERNAL_APPS_FILE:
+            return
+        
+        try:
+            self.redis = create_redis_client(settings.redis_cache_url)
+            await self.redis.ping()
+            self._listener = asyncio.create_task(self._listen_for_reloads())
+        except Exception as e:
+            logger.warning(f"External app reloads will not be broadcast: {e}")
+            self.redis = None
+    
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+    
+    def reload(self) -> int:
+        """Rebuild the index from configuration; returns the number of apps"""
+        apps, mtime = self._load_apps()
+        self._index = build_app_index(apps)
+        self._file_mtime = mtime
+        self._checked_at = time.monotonic()
+        logger.info(f"Loaded {len(self._index.apps)} external applications")
+        return len(self._index.apps)
+    
+    async def reload_everywhere(self) -> int:
+        """Reload here and ask every other worker to do the same"""
+        app_count = self.reload()
+        if self.redis:
+            try:
+                await self.redis.publish(APPS_RELOAD_CHANNEL, self._instance_id)
+            except Exception as e:
+                logger.warning(f"Failed to broadcast external app reload: {e}")
+        return app_count
+    
+    def get(self, app_id: str) -> Optional[Dict[str, Any]]:
+        return self._current().apps.get(app_id)
+    
+    def can_access(self, app_id: str, user_groups: Iterable[str]) -> bool:
+        """Whether any of the user's groups grants access to the app"""
+        index = self._current()
+        if app_id in index.open_app_ids:
+            return True
+        return any(app_id in index.group_app_ids.get(group, ()) for group in user_groups)
+    
+    def accessible_apps(self, user_groups: Iterable[str]) -> List[Dict[str, Any]]:
+        """Summaries of the apps a user may open, in configuration order"""
+        index = self._current()
+        app_ids = set(index.open_app_ids)
+        for group in set(user_groups):
+            app_ids.update(index.group_app_ids.get(group, ()))
+        return [index.summaries[app_id] for app_id in sorted(app_ids, key=index.order.__getitem__)]
+    
+    def _current(self) -> AppIndex:
+        """The active index, reloading first if the apps file changed"""
+        if settings.EXTERNAL_APPS_FILE and time.monotonic() - self._checked_at >= settings.EXTERNAL_APPS_RELOAD_SECONDS:
+            self._checked_at = time.monotonic()
+            try:
+                if os.path.getmtime(settings.EXTERNAL_APPS_FILE) != self._file_mtime:
+                    self.reload()
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to reload external applications: {e}")
+        return self._index
+    
+    async def _listen_for_reloads(self):
+        """Reload when another worker asks, reconnecting on errors"""
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(APPS_RELOAD_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get('type') != 'message' or message['data'] == self._instance_id:
+                        continue
+                    try:
+                        self.reload()
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Failed to reload external applications: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The mtime check still picks up file changes in the meantime
+                logger.warning(f"External app reload listener error: {e}")
+                await asyncio.sleep(1)
+    
+    @staticmethod
+    def _load_apps() -> Tuple[List[Dict[str, Any]], Optional[float]]:
+        if settings.EXTERNAL_APPS_FILE:
+            mtime = os.path.getmtime(settings.EXTERNAL_APPS_FILE)
+            with open(settings.EXTERNAL_APPS_FILE, encoding='utf-8') as apps_file:
+                apps = json.load(apps_file)
+            if not isinstance(apps, list):
+                raise ValueError(f"{settings.EXTERNAL_APPS_FILE} must contain a JSON array")
+            return apps, mtime
+        return settings.external_apps_config, None
+
+
+# Shared registry used by the SSO endpoints
+app_registry = AppRegistry()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+IDCS admin API access: client-credentials tokens and SCIM listing
+"""
+
+import time
+import random
+import asyncio
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.http import idcs_http, endpoint_timeout
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: throttling and transient gateway errors
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+# Additive increase: roughly this many req/s gained per second of clean traffic
+RATE_INCREASE_PER_SECOND = 1.0
+
+# Multiplicative decrease on a 429, and on responses slower than the target
+THROTTLE_BACKOFF_FACTOR = 0.5
+LATENCY_BACKOFF_FACTOR = 0.9
+
+
+class IDCSTokenManager:
+    """
+    Caches the app's client-credentials access token.
+    
+    The token is reused until IDCS_TOKEN_REFRESH_MARGIN seconds before it
+    expires, renewed ahead of time by a background task, and concurrent
+    callers that find it stale share a single token request.
+    """
+    
+    def __init__(self, scope: str = settings.IDCS_ADMIN_SCOPE):
+        self.scope = scope
+        self.access_token: Optional[str] = None
+        self.expires_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        """Fetch the first token and keep it fresh in the background"""
+        await self.get_token()
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+    
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+    
+    async def get_token(self) -> str:
+        """A valid access token, requesting a new one only when needed"""
+        if self.access_token and time.monotonic() < self.expires_at - settings.IDCS_TOKEN_REFRESH_MARGIN:
+            return self.access_token
+        return await self.refresh()
+    
+    async def refresh(self) -> str:
+        """Request a new token, sharing one request among concurrent callers"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._request_token())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+    
+    def invalidate(self):
+        """Forget the cached token, e.g. after IDCS rejected it with 401"""
+        self.access_token = None
+        self.expires_at = 0.0
+    
+    def _clear_inflight(self, future: asyncio.Future):
+        if self._inflight is future:
+            self._inflight = None
+    
+    async def _request_token(self) -> str:
+        async with idcs_http.session.post(
+            settings.idcs_token_url,
+            auth=aiohttp.BasicAuth(settings.IDCS_CLIENT_ID, settings.IDCS_CLIENT_SECRET),
+            data={'grant_type': 'client_credentials', 'scope': self.scope},
+            timeout=endpoint_timeout('token'),
+        ) as response:
+            response.raise_for_status()
+            token_data = await response.json()
+        
+        self.access_token = token_data['access_token']
+        self.expires_at = time.monotonic() + int(token_data.get('expires_in', 3600))
+        logger.debug(f"Obtained IDCS client-credentials token (expires in {token_data.get('expires_in')}s)")
+        return self.access_token
+    
+    async def _refresh_loop(self):
+        while True:
+            delay = self.expires_at - settings.IDCS_TOKEN_REFRESH_MARGIN - time.monotonic()
+            await asyncio.sleep(max(delay, 1))
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # get_token() retries on demand; try again shortly
+                logger.warning(f"Background IDCS token refresh failed: {e}")
+                await asyncio.sleep(5)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate tracks what IDCS will accept.
+    
+    The rate grows additively while responses are fast and successful,
+    shrinks multiplicatively on 429s or responses slower than the latency
+    target, and stays within [min_rate, max_rate]. A Retry-After pauses
+    every caller until it has elapsed.
+    """
+    
+    def __init__(self, rate: float, min_rate: float, max_rate: float, latency_target: float):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.latency_target = latency_target
+        self.throttled = 0
+        
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait for permission to send one request"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+    
+    def on_success(self, latency: float):
+        if latency > self.latency_target:
+            self.rate = max(self.min_rate, self.rate * LATENCY_BACKOFF_FACTOR)
+        else:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE_PER_SECOND / self.rate)
+    
+    def on_throttled(self, retry_after: Optional[float]):
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate * THROTTLE_BACKOFF_FACTOR)
+        self._tokens = 0.0
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        logger.info(f"IDCS throttled request; SCIM rate now {self.rate:.2f} req/s")
+    
+    def _refill(self, now: float):
+        capacity = max(1.0, self.rate)
+        self._tokens = min(capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt"""
+    ceiling = min(settings.IDCS_SCIM_BACKOFF_MAX, settings.IDCS_SCIM_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class IDCSSCIMClient:
+    """
+    Minimal SCIM client for the IDCS admin API.
+    
+    Every request goes through an AdaptiveRateLimiter shared by all callers
+    of this client. Throttled and transient failures are retried up to
+    IDCS_SCIM_MAX_RETRIES times, honouring Retry-After and otherwise
+    backing off with jitter.
+    """
+    
+    def __init__(self, token_manager: IDCSTokenManager, rate_limiter: Optional[AdaptiveRateLimiter] = None):
+        self.token_manager = token_manager
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+            rate=settings.IDCS_SCIM_RATE_INITIAL,
+            min_rate=settings.IDCS_SCIM_RATE_MIN,
+            max_rate=settings.IDCS_SCIM_RATE_MAX,
+            latency_target=settings.IDCS_SCIM_LATENCY_TARGET,
+        )
+        self.base_url = f"{settings.IDCS_TENANT_URL}/admin/{settings.IDCS_API_VERSION}"
+    
+    async def list_users(self, start_index: int = 1, count: int = 100, filter: Optional[str] = None) -> Dict[str, Any]:
+        """One page of /Users as a SCIM ListResponse"""
+        return await self._list('Users', start_index, count, filter)
+    
+    async def list_groups(self, start_index: int = 1, count: int = 100, filter: Optional[str] = None) -> Dict[str, Any]:
+        """One page of /Groups (with members) as a SCIM ListResponse"""
+        return await self._list('Groups', start_index, count, filter, attributeSets='all')
+    
+    async def _list(self, resource: str, start_index: int, count: int, scim_filter: Optional[str], **params) -> Dict[str, Any]:
+        params.update({'startIndex': start_index, 'count': count})
+        if scim_filter:
+            params['filter'] = scim_filter
+        return await self._get(f"{self.base_url}/{resource}", params)
+    
+    async def _get(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Rate-limited GET with the cached bearer token and retries"""
+        token_refreshed = False
+        attempt = 0
+        
+        while True:
+            await self.rate_limiter.acquire()
+            token = await self.token_manager.get_token()
+            started = time.monotonic()
+            
+            try:
+                async with idcs_http.session.get(
+                    url,
+                    params=params,
+                    headers={'Authorization': f"Bearer {token}", 'Accept': 'application/scim+json'},
+                    timeout=endpoint_timeout('scim'),
+                ) as response:
+                    if response.status == 401 and not token_refreshed:
+                        self.token_manager.invalidate()
+                        token_refreshed = True
+                        continue
+                    
+                    if response.status in RETRYABLE_STATUSES and attempt < settings.IDCS_SCIM_MAX_RETRIES:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        if response.status == 429:
+                            self.rate_limiter.on_throttled(retry_after)
+                        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                        logger.warning(f"IDCS returned {response.status} for {url}; retrying in {delay:.1f}s")
+                        attempt += 1
+                        if response.status != 429 or retry_after is None:
+                            await asyncio.sleep(delay)
+                        continue
+                    
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+                    self.rate_limiter.on_success(time.monotonic() - started)
+                    return data
+                    
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= settings.IDCS_SCIM_MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"IDCS request to {url} failed ({e!r}); retrying in {delay:.1f}s")
+                attempt += 1
+                await asyncio.sleep(delay)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+IDCS OAuth 2.0 / OpenID Connect calls made during interactive login
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.http import idcs_http, endpoint_timeout
+from app.core.exceptions import AuthenticationError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IDCSTokenResponse:
+    """Tokens returned by the IDCS token endpoint"""
+    access_token: str
+    token_type: str = "Bearer"
+    expires_in: int = 3600
+    refresh_token: Optional[str] = None
+    id_token: Optional[str] = None
+
+
+@dataclass
+class IDCSUserInfo:
+    """Claims returned by the IDCS userinfo endpoint"""
+    sub: str
+    email: Optional[str] = None
+    given_name: Optional[str] = None
+    family_name: Optional[str] = None
+    name: Optional[str] = None
+    groups: List[str] = field(default_factory=list)
+    claims: Dict[str, Any] = field(default_factory=dict)
+
+
+class IDCSOAuthClient:
+    """
+    Authorization-code login against IDCS over the shared connection pool.
+    
+    Every call goes through `idcs_http`, so a login reuses a kept-alive TLS
+    connection instead of opening a new session (and handshake) per call.
+    """
+    
+    async def exchange_code_for_tokens(self, code: str) -> IDCSTokenResponse:
+        """Redeem an authorization code"""
+        return await self._token_request({
+            'grant_type': 'authorization_code',
+            'code': code,
+            'redirect_uri': settings.IDCS_REDIRECT_URI,
+        })
+    
+    async def refresh_tokens(self, refresh_token: str) -> IDCSTokenResponse:
+        """Obtain new tokens with a refresh token"""
+        return await self._token_request({
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+        })
+    
+    async def get_user_info(self, access_token: str) -> IDCSUserInfo:
+        """Profile and group names of the user an access token was issued to"""
+        async with idcs_http.session.get(
+            settings.idcs_userinfo_url,
+            headers={'Authorization': f"Bearer {access_token}"},
+            timeout=endpoint_timeout('userinfo'),
+        ) as response:
+            if response.status in (401, 403):
+                raise AuthenticationError("IDCS rejected the access token")
+            response.raise_for_status()
+            claims = await response.json()
+        
+        return IDCSUserInfo(
+            sub=claims['sub'],
+            email=claims.get('email'),
+            given_name=claims.get('given_name'),
+            family_name=claims.get('family_name'),
+            name=claims.get('name'),
+            # IDCS lists groups as {"name": ..., "id": ...} objects
+            groups=[
+                group.get('name') if isinstance(group, dict) else group
+                for group in claims.get('groups', [])
+            ],
+            claims=claims,
+        )
+    
+    async def health_check(self):
+        """Raise if the IDCS OpenID configuration endpoint cannot be reached"""
+        async with idcs_http.session.get(
+            f"{settings.IDCS_TENANT_URL}/.well-known/openid-configuration",
+            timeout=endpoint_timeout('health'),
+        ) as response:
+            response.raise_for_status()
+    
+    async def _token_request(self, data: Dict[str, str]) -> IDCSTokenResponse:
+        async with idcs_http.session.post(
+            settings.idcs_token_url,
+            auth=aiohttp.BasicAuth(settings.IDCS_CLIENT_ID, settings.IDCS_CLIENT_SECRET),
+            data=data,
+            timeout=endpoint_timeout('token'),
+        ) as response:
+            if response.status in (400, 401):
+                try:
+                    error = await response.json(content_type=None)
+                except ValueError:
+                    error = {}
+                raise AuthenticationError(
+                    f"IDCS token request failed: {error.get('error_description') or error.get('error')}"
+                )
+            response.raise_for_status()
+            token_data = await response.json()
+        
+        logger.debug(f"IDCS {data['grant_type']} grant succeeded")
+        return IDCSTokenResponse(
+            access_token=token_data['access_token'],
+            token_type=token_data.get('token_type', 'Bearer'),
+            expires_in=int(token_data.get('expires_in', 3600)),
+            refresh_token=token_data.get('refresh_token'),
+            id_token=token_data.get('id_token'),
+        )
+
+
+# Shared client; uses the pool started by the application lifespan
+idcs_oauth = IDCSOAuthClient()
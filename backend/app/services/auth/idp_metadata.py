@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Cached IDCS signing keys (JWKS) and SAML IdP metadata
+"""
+
+import re
+import hmac
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import jwt
+from onelogin.saml2.authn_request import OneLogin_Saml2_Authn_Request
+from onelogin.saml2.constants import OneLogin_Saml2_Constants
+from onelogin.saml2.idp_metadata_parser import OneLogin_Saml2_IdPMetadataParser
+from onelogin.saml2.settings import OneLogin_Saml2_Settings
+
+from app.core.config import settings
+from app.core.http import idcs_http, endpoint_timeout
+from app.core.exceptions import AuthenticationError
+from app.services.auth.saml_sp import sp_settings
+
+logger = logging.getLogger(__name__)
+
+# Refresh when this fraction of the TTL has elapsed, ahead of expiry
+REFRESH_AHEAD_RATIO = 0.8
+
+# Retry delay bounds (seconds) after a failed refresh
+REFRESH_RETRY_MIN = 5
+REFRESH_RETRY_MAX = 300
+
+# Asymmetric algorithms accepted for IDCS id_tokens
+ID_TOKEN_ALGORITHMS = ('RS256', 'RS384', 'RS512')
+
+MAX_AGE_PATTERN = re.compile(r'max-age=(\d+)')
+
+
+class RefreshingDocument:
+    """
+    Remote document parsed once and kept in memory.
+    
+    Loaded at startup, refreshed in the background before it expires
+    (honouring Cache-Control max-age when the server sends one) and on
+    demand. Concurrent refreshes share a single in-flight fetch, and a
+    failed refresh keeps serving the last good copy. On-demand fetches are
+    rate limited, with a growing backoff after failures, so requests that
+    arrive while IDCS is unreachable fail fast instead of each waiting on
+    a fetch.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        ttl: int,
+        min_refresh_interval: int,
+        parse: Callable[[str], Any],
+        endpoint: str = 'metadata',
+    ):
+        self.name = name
+        self.url = url
+        self.endpoint = endpoint
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.parse = parse
+        
+        self.value: Optional[Any] = None
+        self.fetched_at = 0.0
+        self.expires_in = ttl
+        self.last_attempt = 0.0
+        self.last_error: Optional[Exception] = None
+        self.failure_backoff = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    async def initialize(self):
+        """Load the document and start the background refresher"""
+        if not self.url:
+            logger.info(f"{self.name} URL not configured; cache disabled")
+            return
+        
+        try:
+            await self.refresh(force=True)
+        except Exception as e:
+            logger.warning(f"Initial {self.name} load failed: {e}")
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+    
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+    
+    async def get(self) -> Any:
+        """Current document, fetching it if it was never loaded"""
+        if self.value is None:
+            return await self.refresh()
+        return self.value
+    
+    async def refresh(self, force: bool = False) -> Any:
+        """
+        Re-fetch the document, sharing one fetch among concurrent callers.
+        
+        Without `force`, a fetch is attempted at most once per
+        `min_refresh_interval`, or per the failure backoff while fetches
+        keep failing. In between, the cached copy is returned, or an error
+        is raised straight away when there is none, so a flood of logins or
+        unknown key ids cannot turn into a flood of requests to IDCS.
+        """
+        if self._inflight is not None:
+            return await asyncio.shield(self._inflight)
+        
+        if not force and time.monotonic() < self.last_attempt + max(self.min_refresh_interval, self.failure_backoff):
+            if self.value is not None:
+                return self.value
+            raise RuntimeError(f"{self.name} unavailable: {self.last_error}")
+        
+        self._inflight = asyncio.ensure_future(self._fetch())
+        self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+    
+    def _clear_inflight(self, future: asyncio.Future):
+        if self._inflight is future:
+            self._inflight = None
+    
+    async def _fetch(self) -> Any:
+        self.last_attempt = time.monotonic()
+        try:
+            async with idcs_http.session.get(self.url, timeout=endpoint_timeout(self.endpoint)) as response:
+                response.raise_for_status()
+                body = await response.text()
+                cache_control = response.headers.get('Cache-Control', '')
+            
+            value = self.parse(body)
+        except Exception as e:
+            self.last_error = e
+            self.failure_backoff = min(max(self.failure_backoff * 2, REFRESH_RETRY_MIN), REFRESH_RETRY_MAX)
+            raise
+        
+        max_age = MAX_AGE_PATTERN.search(cache_control)
+        
+        self.value = value
+        self.fetched_at = time.monotonic()
+        self.last_error = None
+        self.failure_backoff = 0.0
+        self.expires_in = min(int(max_age.group(1)), self.ttl) if max_age else self.ttl
+        logger.info(f"Refreshed {self.name} (valid for {self.expires_in}s)")
+        return value
+    
+    async def _refresh_loop(self):
+        retry_delay = REFRESH_RETRY_MIN
+        delay = None
+        while True:
+            if delay is None:
+                if self.value is None:
+                    delay = REFRESH_RETRY_MIN
+                else:
+                    delay = max(self.fetched_at + self.expires_in * REFRESH_AHEAD_RATIO - time.monotonic(), 0)
+            await asyncio.sleep(delay)
+            
+            try:
+                await self.refresh(force=True)
+                retry_delay = REFRESH_RETRY_MIN
+                delay = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the stale copy; retry with jittered backoff
+                logger.warning(f"Background {self.name} refresh failed: {e}")
+                delay = retry_delay * random.uniform(0.8, 1.2)
+                retry_delay = min(retry_delay * 2, REFRESH_RETRY_MAX)
+
+
+def _parse_jwks(body: str) -> Dict[str, jwt.PyJWK]:
+    """Parse a JWKS document into signing keys by `kid`"""
+    key_set = jwt.PyJWKSet.from_json(body)
+    return {key.key_id: key for key in key_set.keys if key.key_id}
+
+
+class JWKSCache(RefreshingDocument):
+    """IDCS token signing keys"""
+    
+    def __init__(self):
+        super().__init__(
+            'IDCS JWKS',
+            settings.idcs_jwks_url,
+            ttl=settings.IDCS_JWKS_CACHE_TTL,
+            min_refresh_interval=settings.IDCS_JWKS_MIN_REFRESH_INTERVAL,
+            parse=_parse_jwks,
+            endpoint='keys',
+        )
+    
+    async def get_signing_key(self, kid: str) -> jwt.PyJWK:
+        """Key for `kid`, refreshing once if IDCS may have rotated keys"""
+        keys = await self.get()
+        if kid not in keys:
+            keys = await self.refresh()
+        if kid not in keys:
+            raise AuthenticationError(f"Unknown signing key: {kid}")
+        return keys[kid]
+    
+    async def verify_id_token(self, id_token: str, nonce: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Validate an IDCS id_token signature, issuer and audience.
+        
+        When the authorization request carried a `nonce`, the token must
+        echo it back, so an id_token issued for another login cannot be
+        replayed into this one.
+        """
+        try:
+            header = jwt.get_unverified_header(id_token)
+            if header.get('alg') not in ID_TOKEN_ALGORITHMS:
+                raise AuthenticationError(f"Unsupported id_token algorithm: {header.get('alg')}")
+            
+            signing_key = await self.get_signing_key(header.get('kid'))
+            claims = jwt.decode(
+                id_token,
+                signing_key.key,
+                algorithms=[header['alg']],
+                audience=settings.IDCS_CLIENT_ID,
+                issuer=settings.IDCS_ISSUER,
+                options={'require': ['exp', 'iss', 'aud']},
+            )
+        except jwt.InvalidTokenError as e:
+            raise AuthenticationError(f"Invalid id_token: {e}")
+        
+        if nonce is not None and not hmac.compare_digest(str(claims.get('nonce', '')), nonce):
+            raise AuthenticationError("Invalid id_token: nonce mismatch")
+        return claims
+
+
+def oidc_nonce(state: str) -> str:
+    """
+    OIDC `nonce` for an authorization request, derived from its `state`.
+    
+    Keyed with JWT_SECRET_KEY, so the callback can recompute it from the
+    state it already verified without storing anything extra.
+    """
+    return hmac.new(
+        settings.JWT_SECRET_KEY.encode('utf-8'),
+        f"oidc-nonce:{state}".encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+
+
+class SAMLIdPMetadataCache(RefreshingDocument):
+    """IDCS SAML IdP metadata (entity id, endpoints, signing certificates)"""
+    
+    def __init__(self):
+        super().__init__(
+            'SAML IdP metadata',
+            settings.SAML_IDP_METADATA_URL,
+            ttl=settings.SAML_IDP_METADATA_CACHE_TTL,
+            min_refresh_interval=settings.IDCS_JWKS_MIN_REFRESH_INTERVAL,
+            parse=OneLogin_Saml2_IdPMetadataParser.parse,
+        )
+    
+    async def idp_settings(self) -> Dict[str, Any]:
+        """The `idp` section of python3-saml settings"""
+        metadata = await self.get()
+        return metadata.get('idp', {})
+
+
+class SAMLSettingsCache:
+    """
+    python3-saml settings for login and logout flows.
+    
+    The IdP section comes from the cached IdP metadata when
+    SAML_IDP_METADATA_URL is set, with the static SAML_IDP_* settings
+    filling anything the metadata does not provide and standing in while
+    it cannot be loaded. The settings object is rebuilt only when that IdP
+    section changes.
+    """
+    
+    def __init__(self, idp_metadata: SAMLIdPMetadataCache):
+        self.idp_metadata = idp_metadata
+        self._idp: Optional[Dict[str, Any]] = None
+        self._settings: Optional[OneLogin_Saml2_Settings] = None
+    
+    async def idp_settings(self) -> Dict[str, Any]:
+        """The `idp` section of python3-saml settings"""
+        idp = {
+            'entityId': settings.SAML_IDP_ENTITY_ID,
+            'singleSignOnService': {
+                'url': settings.SAML_IDP_SSO_URL,
+                'binding': OneLogin_Saml2_Constants.BINDING_HTTP_REDIRECT,
+            },
+            'singleLogoutService': {
+                'url': settings.SAML_IDP_SLO_URL,
+                'binding': OneLogin_Saml2_Constants.BINDING_HTTP_REDIRECT,
+            },
+        }
+        if self.idp_metadata.url:
+            try:
+                idp.update(await self.idp_metadata.idp_settings())
+            except Exception as e:
+                logger.warning(f"SAML IdP metadata unavailable, using static IdP settings: {e}")
+        return idp
+    
+    async def get(self) -> OneLogin_Saml2_Settings:
+        idp = await self.idp_settings()
+        if self._settings is None or idp != self._idp:
+            saml_settings = sp_settings()
+            saml_settings['idp'] = idp
+            self._settings = OneLogin_Saml2_Settings(saml_settings, sp_validation_only=True)
+            self._idp = idp
+        return self._settings
+    
+    async def authn_request(self) -> Tuple[str, str, str]:
+        """A new AuthnRequest: (encoded request, request ID, IdP SSO URL)"""
+        saml_settings = await self.get()
+        request = OneLogin_Saml2_Authn_Request(saml_settings)
+        return request.get_request(), request.get_id(), saml_settings.get_idp_sso_url()
+    
+    async def slo_url(self) -> str:
+        """The IdP single logout endpoint"""
+        return (await self.get()).get_idp_slo_url()
+
+
+# Shared caches; started and stopped by the application lifespan
+jwks_cache = JWKSCache()
+saml_idp_metadata = SAMLIdPMetadataCache()
+saml_settings = SAMLSettingsCache(saml_idp_metadata)
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Pooled LDAP connections and bind authentication for direct LDAP login
+"""
+
+import ssl
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from ldap3 import Server, Connection, Tls, NONE, SUBTREE, LEVEL, BASE
+from ldap3.core.exceptions import LDAPException
+from ldap3.utils.conv import escape_filter_chars
+
+from app.core.config import settings
+from app.core.cache import TieredCache
+from app.core.exceptions import AuthenticationError
+
+logger = logging.getLogger(__name__)
+
+SEARCH_SCOPES = {'SUBTREE': SUBTREE, 'LEVEL': LEVEL, 'ONELEVEL': LEVEL, 'BASE': BASE}
+
+
+def normalize_dn(dn: str) -> str:
+    """Normalize a DN for use as a cache key (case and spacing between RDNs)"""
+    return ','.join(rdn.strip() for rdn in dn.split(',')).lower()
+
+
+def ldap_cache_keys(username: Optional[str] = None, dn: Optional[str] = None) -> List[str]:
+    """
+    Cache keys describing a directory user.
+    
+    `dn:<username>` maps a login name to its DN and `entry:<dn>` holds the
+    entry's attributes and group names. Also used by the sync job to
+    invalidate entries it modifies.
+    """
+    keys = []
+    if username:
+        keys.append(f"dn:{username.lower()}")
+    if dn:
+        keys.append(f"entry:{normalize_dn(dn)}")
+    return keys
+
+
+class LDAPPoolTimeout(Exception):
+    """Raised when no pooled LDAP connection frees up within LDAP_POOL_TIMEOUT"""
+    pass
+
+
+class LDAPOperationTimeout(LDAPException):
+    """
+    Raised when a single LDAP operation exceeds LDAP_OPERATION_TIMEOUT.
+    
+    `pending` is the executor future of the abandoned call; the worker
+    thread may still be using the connection until it completes.
+    """
+    
+    def __init__(self, message: str, pending: Optional[Future] = None):
+        super().__init__(message)
+        self.pending = pending
+
+
+# ldap3 is synchronous; every call runs on this bounded executor so a slow
+# directory ties up LDAP worker threads instead of the event loop.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.LDAP_EXECUTOR_WORKERS,
+            thread_name_prefix='ldap'
+        )
+    return _executor
+
+
+def shutdown_executor():
+    """Stop the LDAP worker threads without waiting for stuck operations"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_ldap(func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """Run a blocking ldap3 call on the LDAP executor with a deadline"""
+    future = _get_executor().submit(functools.partial(func, *args, **kwargs))
+    timeout = settings.LDAP_OPERATION_TIMEOUT if timeout is None else timeout
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+    except asyncio.TimeoutError:
+        name = getattr(func, '__name__', repr(func))
+        raise LDAPOperationTimeout(f"LDAP operation '{name}' timed out after {timeout}s", pending=future)
+
+
+@dataclass
+class LDAPUserInfo:
+    """Directory user resolved by a successful bind"""
+    uid: str
+    dn: str
+    email: str = ""
+    first_name: str = ""
+    last_name: str = ""
+    display_name: str = ""
+    groups: List[str] = field(default_factory=list)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class PooledConnection:
+    """ldap3 connection plus the bookkeeping the pool needs"""
+    connection: Connection
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    # Executor call still running on this connection after a timeout
+    pending: Optional[Future] = None
+
+
+@dataclass
+class PoolStats:
+    """Counters exported by LDAPConnectionPool.metrics()"""
+    acquired: int = 0
+    created: int = 0
+    recycled: int = 0
+    discarded: int = 0
+    health_check_failures: int = 0
+    timeouts: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+
+
+def _build_server() -> Server:
+    """Build the ldap3 Server shared by every pooled connection"""
+    tls = None
+    if settings.LDAP_USE_SSL or settings.LDAP_USE_TLS:
+        tls = Tls(
+            local_private_key_file=settings.LDAP_KEY_FILE or None,
+            local_certificate_file=settings.LDAP_CERT_FILE or None,
+            ca_certs_file=settings.LDAP_CA_CERT_FILE or None,
+            validate=ssl.CERT_REQUIRED if settings.LDAP_CA_CERT_FILE else ssl.CERT_NONE,
+        )
+    
+    return Server(
+        settings.LDAP_SERVER,
+        use_ssl=settings.LDAP_USE_SSL or settings.LDAP_SERVER.startswith('ldaps://'),
+        tls=tls,
+        get_info=NONE,
+        connect_timeout=settings.LDAP_OPERATION_TIMEOUT,
+    )
+
+
+class LDAPConnectionPool:
+    """
+    Bounded pool of reusable ldap3 connections.
+    
+    Keeps `min_size` connections warm and grows up to `max_size` under load.
+    Idle connections are probed with a WhoAmI before reuse once they have
+    been idle longer than the health-check interval, and connections older
+    than `max_lifetime` are closed instead of being returned to the pool.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        bind_dn: Optional[str] = None,
+        bind_password: Optional[str] = None,
+        min_size: int = settings.LDAP_POOL_SIZE,
+        max_size: int = settings.LDAP_POOL_MAX_SIZE,
+        timeout: float = settings.LDAP_POOL_TIMEOUT,
+        max_lifetime: float = settings.LDAP_POOL_MAX_LIFETIME,
+        health_check_interval: float = settings.LDAP_POOL_HEALTH_CHECK_INTERVAL,
+    ):
+        self.name = name
+        self.bind_dn = bind_dn
+        self.bind_password = bind_password
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.stats = PoolStats()
+        
+        self._server: Optional[Server] = None
+        self._idle: List[PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._size = 0
+        self._closed = False
+    
+    async def initialize(self):
+        """Create the server definition and warm up `min_size` connections"""
+        self._server = _build_server()
+        self._slots = asyncio.Semaphore(self.max_size)
+        self._closed = False
+        
+        for _ in range(self.min_size):
+            try:
+                self._idle.append(await self._create())
+            except Exception as e:
+                logger.warning(f"LDAP pool '{self.name}' warm-up failed: {e}")
+                break
+        
+        logger.info(f"LDAP pool '{self.name}' initialized with {len(self._idle)}/{self.max_size} connections")
+    
+    async def close(self):
+        """Close every idle connection; checked-out ones close on release"""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._discard(pooled)
+        logger.info(f"LDAP pool '{self.name}' closed")
+    
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Connection]:
+        """
+        Check out a connection for the duration of the block.
+        
+        The connection goes back to the pool only when the block exits
+        cleanly and no operation abandoned on it is still running. On any
+        exception, including cancellation, it may be left mid-operation, so
+        it is discarded.
+        """
+        pooled = await self.acquire()
+        clean = False
+        try:
+            yield pooled.connection
+            clean = True
+        except LDAPOperationTimeout as e:
+            # The worker thread may still be using the connection
+            pooled.pending = e.pending
+            raise
+        finally:
+            busy = pooled.pending is not None and not pooled.pending.done()
+            await self.release(pooled, discard=not clean or busy)
+    
+    async def acquire(self) -> PooledConnection:
+        """Wait for a free slot and return a healthy connection"""
+        if self._closed or self._slots is None:
+            raise RuntimeError(f"LDAP pool '{self.name}' is not initialized")
+        
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            raise LDAPPoolTimeout(f"Timed out waiting for LDAP pool '{self.name}'")
+        
+        waited = time.monotonic() - started
+        self.stats.acquired += 1
+        self.stats.wait_time_total += waited
+        self.stats.wait_time_max = max(self.stats.wait_time_max, waited)
+        
+        try:
+            while self._idle:
+                pooled = self._idle.pop()
+                if await self._is_usable(pooled):
+                    return pooled
+                await self._discard(pooled)
+            return await self._create()
+        except BaseException:
+            self._slots.release()
+            raise
+    
+    async def release(self, pooled: PooledConnection, discard: bool = False):
+        """Return a connection to the pool, or close it if it is stale"""
+        try:
+            now = time.monotonic()
+            if discard or self._closed or now - pooled.created_at >= self.max_lifetime:
+                if not discard and not self._closed:
+                    self.stats.recycled += 1
+                await self._discard(pooled)
+            else:
+                pooled.last_used = now
+                self._idle.append(pooled)
+        finally:
+            self._slots.release()
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of pool size and wait-time counters"""
+        acquired = self.stats.acquired
+        return {
+            'size': self._size,
+            'idle': len(self._idle),
+            'in_use': self._size - len(self._idle),
+            'max_size': self.max_size,
+            'acquired': acquired,
+            'created': self.stats.created,
+            'recycled': self.stats.recycled,
+            'discarded': self.stats.discarded,
+            'health_check_failures': self.stats.health_check_failures,
+            'timeouts': self.stats.timeouts,
+            'wait_time_avg_ms': round(self.stats.wait_time_total / acquired * 1000, 3) if acquired else 0.0,
+            'wait_time_max_ms': round(self.stats.wait_time_max * 1000, 3),
+        }
+    
+    def _open(self) -> Connection:
+        """Open (and optionally bind) a new ldap3 connection"""
+        connection = Connection(
+            self._server,
+            user=self.bind_dn,
+            password=self.bind_password,
+            receive_timeout=settings.LDAP_OPERATION_TIMEOUT,
+            raise_exceptions=False,
+        )
+        connection.open()
+        if settings.LDAP_USE_TLS and not settings.LDAP_USE_SSL:
+            connection.start_tls()
+        if self.bind_dn and not connection.bind():
+            connection.unbind()
+            raise LDAPException(f"Service bind failed: {connection.result.get('description')}")
+        return connection
+    
+    async def _create(self) -> PooledConnection:
+        connection = await run_ldap(self._open)
+        self._size += 1
+        self.stats.created += 1
+        return PooledConnection(connection=connection)
+    
+    async def _discard(self, pooled: PooledConnection):
+        self._size -= 1
+        self.stats.discarded += 1
+        if pooled.pending is not None and not pooled.pending.done():
+            # Unbinding now would race the worker thread still inside a
+            # timed-out call; let that thread close the connection when done
+            pooled.pending.add_done_callback(lambda _: self._unbind(pooled))
+            return
+        try:
+            await run_ldap(pooled.connection.unbind)
+        except Exception as e:
+            logger.debug(f"LDAP pool '{self.name}' unbind error: {e}")
+    
+    def _unbind(self, pooled: PooledConnection):
+        try:
+            pooled.connection.unbind()
+        except Exception as e:
+            logger.debug(f"LDAP pool '{self.name}' unbind error: {e}")
+    
+    async def _is_usable(self, pooled: PooledConnection) -> bool:
+        """Reject expired or closed connections and probe long-idle ones"""
+        now = time.monotonic()
+        if now - pooled.created_at >= self.max_lifetime:
+            self.stats.recycled += 1
+            return False
+        if pooled.connection.closed:
+            return False
+        if now - pooled.last_used < self.health_check_interval:
+            return True
+        
+        try:
+            await run_ldap(pooled.connection.extend.standard.who_am_i)
+            if pooled.connection.result.get('result') == 0:
+                return True
+        except LDAPOperationTimeout as e:
+            pooled.pending = e.pending
+            logger.debug(f"LDAP pool '{self.name}' health check error: {e}")
+        except Exception as e:
+            logger.debug(f"LDAP pool '{self.name}' health check error: {e}")
+        
+        self.stats.health_check_failures += 1
+        return False
+
+
+class LDAPBindAuthenticator:
+    """
+    Direct LDAP login backed by two pools.
+    
+    The search pool holds connections bound as LDAP_BIND_DN and resolves the
+    user entry and group memberships. The bind pool holds anonymous
+    connections that are rebound with the user's credentials for each login,
+    so a login never pays for a fresh TCP/TLS handshake.
+    """
+    
+    def __init__(self):
+        self.search_pool = LDAPConnectionPool(
+            'search',
+            bind_dn=settings.LDAP_BIND_DN,
+            bind_password=settings.LDAP_BIND_PASSWORD,
+        )
+        self.bind_pool = LDAPConnectionPool('bind')
+        self.cache = TieredCache(
+            'ldap',
+            max_size=settings.LDAP_CACHE_MAX_SIZE,
+            ttl=settings.LDAP_CACHE_TTL,
+            redis_enabled=settings.LDAP_CACHE_REDIS_ENABLED,
+        ) if settings.LDAP_CACHE_ENABLED else None
+        self.user_attributes = [
+            settings.LDAP_USER_ID_ATTR,
+            settings.LDAP_USER_EMAIL_ATTR,
+            settings.LDAP_USER_FIRST_NAME_ATTR,
+            settings.LDAP_USER_LAST_NAME_ATTR,
+            settings.LDAP_USER_DISPLAY_NAME_ATTR,
+        ]
+    
+    async def initialize(self):
+        """Warm up both pools and connect the lookup cache"""
+        await self.search_pool.initialize()
+        await self.bind_pool.initialize()
+        if self.cache:
+            await self.cache.initialize()
+    
+    async def close(self):
+        """Close both pools and stop the LDAP worker threads"""
+        if self.cache:
+            await self.cache.close()
+        await self.search_pool.close()
+        await self.bind_pool.close()
+        shutdown_executor()
+    
+    async def authenticate(self, username: str, password: str) -> LDAPUserInfo:
+        """
+        Authenticate a user by search-then-bind and return their profile.
+        
+        The username → DN lookup and the entry's attributes and groups are
+        cached, so a repeat login costs a single bind. A failed bind against
+        a cached DN is retried once with a fresh lookup in case the entry
+        was moved or renamed. A wrong password leaves the cache alone; only
+        a successful bind to a different DN replaces the cached lookup.
+        """
+        if not username or not password:
+            raise AuthenticationError("Invalid username or password")
+        
+        entry = None
+        user_dn = await self._cache_get(f"dn:{username.lower()}")
+        if user_dn is None:
+            entry = await self._find_user(username)
+            if not entry:
+                raise AuthenticationError("Invalid username or password")
+            user_dn = entry['dn']
+        
+        if not await self._bind(user_dn, password):
+            if entry is not None:
+                raise AuthenticationError("Invalid username or password")
+            
+            cached_dn = user_dn
+            entry = await self._find_user(username)
+            if not entry or normalize_dn(entry['dn']) == normalize_dn(cached_dn):
+                raise AuthenticationError("Invalid username or password")
+            user_dn = entry['dn']
+            if not await self._bind(user_dn, password):
+                raise AuthenticationError("Invalid username or password")
+            
+            # The entry moved: drop the stale DN and profile everywhere
+            await self.invalidate(username=username, dn=cached_dn)
+        
+        profile = await self._load_profile(user_dn, entry)
+        await self._cache_set(f"dn:{username.lower()}", user_dn)
+        
+        attributes = profile['attributes']
+        return LDAPUserInfo(
+            uid=self._first(attributes.get(settings.LDAP_USER_ID_ATTR)) or username,
+            dn=user_dn,
+            email=self._first(attributes.get(settings.LDAP_USER_EMAIL_ATTR)),
+            first_name=self._first(attributes.get(settings.LDAP_USER_FIRST_NAME_ATTR)),
+            last_name=self._first(attributes.get(settings.LDAP_USER_LAST_NAME_ATTR)),
+            display_name=self._first(attributes.get(settings.LDAP_USER_DISPLAY_NAME_ATTR)),
+            groups=profile['groups'],
+            attributes=attributes,
+        )
+    
+    async def invalidate(self, username: Optional[str] = None, dn: Optional[str] = None):
+        """Drop cached lookups for a user"""
+        if self.cache:
+            await self.cache.delete(*ldap_cache_keys(username=username, dn=dn))
+    
+    async def health_check(self):
+        """Raise if the directory cannot be reached through the search pool"""
+        async with self.search_pool.connection() as connection:
+            await run_ldap(connection.extend.standard.who_am_i)
+            if connection.result.get('result') != 0:
+                raise LDAPException(connection.result.get('description'))
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Pool metrics for both pools and lookup cache counters"""
+        return {
+            'search': self.search_pool.metrics(),
+            'bind': self.bind_pool.metrics(),
+            'cache': self.cache.stats() if self.cache else None,
+        }
+    
+    async def _cache_get(self, key: str) -> Optional[Any]:
+        return await self.cache.get(key) if self.cache else None
+    
+    async def _cache_set(self, key: str, value: Any):
+        if self.cache:
+            await self.cache.set(key, value)
+    
+    async def _load_profile(self, user_dn: str, entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Attributes and group names of a bound user, from cache when possible"""
+        key = f"entry:{normalize_dn(user_dn)}"
+        profile = await self._cache_get(key)
+        if profile is not None:
+            return profile
+        
+        if entry is None:
+            entry = await self._read_entry(user_dn)
+        
+        profile = {
+            'attributes': entry['attributes'] if entry else {},
+            'groups': await self._find_groups(user_dn),
+        }
+        await self._cache_set(key, profile)
+        return profile
+    
+    async def _find_user(self, username: str) -> Optional[Dict[str, Any]]:
+        search_filter = settings.LDAP_USER_FILTER.format(username=escape_filter_chars(username))
+        
+        async with self.search_pool.connection() as connection:
+            await run_ldap(
+                connection.search,
+                settings.LDAP_USER_DN,
+                search_filter,
+                search_scope=SEARCH_SCOPES.get(settings.LDAP_USER_SEARCH_SCOPE.upper(), SUBTREE),
+                attributes=self.user_attributes,
+                size_limit=2,
+            )
+            entries = [e for e in connection.response or [] if e.get('type') == 'searchResEntry']
+        
+        if len(entries) != 1:
+            if len(entries) > 1:
+                logger.warning(f"LDAP user filter matched multiple entries for: {username}")
+            return None
+        
+        return {'dn': entries[0]['dn'], 'attributes': dict(entries[0]['attributes'])}
+    
+    async def _read_entry(self, user_dn: str) -> Optional[Dict[str, Any]]:
+        async with self.search_pool.connection() as connection:
+            await run_ldap(
+                connection.search,
+                user_dn,
+                '(objectClass=*)',
+                search_scope=BASE,
+                attributes=self.user_attributes,
+            )
+            entries = [e for e in connection.response or [] if e.get('type') == 'searchResEntry']
+        
+        return {'dn': entries[0]['dn'], 'attributes': dict(entries[0]['attributes'])} if entries else None
+    
+    async def _bind(self, user_dn: str, password: str) -> bool:
+        async with self.bind_pool.connection() as connection:
+            return await run_ldap(connection.rebind, user=user_dn, password=password)
+    
+    async def _find_groups(self, user_dn: str) -> List[str]:
+        search_filter = f"({settings.LDAP_GROUP_MEMBER_ATTR}={escape_filter_chars(user_dn)})"
+        
+        async with self.search_pool.connection() as connection:
+            await run_ldap(
+                connection.search,
+                settings.LDAP_GROUP_DN,
+                search_filter,
+                search_scope=SEARCH_SCOPES.get(settings.LDAP_GROUP_SEARCH_SCOPE.upper(), SUBTREE),
+                attributes=[settings.LDAP_GROUP_NAME_ATTR],
+            )
+            entries = [e for e in connection.response or [] if e.get('type') == 'searchResEntry']
+        
+        return [
+            name for name in (self._first(e['attributes'].get(settings.LDAP_GROUP_NAME_ATTR)) for e in entries)
+            if name
+        ]
+    
+    @staticmethod
+    def _first(value: Any) -> str:
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else ""
+        return str(value) if value is not None else ""
+
+
+# Shared authenticator; started and stopped by the application lifespan
+ldap_authenticator = LDAPBindAuthenticator()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+SAML service-provider artifacts: signing credentials and SP metadata
+"""
+
+import time
+import base64
+import calendar
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from onelogin.saml2.constants import OneLogin_Saml2_Constants
+from onelogin.saml2.metadata import OneLogin_Saml2_Metadata
+from onelogin.saml2.settings import OneLogin_Saml2_Settings
+from onelogin.saml2.utils import OneLogin_Saml2_Utils
+from onelogin.saml2.xml_utils import OneLogin_Saml2_XML
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Without a certificate to date it, unsigned metadata is valid for two of
+# these epoch-aligned windows and rebuilt when the window rolls over, so
+# every worker and replica serves the same document
+METADATA_WINDOW_SECONDS = 86400
+
+# XML-DSig signature algorithm URIs → hash used for redirect-binding signatures
+SIGNATURE_HASHES = {
+    OneLogin_Saml2_Constants.RSA_SHA1: hashes.SHA1,
+    OneLogin_Saml2_Constants.RSA_SHA256: hashes.SHA256,
+    OneLogin_Saml2_Constants.RSA_SHA384: hashes.SHA384,
+    OneLogin_Saml2_Constants.RSA_SHA512: hashes.SHA512,
+}
+
+
+class SAMLSigningCredentials:
+    """
+    The SP key pair from SAML_PRIVATE_KEY / SAML_X509_CERT, parsed once.
+    
+    Both settings hold base64 (PEM headers optional). The parsed key and
+    certificate are kept for the life of the process so signing a login
+    or logout request never re-reads PEM data.
+    """
+    
+    def __init__(self):
+        self.private_key_pem = ''
+        self.certificate_pem = ''
+        if settings.SAML_PRIVATE_KEY:
+            self.private_key_pem = OneLogin_Saml2_Utils.format_private_key(settings.SAML_PRIVATE_KEY)
+        if settings.SAML_X509_CERT:
+            self.certificate_pem = OneLogin_Saml2_Utils.format_cert(settings.SAML_X509_CERT)
+        self._private_key = None
+        self._certificate: Optional[x509.Certificate] = None
+    
+    @property
+    def configured(self) -> bool:
+        return bool(self.private_key_pem and self.certificate_pem)
+    
+    @property
+    def private_key(self):
+        if self._private_key is None:
+            self._private_key = serialization.load_pem_private_key(self.private_key_pem.encode(), password=None)
+        return self._private_key
+    
+    @property
+    def certificate(self) -> x509.Certificate:
+        if self._certificate is None:
+            self._certificate = x509.load_pem_x509_certificate(self.certificate_pem.encode())
+        return self._certificate
+    
+    def load(self):
+        """Parse both PEMs up front and check that they belong together"""
+        if not self.configured:
+            logger.info("SAML signing credentials not configured")
+            return
+        
+        if self.private_key.public_key().public_numbers() != self.certificate.public_key().public_numbers():
+            logger.warning("SAML_PRIVATE_KEY does not match SAML_X509_CERT")
+        logger.info(f"SAML signing certificate valid until {self.certificate.not_valid_after}")
+    
+    def redirect_query(self, params: Mapping[str, str]) -> str:
+        """
+        Query string for the HTTP-Redirect binding.
+        
+        `params` holds SAMLRequest or SAMLResponse and optionally
+        RelayState. When SAML_SIGN_REQUESTS is on, SigAlg and Signature are
+        appended as the binding requires: the signature covers the
+        URL-encoded message, RelayState and SigAlg, in that order.
+        """
+        if not (settings.SAML_SIGN_REQUESTS and self.configured):
+            return urlencode(params)
+        
+        signed = [
+            (name, params[name])
+            for name in ('SAMLRequest', 'SAMLResponse', 'RelayState')
+            if params.get(name) is not None
+        ]
+        signed.append(('SigAlg', settings.SAML_SIGNATURE_ALGORITHM))
+        query = urlencode(signed)
+        
+        hash_algorithm = SIGNATURE_HASHES[settings.SAML_SIGNATURE_ALGORITHM]
+        signature = self.private_key.sign(query.encode(), padding.PKCS1v15(), hash_algorithm())
+        return f"{query}&{urlencode({'Signature': base64.b64encode(signature).decode()})}"
+
+
+@dataclass(frozen=True)
+class MetadataDocument:
+    """Serialized SP metadata with its HTTP validators"""
+    body: bytes
+    etag: str
+    last_modified: str
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            'ETag': self.etag,
+            'Last-Modified': self.last_modified,
+            'Cache-Control': f"public, max-age={settings.SAML_SP_METADATA_MAX_AGE}",
+        }
+    
+    def not_modified(self, request_headers: Mapping[str, str]) -> bool:
+        """Whether a conditional GET can be answered with 304"""
+        if_none_match = request_headers.get('if-none-match')
+        if if_none_match is not None:
+            return any(tag.strip() in (self.etag, '*') for tag in if_none_match.split(','))
+        
+        if_modified_since = request_headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(self.last_modified)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+def _metadata_validity(credentials: SAMLSigningCredentials) -> Tuple[datetime, datetime]:
+    """
+    (validUntil, Last-Modified) for the SP metadata, derived from configuration.
+    
+    With a signing certificate the document is valid for the certificate's
+    lifetime and dated by its issue; otherwise by the current window.
+    """
+    if credentials.configured:
+        certificate = credentials.certificate
+        return certificate.not_valid_after, certificate.not_valid_before
+    
+    window_start = int(time.time()) // METADATA_WINDOW_SECONDS * METADATA_WINDOW_SECONDS
+    return (
+        datetime.utcfromtimestamp(window_start + 2 * METADATA_WINDOW_SECONDS),
+        datetime.utcfromtimestamp(window_start),
+    )
+
+
+def _http_date(value: datetime) -> str:
+    return formatdate(calendar.timegm(value.timetuple()), usegmt=True)
+
+
+def sp_settings() -> Dict[str, Any]:
+    """The SP and security sections of python3-saml settings, from configuration"""
+    return {
+        'strict': True,
+        'sp': {
+            'entityId': settings.SAML_ENTITY_ID,
+            'assertionConsumerService': {
+                'url': settings.SAML_ACS_URL,
+                'binding': OneLogin_Saml2_Constants.BINDING_HTTP_POST,
+            },
+            'singleLogoutService': {
+                'url': settings.SAML_SLO_URL,
+                'binding': OneLogin_Saml2_Constants.BINDING_HTTP_REDIRECT,
+            },
+            'NameIDFormat': OneLogin_Saml2_Constants.NAMEID_UNSPECIFIED,
+            'x509cert': settings.SAML_X509_CERT,
+            'privateKey': settings.SAML_PRIVATE_KEY,
+        },
+        'security': {
+            'wantAssertionsSigned': settings.SAML_WANT_ASSERTIONS_SIGNED,
+            'wantMessagesSigned': settings.SAML_WANT_RESPONSE_SIGNED,
+            'wantAssertionsEncrypted': settings.SAML_ENCRYPT_ASSERTIONS,
+            'signatureAlgorithm': settings.SAML_SIGNATURE_ALGORITHM,
+            'digestAlgorithm': settings.SAML_DIGEST_ALGORITHM,
+        },
+    }
+
+
+def _metadata_settings(credentials: SAMLSigningCredentials, valid_until: datetime) -> Dict[str, Any]:
+    """python3-saml settings for the SP metadata (no IdP section needed)"""
+    metadata_settings = sp_settings()
+    metadata_settings['security'].update({
+        # Advertised only when redirects can actually be signed
+        'authnRequestsSigned': settings.SAML_SIGN_REQUESTS and credentials.configured,
+        # Pinned so the document is identical in every process
+        'metadataValidUntil': valid_until,
+        'metadataCacheDuration': settings.SAML_SP_METADATA_MAX_AGE,
+    })
+    return metadata_settings
+
+
+def _sign_metadata(metadata: bytes, credentials: SAMLSigningCredentials) -> bytes:
+    """
+    Sign the metadata under an ID derived from its unsigned content.
+    
+    python3-saml would give the EntityDescriptor a random ID while signing;
+    with a content-derived ID (and deterministic PKCS#1 v1.5 signatures)
+    the signed bytes, and so the ETag, are the same in every process.
+    """
+    root = OneLogin_Saml2_XML.to_etree(metadata)
+    root.set('ID', f"_{hashlib.sha1(metadata).hexdigest()}")
+    return OneLogin_Saml2_Metadata.sign_metadata(
+        OneLogin_Saml2_XML.to_string(root),
+        credentials.private_key_pem,
+        credentials.certificate_pem,
+        settings.SAML_SIGNATURE_ALGORITHM,
+        settings.SAML_DIGEST_ALGORITHM,
+    )
+
+
+class SPMetadataCache:
+    """
+    SP metadata, generated and signed ahead of the first request.
+    
+    The document only depends on configuration (entity ID, endpoints,
+    certificate and its validity), so every worker and replica builds the
+    same bytes, ETag and Last-Modified, and conditional requests get 304s
+    wherever they land. It is served from memory and rebuilt only when its
+    validUntil changes.
+    """
+    
+    def __init__(self, credentials: SAMLSigningCredentials):
+        self.credentials = credentials
+        self._document: Optional[MetadataDocument] = None
+        self._valid_until: Optional[datetime] = None
+    
+    def initialize(self):
+        """Parse the signing credentials and build the metadata ahead of the first request"""
+        try:
+            self.credentials.load()
+            self.get()
+        except Exception as e:
+            # /saml/metadata retries on demand
+            logger.warning(f"SAML SP metadata preparation failed: {e}")
+    
+    def get(self) -> MetadataDocument:
+        valid_until, last_modified = _metadata_validity(self.credentials)
+        if self._document is None or valid_until != self._valid_until:
+            self._document = self._build(valid_until, last_modified)
+            self._valid_until = valid_until
+        return self._document
+    
+    def _build(self, valid_until: datetime, last_modified: datetime) -> MetadataDocument:
+        saml_settings = OneLogin_Saml2_Settings(
+            _metadata_settings(self.credentials, valid_until), sp_validation_only=True
+        )
+        metadata = saml_settings.get_sp_metadata()
+        body = metadata if isinstance(metadata, bytes) else metadata.encode('utf-8')
+        if self.credentials.configured:
+            body = _sign_metadata(body, self.credentials)
+        
+        errors = saml_settings.validate_metadata(body)
+        if errors:
+            raise ValueError(f"Invalid SP metadata: {', '.join(errors)}")
+        
+        logger.info(f"Generated SAML SP metadata for {settings.SAML_ENTITY_ID} (valid until {valid_until})")
+        return MetadataDocument(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            last_modified=_http_date(last_modified),
+        )
+
+
+# Shared instances; metadata is built by the application lifespan
+saml_credentials = SAMLSigningCredentials()
+sp_metadata = SPMetadataCache(saml_credentials)
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Redis session store with expiry and per-user indexes
+"""
+
+import json
+import time
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.cache import create_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Redis keys (REDIS_SESSION_DB)
+SESSION_KEY_PREFIX = 'session:'
+SESSION_INDEX_KEY = 'sessions:by_expiry'
+USER_SESSIONS_PREFIX = 'sessions:user:'
+
+# Hash fields stored as JSON rather than plain strings
+JSON_FIELDS = ('groups', 'tokens')
+
+# Hash fields stored as numbers (epoch seconds)
+TIME_FIELDS = ('created_at', 'expires_at', 'last_activity')
+
+# Writes to an existing session must not recreate it after a concurrent
+# logout or revoke, so they only apply while the hash still exists.
+
+# KEYS: session hash; ARGV: field, value, ...
+UPDATE_SESSION_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV))
+return 1
+"""
+
+# KEYS: session hash, expiry index, user set
+# ARGV: ttl, session id, expires_at, last_activity
+EXTEND_SESSION_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'expires_at', ARGV[3], 'last_activity', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[1])
+return 1
+"""
+
+
+def session_id_for_token(token: str) -> str:
+    """Sessions are keyed by a hash of the JWT issued at login"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def request_token(request: Request) -> Optional[str]:
+    """The caller's JWT from the Authorization header or the session cookie"""
+    authorization = request.headers.get('Authorization', '')
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() == 'bearer' and token:
+        return token.strip()
+    return request.cookies.get(settings.SESSION_COOKIE_NAME)
+
+
+def _encode(session: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        field: json.dumps(value) if field in JSON_FIELDS else str(value)
+        for field, value in session.items()
+        if value is not None
+    }
+
+
+def _decode(fields: Dict[str, str]) -> Dict[str, Any]:
+    session: Dict[str, Any] = dict(fields)
+    for field in JSON_FIELDS:
+        if field in session:
+            session[field] = json.loads(session[field])
+    for field in TIME_FIELDS:
+        if field in session:
+            session[field] = float(session[field])
+    return session
+
+
+def session_summary(session: Dict[str, Any]) -> Dict[str, Any]:
+    """A session as shown to admins: everything except the tokens"""
+    return {field: value for field, value in session.items() if field != 'tokens'}
+
+
+def _make_cursor(expires_at: float, session_id: str) -> str:
+    return f"{expires_at!r}:{session_id}"
+
+
+def _parse_cursor(cursor: str) -> Tuple[float, str]:
+    score, _, session_id = cursor.partition(':')
+    try:
+        return float(score), session_id
+    except ValueError:
+        raise ValueError(f"Invalid session cursor: {cursor}")
+
+
+@dataclass
+class SessionFilter:
+    """Optional criteria for admin session queries"""
+    user_id: Optional[str] = None
+    source: Optional[str] = None
+    group: Optional[str] = None
+    created_after: Optional[float] = None
+    created_before: Optional[float] = None
+    
+    @property
+    def active(self) -> bool:
+        return any(
+            value is not None
+            for value in (self.user_id, self.source, self.group, self.created_after, self.created_before)
+        )
+    
+    def matches(self, session: Dict[str, Any]) -> bool:
+        if self.user_id is not None and session.get('user_id') != self.user_id:
+            return False
+        if self.source is not None and session.get('source') != self.source:
+            return False
+        if self.group is not None and self.group not in session.get('groups', []):
+            return False
+        if self.created_after is not None and session.get('created_at', 0) <= self.created_after:
+            return False
+        if self.created_before is not None and session.get('created_at', 0) >= self.created_before:
+            return False
+        return True
+
+
+class RedisSessionStore:
+    """
+    Server-side sessions on REDIS_SESSION_DB.
+    
+    Each session is a hash `session:<id>` that expires on its own after
+    SESSION_EXPIRE_SECONDS. A sorted set of session ids scored by expiry
+    backs paginated admin listing, and a set per user backs per-user
+    lookups, so no operation scans the keyspace. Every write is a single
+    pipelined round-trip. Reads extend the session (sliding expiry) only
+    once SESSION_REFRESH_THRESHOLD seconds have passed since the last
+    extension, so most requests never write.
+    """
+    
+    def __init__(self):
+        self.redis = None
+        self._update_script = None
+        self._extend_script = None
+    
+    async def initialize(self):
+        self.redis = create_redis_client(settings.redis_session_url)
+        await self.redis.ping()
+        self._update_script = self.redis.register_script(UPDATE_SESSION_SCRIPT)
+        self._extend_script = self.redis.register_script(EXTEND_SESSION_SCRIPT)
+        logger.info("Session store connected to Redis")
+    
+    async def close(self):
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+    
+    async def health_check(self):
+        await self.redis.ping()
+    
+    async def create_session(
+        self,
+        request: Request,
+        user_id: str,
+        tokens: Dict[str, Any],
+        source: str = 'local',
+        email: Optional[str] = None,
+        groups: Optional[List[str]] = None,
+    ) -> str:
+        """Store a new session for the JWT in `tokens`; returns the session id"""
+        now = time.time()
+        session_id = session_id_for_token(tokens['jwt_token'])
+        session = {
+            'session_id': session_id,
+            'user_id': user_id,
+            'source': source,
+            'email': email,
+            'groups': groups or [],
+            'tokens': tokens,
+            'ip_address': request.client.host if request.client else None,
+            'user_agent': request.headers.get('User-Agent'),
+            'created_at': now,
+            'expires_at': now + settings.SESSION_EXPIRE_SECONDS,
+            'last_activity': now,
+        }
+        
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_write(pipe, session)
+            await pipe.execute()
+        
+        return session_id
+    
+    async def get_session(self, request: Request) -> Optional[Dict[str, Any]]:
+        """The caller's session, extending it if the refresh threshold has passed"""
+        token = request_token(request)
+        if not token:
+            return None
+        
+        session = await self.get_session_by_id(session_id_for_token(token))
+        if session and time.time() - session['last_activity'] >= settings.SESSION_REFRESH_THRESHOLD:
+            if not await self._extend(session):
+                # Logged out or revoked since it was read
+                return None
+        return session
+    
+    async def get_session_by_id(self, session_id: str) -> Optional[Dict[str, Any]]:
+        fields = await self.redis.hgetall(f"{SESSION_KEY_PREFIX}{session_id}")
+        return _decode(fields) if fields else None
+    
+    async def update_session(self, request: Request, session_data: Dict[str, Any]) -> bool:
+        """
+        Write changed session fields back without touching the expiry.
+        
+        Returns False, writing nothing, if the session no longer exists.
+        """
+        token = request_token(request)
+        if not token:
+            return False
+        
+        fields = _encode({
+            field: value for field, value in session_data.items()
+            if field not in ('session_id', 'user_id', 'created_at', 'expires_at')
+        })
+        if not fields:
+            return True
+        
+        session_key = f"{SESSION_KEY_PREFIX}{session_id_for_token(token)}"
+        args = [item for pair in fields.items() for item in pair]
+        return bool(await self._update_script(keys=[session_key], args=args))
+    
+    async def destroy_session(self, request: Request):
+        token = request_token(request)
+        if token:
+            await self.revoke_session(session_id_for_token(token))
+    
+    async def revoke_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Delete a session and its index entries; returns it if it existed"""
+        session = await self.get_session_by_id(session_id)
+        
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_delete(pipe, session_id, session['user_id'] if session else None)
+            await pipe.execute()
+        
+        return session
+    
+    async def revoke_sessions(self, session_filter: SessionFilter) -> Tuple[int, Set[str]]:
+        """
+        Delete every session matching the filter.
+        
+        Walks the matches SESSION_LIST_MAX_SCAN index entries at a time and
+        deletes each batch in one pipelined round-trip. Returns the number
+        of sessions removed and the ids of their users.
+        """
+        if not session_filter.active:
+            raise ValueError("Bulk revocation requires at least one filter")
+        
+        revoked = 0
+        user_ids: Set[str] = set()
+        cursor = None
+        while True:
+            sessions, cursor = await self.list_sessions(cursor, settings.SESSION_LIST_MAX_SCAN, session_filter)
+            if sessions:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for session in sessions:
+                        self._queue_delete(pipe, session['session_id'], session['user_id'])
+                    await pipe.execute()
+                revoked += len(sessions)
+                user_ids.update(session['user_id'] for session in sessions)
+            if cursor is None:
+                break
+        
+        logger.info(f"Bulk revoked {revoked} sessions for {len(user_ids)} users")
+        return revoked, user_ids
+    
+    async def session_user_ids(self, session_filter: SessionFilter) -> Set[str]:
+        """Ids of the users holding sessions that match a bulk revocation filter"""
+        if not session_filter.active:
+            raise ValueError("Bulk revocation requires at least one filter")
+        
+        return {
+            session['user_id']
+            async for session in self.iter_sessions(session_filter, settings.SESSION_LIST_MAX_SCAN)
+        }
+    
+    async def list_sessions(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = settings.SESSION_LIST_PAGE_SIZE,
+        session_filter: Optional[SessionFilter] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of live sessions ordered by expiry, without their tokens.
+        
+        Returns the sessions and the cursor for the next page (None on the
+        last page). Cursors are "<expires_at>:<session_id>" of the last
+        index entry examined. A user_id filter reads that user's set; other
+        filters are applied while walking the expiry index and examine at
+        most SESSION_LIST_MAX_SCAN entries per call, so a filtered page may
+        hold fewer than `limit` sessions and still have a next cursor. A
+        malformed cursor raises ValueError.
+        """
+        session_filter = session_filter or SessionFilter()
+        if session_filter.user_id:
+            return await self._list_user_sessions(cursor, limit, session_filter)
+        
+        now = time.time()
+        await self.redis.zremrangebyscore(SESSION_INDEX_KEY, '-inf', now)
+        
+        sessions: List[Dict[str, Any]] = []
+        scanned = 0
+        while len(sessions) < limit and scanned < settings.SESSION_LIST_MAX_SCAN:
+            batch = limit - len(sessions) if not session_filter.active else limit
+            entries = await self._index_page(cursor, batch, now)
+            if not entries:
+                return sessions, None
+            
+            scanned += len(entries)
+            loaded = await self._load([session_id for session_id, _ in entries])
+            loaded = {session['session_id']: session for session in loaded}
+            for session_id, expires_at in entries:
+                cursor = _make_cursor(expires_at, session_id)
+                session = loaded.get(session_id)
+                if session and session_filter.matches(session):
+                    sessions.append(session_summary(session))
+                    if len(sessions) == limit:
+                        return sessions, cursor
+            
+            if len(entries) < batch:
+                return sessions, None
+        
+        return sessions, cursor
+    
+    async def iter_sessions(
+        self,
+        session_filter: Optional[SessionFilter] = None,
+        batch_size: int = settings.SESSION_LIST_PAGE_SIZE,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Every matching session, fetched from Redis one batch at a time"""
+        cursor = None
+        while True:
+            sessions, cursor = await self.list_sessions(cursor, batch_size, session_filter)
+            for session in sessions:
+                yield session
+            if cursor is None:
+                return
+    
+    async def count_sessions(self, session_filter: Optional[SessionFilter] = None) -> int:
+        """
+        Number of live sessions matching the filter.
+        
+        Unfiltered counts come straight from the expiry index; filters other
+        than user_id walk the matching sessions in batches.
+        """
+        session_filter = session_filter or SessionFilter()
+        if not session_filter.active:
+            return await self.redis.zcount(SESSION_INDEX_KEY, time.time(), '+inf')
+        
+        count = 0
+        async for _ in self.iter_sessions(session_filter, settings.SESSION_LIST_MAX_SCAN):
+            count += 1
+        return count
+    
+    async def user_session_ids(self, user_id: str) -> List[str]:
+        return list(await self.redis.smembers(f"{USER_SESSIONS_PREFIX}{user_id}"))
+    
+    async def _list_user_sessions(
+        self,
+        cursor: Optional[str],
+        limit: int,
+        session_filter: SessionFilter,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page through one user's sessions; the per-user set is small"""
+        session_ids = await self.user_session_ids(session_filter.user_id)
+        sessions = await self._load(session_ids)
+        
+        stale_ids = set(session_ids) - {session['session_id'] for session in sessions}
+        if stale_ids:
+            await self.redis.srem(f"{USER_SESSIONS_PREFIX}{session_filter.user_id}", *stale_ids)
+        
+        position = _parse_cursor(cursor) if cursor else None
+        matches = sorted(
+            (
+                session for session in sessions
+                if session_filter.matches(session)
+                and (position is None or (session['expires_at'], session['session_id']) > position)
+            ),
+            key=lambda session: (session['expires_at'], session['session_id'])
+        )
+        
+        page = matches[:limit]
+        next_cursor = None
+        if len(matches) > limit:
+            next_cursor = _make_cursor(page[-1]['expires_at'], page[-1]['session_id'])
+        return [session_summary(session) for session in page], next_cursor
+    
+    async def _index_page(self, cursor: Optional[str], count: int, now: float) -> List[Tuple[str, float]]:
+        """Up to `count` (session_id, expires_at) index entries after `cursor`"""
+        if cursor:
+            score, after_id = _parse_cursor(cursor)
+            rank = await self.redis.zrank(SESSION_INDEX_KEY, after_id)
+            if rank is not None:
+                return await self.redis.zrange(SESSION_INDEX_KEY, rank + 1, rank + count, withscores=True)
+            # The cursor's session is gone; resume after its expiry instead
+            return await self.redis.zrangebyscore(
+                SESSION_INDEX_KEY, f"({score!r}", '+inf', start=0, num=count, withscores=True
+            )
+        return await self.redis.zrangebyscore(
+            SESSION_INDEX_KEY, now, '+inf', start=0, num=count, withscores=True
+        )
+    
+    async def _load(self, session_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch sessions in one pipelined round-trip, skipping expired or incomplete ones"""
+        if not session_ids:
+            return []
+        
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.hgetall(f"{SESSION_KEY_PREFIX}{session_id}")
+            results = await pipe.execute()
+        
+        return [
+            _decode(fields) for fields in results
+            if fields and 'session_id' in fields and 'user_id' in fields
+        ]
+    
+    def _queue_write(self, pipe, session: Dict[str, Any]):
+        """Queue the hash, its TTL and both index entries on `pipe`"""
+        session_key = f"{SESSION_KEY_PREFIX}{session['session_id']}"
+        user_key = f"{USER_SESSIONS_PREFIX}{session['user_id']}"
+        
+        pipe.hset(session_key, mapping=_encode(session))
+        pipe.expire(session_key, settings.SESSION_EXPIRE_SECONDS)
+        pipe.zadd(SESSION_INDEX_KEY, {session['session_id']: session['expires_at']})
+        pipe.sadd(user_key, session['session_id'])
+        pipe.expire(user_key, settings.SESSION_EXPIRE_SECONDS)
+    
+    def _queue_delete(self, pipe, session_id: str, user_id: Optional[str]):
+        """Queue removal of a session hash and its index entries on `pipe`"""
+        pipe.delete(f"{SESSION_KEY_PREFIX}{session_id}")
+        pipe.zrem(SESSION_INDEX_KEY, session_id)
+        if user_id is not None:
+            pipe.srem(f"{USER_SESSIONS_PREFIX}{user_id}", session_id)
+    
+    async def _extend(self, session: Dict[str, Any]) -> bool:
+        """
+        Sliding expiry: push expires_at out by SESSION_EXPIRE_SECONDS.
+        
+        Returns False, leaving Redis untouched, if the session was deleted
+        since it was read.
+        """
+        now = time.time()
+        session['last_activity'] = now
+        session['expires_at'] = now + settings.SESSION_EXPIRE_SECONDS
+        
+        return bool(await self._extend_script(
+            keys=[
+                f"{SESSION_KEY_PREFIX}{session['session_id']}",
+                SESSION_INDEX_KEY,
+                f"{USER_SESSIONS_PREFIX}{session['user_id']}",
+            ],
+            args=[
+                settings.SESSION_EXPIRE_SECONDS,
+                session['session_id'],
+                str(session['expires_at']),
+                str(session['last_activity']),
+            ],
+        ))
+
+
+# Shared store; connected by the application lifespan
+session_store = RedisSessionStore()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Short-lived, single-use state for OAuth and SAML login flows
+"""
+
+import json
+import secrets
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.cache import TTLCache, create_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Redis key prefixes (REDIS_SESSION_DB)
+OAUTH_STATE_PREFIX = 'oauth_state:'
+SAML_REQUEST_PREFIX = 'saml_request:'
+
+
+class AuthStateStore:
+    """
+    Transient login-flow state, kept apart from user sessions.
+    
+    Each entry is one small key written with SET NX EX and consumed with
+    GETDEL, so verification is a single atomic round-trip, a value can be
+    used only once, and abandoned flows expire after AUTH_STATE_TTL. Falls
+    back to a bounded in-process cache when Redis is unavailable (single
+    node development only).
+    """
+    
+    def __init__(self):
+        self.redis = None
+        self._local = TTLCache(settings.AUTH_STATE_MEMORY_MAX_SIZE, settings.AUTH_STATE_TTL)
+    
+    async def initialize(self):
+        try:
+            self.redis = create_redis_client(settings.redis_session_url)
+            await self.redis.ping()
+            logger.info("Auth state store connected to Redis")
+        except Exception as e:
+            logger.warning(f"Auth state store falling back to process memory: {e}")
+            self.redis = None
+    
+    async def close(self):
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+    
+    async def issue_oauth_state(self, redirect_uri: Optional[str] = None) -> str:
+        """Generate and store a new OAuth `state` value"""
+        while True:
+            state = secrets.token_urlsafe(32)
+            if await self._put(f"{OAUTH_STATE_PREFIX}{state}", {'redirect_uri': redirect_uri}):
+                return state
+    
+    async def consume_oauth_state(self, state: str) -> Optional[Dict[str, Any]]:
+        """The data stored with `state`, or None if unknown, expired or already used"""
+        return await self._pop(f"{OAUTH_STATE_PREFIX}{state}")
+    
+    async def store_saml_request(self, request_id: str, redirect_uri: Optional[str] = None) -> bool:
+        return await self._put(f"{SAML_REQUEST_PREFIX}{request_id}", {'redirect_uri': redirect_uri})
+    
+    async def consume_saml_request(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """The data stored for an AuthnRequest ID, or None if unknown, expired or already used"""
+        return await self._pop(f"{SAML_REQUEST_PREFIX}{request_id}")
+    
+    async def _put(self, key: str, value: Dict[str, Any]) -> bool:
+        """Store `value` unless `key` already exists"""
+        if self.redis:
+            return bool(await self.redis.set(key, json.dumps(value), nx=True, ex=settings.AUTH_STATE_TTL))
+        
+        if self._local.get(key) is not None:
+            return False
+        self._local.set(key, value)
+        return True
+    
+    async def _pop(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.redis:
+            value = await self.redis.getdel(key)
+            return json.loads(value) if value is not None else None
+        
+        value = self._local.get(key)
+        self._local.delete(key)
+        return value
+
+
+# Shared store; connected by the application lifespan
+state_store = AuthStateStore()
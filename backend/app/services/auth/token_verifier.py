@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Local JWT verification with a decoded-claims cache and revocation denylist
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, Optional, Set
+
+import jwt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+from app.core.config import settings
+from app.core.cache import TTLCache, create_redis_client
+from app.core.exceptions import AuthenticationError
+
+logger = logging.getLogger(__name__)
+security = HTTPBearer(auto_error=False)
+
+# Redis keys (REDIS_SESSION_DB) shared by every worker
+REVOKED_TOKENS_KEY = 'auth:revoked'
+REVOCATION_VERSION_KEY = 'auth:revoked:version'
+TOKEN_VERSIONS_KEY = 'auth:token_versions'
+
+# How often a worker drops token versions older than any live token
+TOKEN_VERSION_PRUNE_SECONDS = 3600
+
+# KEYS: token versions hash, revocation version key
+# ARGV: now (epoch seconds), user id, ...
+# A user's version becomes the revocation time, kept strictly increasing
+BUMP_TOKEN_VERSIONS_SCRIPT = """
+local now = tonumber(ARGV[1])
+local versions = {}
+for i = 2, #ARGV do
+    local version = math.max(now, tonumber(redis.call('HGET', KEYS[1], ARGV[i]) or '0') + 1)
+    redis.call('HSET', KEYS[1], ARGV[i], string.format('%d', version))
+    versions[#versions + 1] = version
+end
+redis.call('INCR', KEYS[2])
+return versions
+"""
+
+# KEYS: token versions hash, revocation version key
+# ARGV: cutoff (epoch seconds), user id, ...
+# Re-checks each entry so a concurrent bump is never deleted
+PRUNE_TOKEN_VERSIONS_SCRIPT = """
+local removed = 0
+for i = 2, #ARGV do
+    local version = redis.call('HGET', KEYS[1], ARGV[i])
+    if version and tonumber(version) < tonumber(ARGV[1]) then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+        removed = removed + 1
+    end
+end
+if removed > 0 then
+    redis.call('INCR', KEYS[2])
+end
+return removed
+"""
+
+
+class TokenVerifier:
+    """
+    Verifies access tokens without leaving the process in the common case.
+    
+    Decoded claims are cached by SHA-256 of the token until the token's own
+    `exp` (capped by JWT_VERIFY_CACHE_MAX_TTL). Revocations live in a Redis
+    sorted set of token ids scored by expiry plus a version counter; each
+    worker polls the counter in the background and reloads its local copy
+    of the set only when the version moves, so a request never waits on
+    Redis.
+    
+    Bulk revocation works per user instead: tokens carry the user's
+    `token_version` from login time, and bumping the user's version in
+    Redis invalidates every token issued before the bump. Versions are the
+    time of the user's last revocation, so once every token issued before
+    it has expired the entry carries no information and is pruned.
+    """
+    
+    def __init__(self):
+        self.claims_cache = TTLCache(settings.JWT_VERIFY_CACHE_SIZE, settings.JWT_VERIFY_CACHE_MAX_TTL)
+        self.revoked: Set[str] = set()
+        self.token_versions: Dict[str, int] = {}
+        self.revocation_version: Optional[str] = None
+        self.redis = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._bump_script = None
+        self._prune_script = None
+        self._pruned_at = 0.0
+    
+    async def initialize(self):
+        """Load the revocation set and start the background sync"""
+        try:
+            self.redis = create_redis_client(settings.redis_session_url)
+            self._bump_script = self.redis.register_script(BUMP_TOKEN_VERSIONS_SCRIPT)
+            self._prune_script = self.redis.register_script(PRUNE_TOKEN_VERSIONS_SCRIPT)
+            await self._sync_revocations()
+            self._sync_task = asyncio.create_task(self._sync_loop())
+            logger.info(f"Token verifier initialized with {len(self.revoked)} revoked tokens")
+        except Exception as e:
+            logger.warning(f"Token revocation sync unavailable: {e}")
+            self.redis = None
+    
+    async def close(self):
+        if self._sync_task:
+            self._sync_task.cancel()
+            self._sync_task = None
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+    
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Return the token's claims, raising AuthenticationError if invalid"""
+        token_hash = self._token_hash(token)
+        claims = self.claims_cache.get(token_hash)
+        
+        if claims is None:
+            try:
+                claims = jwt.decode(
+                    token,
+                    settings.JWT_SECRET_KEY,
+                    algorithms=[settings.JWT_ALGORITHM],
+                    issuer=settings.JWT_ISSUER,
+                    options={'require': ['exp', 'iss']}
+                )
+            except jwt.ExpiredSignatureError:
+                raise AuthenticationError("Token has expired")
+            except jwt.InvalidTokenError as e:
+                raise AuthenticationError(f"Invalid token: {e}")
+            
+            ttl = min(claims['exp'] - time.time(), settings.JWT_VERIFY_CACHE_MAX_TTL)
+            self.claims_cache.set(token_hash, claims, ttl=ttl)
+        
+        if self._token_id(claims, token_hash) in self.revoked:
+            raise AuthenticationError("Token has been revoked")
+        
+        user_id = claims.get('user_id') or claims.get('sub')
+        if claims.get('token_version', 0) < self.token_versions.get(user_id, 0):
+            raise AuthenticationError("Token has been revoked")
+        
+        return claims
+    
+    async def revoke(self, token: str):
+        """Revoke a token for every worker until it would have expired anyway"""
+        token_hash = self._token_hash(token)
+        try:
+            claims = jwt.decode(
+                token,
+                settings.JWT_SECRET_KEY,
+                algorithms=[settings.JWT_ALGORITHM],
+                options={'verify_exp': False}
+            )
+        except jwt.InvalidTokenError:
+            return
+        
+        token_id = self._token_id(claims, token_hash)
+        self.revoked.add(token_id)
+        self.claims_cache.delete(token_hash)
+        
+        if not self.redis:
+            return
+        
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.zadd(REVOKED_TOKENS_KEY, {token_id: claims.get('exp', time.time())})
+                pipe.incr(REVOCATION_VERSION_KEY)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to publish token revocation: {e}")
+    
+    async def token_version(self, user_id: str) -> int:
+        """Current token version for a user, embedded in tokens at login"""
+        if self.redis:
+            try:
+                version = await self.redis.hget(TOKEN_VERSIONS_KEY, user_id)
+                return int(version or 0)
+            except Exception as e:
+                logger.warning(f"Failed to read token version for {user_id}: {e}")
+        return self.token_versions.get(user_id, 0)
+    
+    async def revoke_users(self, user_ids: Iterable[str]):
+        """
+        Invalidate every token issued so far to the given users.
+        
+        Raises if the versions could not be stored in Redis; callers should
+        revoke before deleting anything else so a failure leaves no partial
+        revocation behind.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        
+        now = int(time.time())
+        if not self.redis:
+            for user_id in user_ids:
+                self.token_versions[user_id] = max(now, self.token_versions.get(user_id, 0) + 1)
+            return
+        
+        versions = await self._bump_script(keys=[TOKEN_VERSIONS_KEY, REVOCATION_VERSION_KEY], args=[now, *user_ids])
+        self.token_versions.update(zip(user_ids, (int(version) for version in versions)))
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'cached_claims': len(self.claims_cache),
+            'cache_hits': self.claims_cache.hits,
+            'cache_misses': self.claims_cache.misses,
+            'revoked_tokens': len(self.revoked),
+            'revoked_users': len(self.token_versions),
+            'revocation_version': self.revocation_version,
+        }
+    
+    @staticmethod
+    def _token_hash(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _token_id(claims: Dict[str, Any], token_hash: str) -> str:
+        """Tokens are revoked by `jti` when they carry one, by hash otherwise"""
+        return claims.get('jti') or token_hash
+    
+    async def _sync_revocations(self):
+        """Reload the denylist if another worker changed it"""
+        version = await self.redis.get(REVOCATION_VERSION_KEY)
+        if version == self.revocation_version:
+            return
+        
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(REVOKED_TOKENS_KEY, '-inf', now)
+            pipe.zrangebyscore(REVOKED_TOKENS_KEY, now, '+inf')
+            pipe.hgetall(TOKEN_VERSIONS_KEY)
+            _, token_ids, token_versions = await pipe.execute()
+        
+        self.revoked = set(token_ids)
+        self.token_versions = {user_id: int(version) for user_id, version in token_versions.items()}
+        self.revocation_version = version
+    
+    async def _prune_token_versions(self):
+        """Drop versions older than the longest token lifetime"""
+        now = time.time()
+        if now - self._pruned_at < TOKEN_VERSION_PRUNE_SECONDS:
+            return
+        self._pruned_at = now
+        
+        max_lifetime = max(settings.JWT_EXPIRE_MINUTES * 60, settings.JWT_REFRESH_EXPIRE_DAYS * 86400)
+        cutoff = int(now - max_lifetime)
+        stale = [user_id for user_id, version in self.token_versions.items() if version < cutoff]
+        if stale:
+            removed = await self._prune_script(
+                keys=[TOKEN_VERSIONS_KEY, REVOCATION_VERSION_KEY], args=[cutoff, *stale]
+            )
+            # Reload now rather than at the next sync tick
+            await self._sync_revocations()
+            logger.info(f"Pruned {removed} expired token versions")
+    
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(settings.JWT_REVOCATION_SYNC_SECONDS)
+            try:
+                await self._sync_revocations()
+                await self._prune_token_versions()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Token revocation sync failed: {e}")
+
+
+# Shared verifier; started and stopped by the application lifespan
+token_verifier = TokenVerifier()
+
+
+def verified_user(token: Optional[str]) -> Dict[str, Any]:
+    """The user a token belongs to, or 401 if it is missing, invalid or revoked"""
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    try:
+        claims = token_verifier.verify(token)
+    except AuthenticationError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    
+    return {**claims, 'user_id': claims.get('user_id') or claims.get('sub')}
+
+
+async def get_verified_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> Dict[str, Any]:
+    """
+    Fast-path dependency for token verification endpoints.
+    
+    Resolves the current user from the bearer token's claims alone, with
+    no session store lookup.
+    """
+    return await ensure_active(verified_user(credentials.credentials if credentials else None))
+
+
+async def ensure_active(user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The user, or 403 if the token says the account is disabled.
+    
+    Tokens are not checked against a user store, so a token only reports a
+    disabled account through its `is_active` claim. When one does, the
+    user's token version is bumped too, so none of their other tokens keep
+    working. Deactivating an account elsewhere should revoke its tokens
+    directly through POST /admin/sessions/revoke with its user_id.
+    """
+    if user.get('is_active') is False:
+        try:
+            await token_verifier.revoke_users([user['user_id']])
+        except Exception as e:
+            logger.error(f"Failed to revoke tokens of inactive user {user['user_id']}: {e}")
+        raise HTTPException(status_code=403, detail="Inactive user")
+    return user
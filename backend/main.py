@@ -11,16 +11,13 @@ from contextlib import asynccontextmanager
 from typing import Dict, Any
 
 import uvicorn
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBearer
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
 
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -29,20 +26,26 @@ from app.core.config import settings
 from app.core.database import engine, database
 from app.core.logging_config import setup_logging
 from app.core.security import security_headers_middleware
+from app.core.rate_limit import limiter, enforce_default_limit
 from app.api.v1.api import api_router
 from app.middleware.auth import AuthMiddleware
 from app.middleware.request_id import RequestIDMiddleware
 from app.middleware.error_handler import ErrorHandlerMiddleware
 from app.services.health import HealthService
 from app.services.metrics import MetricsService
+from app.services.auth.ldap_pool import ldap_authenticator
+from app.services.auth.token_verifier import token_verifier
+from app.services.auth.session_store import session_store
+from app.services.auth.state_store import state_store
+from app.services.auth.idp_metadata import jwks_cache, saml_idp_metadata
+from app.services.auth.saml_sp import sp_metadata
+from app.core.http import idcs_http
+from app.services.app_registry import app_registry
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 # Security
 security = HTTPBearer(auto_error=False)
 
@@ -67,6 +70,37 @@ async def lifespan(app: FastAPI):
         await health_service.startup_check()
         logger.info("Startup health checks passed")
         
+        # Warm up LDAP connection pools
+        if settings.FEATURE_DIRECT_LDAP_LOGIN:
+            await ldap_authenticator.initialize()
+            logger.info("LDAP connection pools initialized")
+        
+        # Server-side sessions
+        await session_store.initialize()
+        
+        # OAuth state / SAML request IDs for in-flight logins
+        await state_store.initialize()
+        
+        # Load token revocations for /verify
+        await token_verifier.initialize()
+        
+        # Rate limits are shared by all workers through Redis
+        if settings.RATE_LIMIT_ENABLED:
+            await limiter.initialize()
+        
+        # Shared keep-alive connection pool for every IDCS call
+        await idcs_http.start()
+        
+        # Apps file reloads requested through any worker
+        await app_registry.initialize()
+        
+        # Load IdP signing keys and metadata off the login path
+        if settings.FEATURE_OAUTH_LOGIN:
+            await jwks_cache.initialize()
+        if settings.FEATURE_SAML_LOGIN:
+            await saml_idp_metadata.initialize()
+            sp_metadata.initialize()
+        
         # Initialize metrics
         if settings.METRICS_ENABLED:
             await metrics_service.initialize()
@@ -81,6 +115,17 @@ async def lifespan(app: FastAPI):
     finally:
         # Cleanup
         logger.info("Shutting down application...")
+        if settings.FEATURE_DIRECT_LDAP_LOGIN:
+            await ldap_authenticator.close()
+            logger.info("LDAP connection pools closed")
+        await token_verifier.close()
+        await session_store.close()
+        await state_store.close()
+        await jwks_cache.close()
+        await saml_idp_metadata.close()
+        await idcs_http.close()
+        await app_registry.close()
+        await limiter.close()
         await database.disconnect()
         logger.info("Database disconnected")
         logger.info("Application shutdown completed")
@@ -129,13 +174,11 @@ def create_app() -> FastAPI:
     app.add_middleware(AuthMiddleware)
     app.add_middleware(ErrorHandlerMiddleware)
     
-    # Rate limiting
-    if settings.RATE_LIMIT_ENABLED:
-        app.state.limiter = limiter
-        app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    # Rate limiting (endpoint limits via @limiter.limit, default limit for the rest)
+    api_dependencies = [Depends(enforce_default_limit)] if settings.RATE_LIMIT_ENABLED else []
     
     # Include API routes
-    app.include_router(api_router, prefix="/api/v1")
+    app.include_router(api_router, prefix="/api/v1", dependencies=api_dependencies)
     
     # Health check endpoint
     @app.get("/health")
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Test configuration: import paths for the backend package and the sync
+helpers, and shared fixtures
+"""
+
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# `app` the way uvicorn sees it, and the modules next to the sync script
+sys.path.insert(0, os.path.join(TESTS_DIR, '..'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', '..', 'scripts'))
+
+
+@pytest.fixture
+def fake_redis():
+    """In-memory Redis with Lua scripting, for code that runs scripts"""
+    pytest.importorskip('lupa')
+    fakeredis = pytest.importorskip('fakeredis')
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for the external application registry
+"""
+
+import json
+
+from app.core.config import settings
+from app.services.app_registry import AppRegistry, build_app_index
+
+
+APPS = [
+    {'id': 'wiki', 'name': 'Wiki'},
+    {'id': 'hr', 'name': 'HR', 'access_groups': ['hr', 'admins']},
+    {'id': 'ops', 'name': 'Ops', 'access_groups': ['admins']},
+]
+
+
+def test_index_inverts_access_groups():
+    index = build_app_index(APPS)
+    
+    assert index.open_app_ids == {'wiki'}
+    assert index.group_app_ids == {'hr': {'hr'}, 'admins': {'hr', 'ops'}}
+
+
+def test_malformed_and_duplicate_entries_are_skipped():
+    index = build_app_index([{'id': 'wiki', 'name': 'Wiki'}, 'not-an-app', {'id': 'x'}, {'id': 'wiki', 'name': 'Other'}])
+    
+    assert list(index.apps) == ['wiki']
+    assert index.apps['wiki']['name'] == 'Wiki'
+
+
+def test_access_checks_and_app_listing(monkeypatch, tmp_path):
+    apps_file = tmp_path / 'apps.json'
+    apps_file.write_text(json.dumps(APPS))
+    monkeypatch.setattr(settings, 'EXTERNAL_APPS_FILE', str(apps_file))
+    registry = AppRegistry()
+    registry.reload()
+    
+    assert registry.can_access('hr', ['admins'])
+    assert registry.can_access('wiki', [])
+    assert not registry.can_access('ops', ['hr'])
+    assert [app['id'] for app in registry.accessible_apps(['admins', 'admins'])] == ['wiki', 'hr', 'ops']
+    assert [app['id'] for app in registry.accessible_apps(['hr'])] == ['wiki', 'hr']
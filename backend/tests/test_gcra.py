@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the GCRA rate-limit arithmetic and its Redis script
+"""
+
+import pytest
+
+from app.core.gcra import GCRA_SCRIPT, RateLimit, parse_rate, reserve
+
+
+def test_parse_rate():
+    assert parse_rate("5/minute") == RateLimit(interval_ms=12000, capacity=5)
+    assert parse_rate("10/seconds", burst=3) == RateLimit(interval_ms=100, capacity=3)
+    
+    with pytest.raises(KeyError):
+        parse_rate("5/fortnight")
+
+
+def test_local_reserve_admits_the_burst_then_waits_one_interval():
+    limit = parse_rate("5/minute")
+    tat, now, admitted = None, 0.0, 0
+    for _ in range(7):
+        granted, retry_after_ms, new_tat = reserve(tat, now, limit, 1)
+        if granted:
+            admitted += 1
+            tat = new_tat
+    
+    assert admitted == 5
+    assert (granted, retry_after_ms, new_tat) == (0, 12000, None)
+    assert reserve(tat, now + 12000, limit, 1)[0] == 1
+
+
+def test_local_reserve_grants_part_of_a_batch():
+    limit = RateLimit(interval_ms=1000, capacity=4)
+    
+    granted, _, tat = reserve(None, 0.0, limit, 3)
+    assert (granted, tat) == (3, 3000)
+    
+    granted, _, tat = reserve(tat, 0.0, limit, 3)
+    assert (granted, tat) == (1, 4000)
+
+
+@pytest.mark.asyncio
+async def test_redis_script_matches_local_reserve(fake_redis):
+    script = fake_redis.register_script(GCRA_SCRIPT)
+    limit = RateLimit(interval_ms=60000, capacity=4)
+    
+    results = [
+        await script(keys=['ratelimit:test'], args=[limit.interval_ms, limit.capacity, requested])
+        for requested in (3, 3, 1)
+    ]
+    
+    assert [int(granted) for granted, _ in results] == [3, 1, 0]
+    # The next token frees up one interval after the bucket filled
+    assert 59000 < int(results[2][1]) <= 60000
+    assert 0 < await fake_redis.pttl('ratelimit:test') <= 240000
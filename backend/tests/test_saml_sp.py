@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the SAML SP metadata and redirect signing
+"""
+
+import base64
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+from onelogin.saml2.utils import OneLogin_Saml2_Utils
+
+from app.core.config import settings
+from app.services.auth import saml_sp
+from app.services.auth.saml_sp import (
+    METADATA_WINDOW_SECONDS, MetadataDocument, SAMLSigningCredentials, SPMetadataCache, _metadata_validity
+)
+
+NOT_BEFORE = datetime(2026, 1, 1)
+NOT_AFTER = datetime(2027, 1, 1)
+
+
+@pytest.fixture(scope='module')
+def key_pair():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'sp.example.com')])
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(NOT_BEFORE)
+        .not_valid_after(NOT_AFTER)
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return key_pem, certificate.public_bytes(serialization.Encoding.PEM).decode()
+
+
+@pytest.fixture
+def credentials(monkeypatch, key_pair):
+    monkeypatch.setattr(settings, 'SAML_PRIVATE_KEY', key_pair[0])
+    monkeypatch.setattr(settings, 'SAML_X509_CERT', key_pair[1])
+    return SAMLSigningCredentials()
+
+
+def test_signed_metadata_is_identical_across_builds(credentials, key_pair):
+    first = SPMetadataCache(credentials).get()
+    second = SPMetadataCache(SAMLSigningCredentials()).get()
+    
+    assert first.body == second.body
+    assert first.etag == second.etag
+    assert first.last_modified == second.last_modified == 'Thu, 01 Jan 2026 00:00:00 GMT'
+    assert OneLogin_Saml2_Utils.validate_metadata_sign(first.body, key_pair[1])
+
+
+def test_metadata_validity_follows_the_certificate(credentials):
+    assert _metadata_validity(credentials) == (NOT_AFTER, NOT_BEFORE)
+
+
+def test_unsigned_metadata_validity_uses_aligned_windows(monkeypatch):
+    monkeypatch.setattr(settings, 'SAML_PRIVATE_KEY', '')
+    monkeypatch.setattr(settings, 'SAML_X509_CERT', '')
+    window_start = 20000 * METADATA_WINDOW_SECONDS
+    monkeypatch.setattr(saml_sp.time, 'time', lambda: window_start + 1234)
+    
+    valid_until, last_modified = _metadata_validity(SAMLSigningCredentials())
+    
+    assert last_modified == datetime.utcfromtimestamp(window_start)
+    assert valid_until - last_modified == timedelta(seconds=2 * METADATA_WINDOW_SECONDS)
+
+
+def test_conditional_requests():
+    document = MetadataDocument(body=b'<md/>', etag='"abc"', last_modified='Thu, 01 Jan 2026 00:00:00 GMT')
+    
+    assert document.not_modified({'if-none-match': '"xyz", "abc"'})
+    assert document.not_modified({'if-none-match': '*'})
+    assert not document.not_modified({'if-none-match': '"xyz"', 'if-modified-since': 'Fri, 02 Jan 2026 00:00:00 GMT'})
+    assert document.not_modified({'if-modified-since': 'Fri, 02 Jan 2026 00:00:00 GMT'})
+    assert not document.not_modified({'if-modified-since': 'not a date'})
+
+
+def test_redirect_query_signature_verifies(credentials, monkeypatch):
+    monkeypatch.setattr(settings, 'SAML_SIGN_REQUESTS', True)
+    
+    query = credentials.redirect_query({'SAMLRequest': 'abc+/=', 'RelayState': 'https://app.example.com/'})
+    signed_part, _, signature = query.rpartition('&Signature=')
+    
+    assert [name for name, _ in parse_qsl(query)] == ['SAMLRequest', 'RelayState', 'SigAlg', 'Signature']
+    credentials.certificate.public_key().verify(
+        base64.b64decode(dict(parse_qsl(query))['Signature']),
+        signed_part.encode(),
+        padding.PKCS1v15(),
+        hashes.SHA256()
+    )
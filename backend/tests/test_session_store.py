@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for the Redis session store, against fakeredis
+"""
+
+import pytest
+from starlette.requests import Request
+
+from app.services.auth import session_store as store_module
+from app.core.config import settings
+from app.services.auth.session_store import (
+    EXTEND_SESSION_SCRIPT, SESSION_KEY_PREFIX, UPDATE_SESSION_SCRIPT, RedisSessionStore, SessionFilter,
+    _make_cursor, _parse_cursor
+)
+
+
+def make_request(token: str = '') -> Request:
+    headers = [(b'authorization', f"Bearer {token}".encode())] if token else []
+    return Request({'type': 'http', 'headers': headers, 'client': ('203.0.113.7', 443)})
+
+
+@pytest.fixture
+def store(fake_redis):
+    store = RedisSessionStore()
+    store.redis = fake_redis
+    store._update_script = fake_redis.register_script(UPDATE_SESSION_SCRIPT)
+    store._extend_script = fake_redis.register_script(EXTEND_SESSION_SCRIPT)
+    return store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(store_module.time, 'time', lambda: now[0])
+    return now
+
+
+async def create_sessions(store, clock, count, source='local', user_id=None):
+    session_ids = []
+    for index in range(count):
+        clock[0] += 1
+        user = user_id or f"user{index}"
+        session_ids.append(await store.create_session(
+            make_request(), user, {'jwt_token': f"{source}:{user}:{index}"}, source=source, groups=['users']
+        ))
+    return session_ids
+
+
+def test_cursor_round_trip():
+    cursor = _make_cursor(1700000000.125, 'abc')
+    
+    assert _parse_cursor(cursor) == (1700000000.125, 'abc')
+    with pytest.raises(ValueError, match="Invalid session cursor"):
+        _parse_cursor('not-a-cursor')
+
+
+@pytest.mark.asyncio
+async def test_pages_cover_every_session_once(store, clock):
+    session_ids = await create_sessions(store, clock, 5)
+    
+    seen, cursor, pages = [], None, 0
+    while True:
+        sessions, cursor = await store.list_sessions(cursor=cursor, limit=2)
+        seen.extend(session['session_id'] for session in sessions)
+        pages += 1
+        if cursor is None:
+            break
+    
+    assert seen == session_ids
+    assert pages == 3
+
+
+@pytest.mark.asyncio
+async def test_cursor_survives_its_session_being_revoked(store, clock):
+    session_ids = await create_sessions(store, clock, 4)
+    
+    _, cursor = await store.list_sessions(limit=2)
+    await store.revoke_session(session_ids[1])
+    sessions, _ = await store.list_sessions(cursor=cursor, limit=2)
+    
+    assert [session['session_id'] for session in sessions] == session_ids[2:]
+
+
+@pytest.mark.asyncio
+async def test_writes_do_not_recreate_a_revoked_session(store, clock):
+    await create_sessions(store, clock, 1)
+    request = make_request('local:user0:0')
+    session = await store.get_session(request)
+    
+    await store.revoke_session(session['session_id'])
+    
+    assert not await store._extend(session)
+    assert not await store.update_session(request, {'email': 'late@example.com'})
+    assert not await store.redis.exists(f"{SESSION_KEY_PREFIX}{session['session_id']}")
+
+
+@pytest.mark.asyncio
+async def test_listed_sessions_leave_out_tokens(store, clock):
+    await create_sessions(store, clock, 1)
+    
+    sessions, _ = await store.list_sessions()
+    
+    assert 'tokens' not in sessions[0]
+    assert sessions[0]['groups'] == ['users']
+
+
+@pytest.mark.asyncio
+async def test_filtered_pages_stop_at_the_scan_cap(store, clock, monkeypatch):
+    await create_sessions(store, clock, 6, source='ldap')
+    saml_ids = await create_sessions(store, clock, 2, source='saml')
+    monkeypatch.setattr(settings, 'SESSION_LIST_MAX_SCAN', 4)
+    session_filter = SessionFilter(source='saml')
+    
+    sessions, cursor = await store.list_sessions(limit=2, session_filter=session_filter)
+    assert sessions == [] and cursor is not None
+    
+    seen = []
+    while cursor is not None:
+        sessions, cursor = await store.list_sessions(cursor=cursor, limit=2, session_filter=session_filter)
+        seen.extend(session['session_id'] for session in sessions)
+    assert seen == saml_ids
+    assert await store.count_sessions(session_filter) == 2
+    assert await store.count_sessions() == 8
+
+
+@pytest.mark.asyncio
+async def test_user_filter_pages_through_the_users_sessions(store, clock):
+    session_ids = await create_sessions(store, clock, 3, user_id='alice')
+    await create_sessions(store, clock, 2)
+    session_filter = SessionFilter(user_id='alice')
+    
+    first, cursor = await store.list_sessions(limit=2, session_filter=session_filter)
+    rest, last_cursor = await store.list_sessions(cursor=cursor, limit=2, session_filter=session_filter)
+    
+    assert [session['session_id'] for session in first + rest] == session_ids
+    assert last_cursor is None
+    assert [session['session_id'] async for session in store.iter_sessions(session_filter, 2)] == session_ids
+
+
+@pytest.mark.asyncio
+async def test_bulk_revoke_deletes_matches_across_batches(store, clock, monkeypatch):
+    await create_sessions(store, clock, 5, source='ldap')
+    kept = await create_sessions(store, clock, 2, source='saml')
+    monkeypatch.setattr(settings, 'SESSION_LIST_MAX_SCAN', 2)
+    
+    revoked, user_ids = await store.revoke_sessions(SessionFilter(source='ldap'))
+    
+    assert revoked == 5
+    assert user_ids == {f"user{index}" for index in range(5)}
+    assert [session['session_id'] async for session in store.iter_sessions()] == kept
+    assert await store.user_session_ids('user4') == []
+    with pytest.raises(ValueError):
+        await store.revoke_sessions(SessionFilter())
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-use login-flow state store
+"""
+
+import pytest
+
+from app.services.auth.state_store import AuthStateStore
+
+
+@pytest.fixture(params=['redis', 'memory'])
+def state_store(request, fake_redis):
+    store = AuthStateStore()
+    if request.param == 'redis':
+        store.redis = fake_redis
+    return store
+
+
+@pytest.mark.asyncio
+async def test_oauth_state_is_single_use(state_store):
+    state = await state_store.issue_oauth_state('https://app.example.com/')
+    
+    assert await state_store.consume_oauth_state(state) == {'redirect_uri': 'https://app.example.com/'}
+    assert await state_store.consume_oauth_state(state) is None
+    assert await state_store.consume_oauth_state('unknown') is None
+
+
+@pytest.mark.asyncio
+async def test_saml_request_ids_are_not_overwritten(state_store):
+    assert await state_store.store_saml_request('ONELOGIN_1', 'https://first.example.com/')
+    assert not await state_store.store_saml_request('ONELOGIN_1', 'https://second.example.com/')
+    
+    assert await state_store.consume_saml_request('ONELOGIN_1') == {'redirect_uri': 'https://first.example.com/'}
+    assert await state_store.consume_saml_request('ONELOGIN_1') is None
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental sync watermark and fingerprint rules
+"""
+
+from sync_delta import compute_fingerprint, latest_timestamp, next_watermark, oldest_failure, single_value
+
+
+def test_latest_timestamp_keeps_the_newest():
+    watermark = None
+    for last_modified in ('2024-06-01T12:00:00.000Z', '2024-06-03T08:30:00.000Z', None, '2024-06-02T00:00:00Z'):
+        watermark = latest_timestamp(watermark, last_modified)
+    
+    assert watermark == '2024-06-03T08:30:00.000Z'
+
+
+def test_latest_timestamp_compares_instants_not_strings():
+    assert latest_timestamp('2024-06-01T12:00:00.000Z', '2024-06-01T13:00:00.000+02:00') == '2024-06-01T12:00:00.000Z'
+
+
+def test_oldest_failure_keeps_the_oldest():
+    failed = None
+    for last_modified in ('2024-06-03T00:00:00.000Z', '2024-06-02T00:00:00.000Z', '2024-06-04T00:00:00.000Z'):
+        failed = oldest_failure(failed, last_modified)
+    
+    assert failed == '2024-06-02T00:00:00.000Z'
+
+
+def test_failure_without_timestamp_sticks():
+    assert oldest_failure(oldest_failure(None, None), '2024-06-02T00:00:00.000Z') is True
+    assert oldest_failure('2024-06-02T00:00:00.000Z', None) is True
+
+
+def test_next_watermark_advances_to_observed():
+    assert next_watermark('2024-06-01T00:00:00.000Z', '2024-06-02T00:00:00.000Z') == '2024-06-02T00:00:00.000Z'
+
+
+def test_next_watermark_is_set_by_a_first_run():
+    assert next_watermark(None, '2024-06-02T00:00:00.000Z') == '2024-06-02T00:00:00.000Z'
+
+
+def test_next_watermark_never_moves_backwards():
+    assert next_watermark('2024-06-05T00:00:00.000Z', '2024-06-02T00:00:00.000Z') == '2024-06-05T00:00:00.000Z'
+    assert next_watermark('2024-06-05T00:00:00.000Z', None) == '2024-06-05T00:00:00.000Z'
+
+
+def test_next_watermark_stops_short_of_the_oldest_failure():
+    watermark = next_watermark(
+        '2024-06-01T00:00:00.000Z', '2024-06-04T00:00:00.000Z', failed='2024-06-02T00:00:00.000Z'
+    )
+    assert watermark == '2024-06-01T23:59:59.999Z'
+
+
+def test_next_watermark_ignores_failures_after_observed():
+    watermark = next_watermark(
+        '2024-06-01T00:00:00.000Z', '2024-06-02T00:00:00.000Z', failed='2024-06-03T00:00:00.000Z'
+    )
+    assert watermark == '2024-06-02T00:00:00.000Z'
+
+
+def test_next_watermark_holds_after_a_failure_without_timestamp():
+    assert next_watermark('2024-06-01T00:00:00.000Z', '2024-06-04T00:00:00.000Z', failed=True) == '2024-06-01T00:00:00.000Z'
+    assert next_watermark(None, '2024-06-04T00:00:00.000Z', failed=True) is None
+
+
+def test_fingerprint_ignores_attribute_name_case_and_order():
+    first = compute_fingerprint({'cn': 'Jane Doe', 'mail': 'jane@example.com'})
+    second = compute_fingerprint({'Mail': ['jane@example.com'], 'CN': 'Jane Doe'})
+    assert first == second
+
+
+def test_fingerprint_changes_with_values():
+    first = compute_fingerprint({'cn': 'Jane Doe', 'mail': 'jane@example.com'})
+    second = compute_fingerprint({'cn': 'Jane Doe', 'mail': 'jdoe@example.com'})
+    assert first != second
+
+
+def test_fingerprint_treats_missing_and_empty_values_alike():
+    assert compute_fingerprint({'cn': 'Jane', 'title': None}) == compute_fingerprint({'cn': 'Jane', 'title': []})
+
+
+def test_fingerprint_keeps_value_order():
+    assert compute_fingerprint({'member': ['a', 'b']}) != compute_fingerprint({'member': ['b', 'a']})
+
+
+def test_single_value_folds_ldap_and_scim_forms():
+    assert single_value(None) is None
+    assert single_value([]) is None
+    assert single_value('') is None
+    assert single_value(['']) is None
+    assert single_value(['Finance team']) == 'Finance team'
+    assert single_value('Finance team') == 'Finance team'
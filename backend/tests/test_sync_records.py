@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory sync record layout
+"""
+
+import pytest
+
+from sync_records import (
+    SyncGroup, SyncUser, compile_attribute_path, compile_mapping, extract_mapped_attributes,
+    pack_raw_record, resolve_attribute_path
+)
+
+
+def test_records_are_slotted():
+    user = SyncUser(user_id='1', username='alice', email='alice@example.com')
+    
+    with pytest.raises(AttributeError):
+        user.extra = 'value'
+    assert user.attributes == {}
+    assert user.groups == ()
+
+
+def test_raw_record_is_dropped_unless_retained():
+    record = {'id': '1', 'displayName': 'admins', 'members': [{'value': '2'}]}
+    
+    assert pack_raw_record(record, retain=False) is None
+    assert SyncGroup(group_id='1', group_name='admins').raw_attributes == {}
+
+
+def test_raw_record_round_trips():
+    record = {'id': '1', 'userName': 'alice', 'name': {'givenName': 'Alice'}}
+    user = SyncUser(user_id='1', username='alice', email='', raw=pack_raw_record(record, retain=True))
+    
+    assert user.raw_attributes == record
+
+
+def test_mapping_resolves_compiled_paths():
+    accessors = compile_mapping({'uid': 'userName', 'mail': 'emails[0].value', 'sn': 'name.familyName'}, 'SYNC_USER_MAPPING')
+    record = {'userName': 'alice', 'emails': [{'value': 'alice@example.com'}], 'name': {}}
+    
+    assert extract_mapped_attributes(record, accessors) == {'uid': 'alice', 'mail': 'alice@example.com'}
+
+
+def test_missing_list_entries_resolve_to_none():
+    steps = compile_attribute_path('emails[1].value')
+    
+    assert resolve_attribute_path({'emails': [{'value': 'a'}]}, steps) is None
+    assert resolve_attribute_path({'emails': 'not-a-list'}, steps) is None
+
+
+def test_malformed_mapping_names_the_setting():
+    with pytest.raises(ValueError, match="SYNC_GROUP_MAPPING entry 'cn:members\\[x\\]'"):
+        compile_mapping({'cn': 'members[x]'}, 'SYNC_GROUP_MAPPING')
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process TTL/LRU cache
+"""
+
+import pytest
+
+from app.core import ttl_cache
+from app.core.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(max_size=10, ttl=30)
+    cache.set('key', 'value')
+    
+    clock[0] += 29
+    assert cache.get('key') == 'value'
+    
+    clock[0] += 1
+    assert cache.get('key') is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    cache = TTLCache(max_size=10, ttl=30)
+    cache.set('short', 1, ttl=5)
+    cache.set('skipped', 2, ttl=0)
+    
+    clock[0] += 5
+    assert cache.get('short') is None
+    assert cache.get('skipped') is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(max_size=2, ttl=30)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_delete_and_clear(clock):
+    cache = TTLCache(max_size=10, ttl=30)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    
+    cache.delete('a')
+    cache.delete('missing')
+    assert cache.get('a') is None
+    
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Load test: /verify latency while /ldap/login is saturated
+
+Measures /verify latency twice against a running deployment: once on its
+own, and once while a pool of clients keeps /ldap/login busy. LDAP calls
+run on their own bounded executor, so the second figure should stay close
+to the first even when the directory is slow.
+
+/ldap/login is rate limited per client; raise that limit on the target
+deployment first, or most login requests will come back as 429. Run from
+the project root:
+
+    python3 scripts/bench/ldap_login_load.py \\
+        --base-url http://localhost:8000/api/v1/auth \\
+        --token "$ACCESS_TOKEN" --username loadtest --password secret
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+from typing import Dict, List
+
+import aiohttp
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty sample list"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def verify_worker(
+    session: aiohttp.ClientSession,
+    url: str,
+    token: str,
+    deadline: float,
+    latencies: List[float],
+    statuses: Counter
+):
+    """Call /verify back to back until the deadline, recording latencies"""
+    headers = {'Authorization': f'Bearer {token}'}
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            async with session.get(url, headers=headers) as response:
+                await response.read()
+                statuses[response.status] += 1
+        except aiohttp.ClientError as e:
+            statuses[type(e).__name__] += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def login_worker(
+    session: aiohttp.ClientSession,
+    url: str,
+    credentials: Dict[str, str],
+    stop: asyncio.Event,
+    statuses: Counter
+):
+    """Keep one /ldap/login request in flight until stopped"""
+    while not stop.is_set():
+        try:
+            async with session.post(url, json=credentials) as response:
+                await response.read()
+                statuses[response.status] += 1
+        except aiohttp.ClientError as e:
+            statuses[type(e).__name__] += 1
+
+
+async def measure_verify(
+    session: aiohttp.ClientSession,
+    args: argparse.Namespace
+) -> Dict[str, object]:
+    """Run the /verify workers for one phase and summarize latencies"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    deadline = time.monotonic() + args.duration
+    await asyncio.gather(*(
+        verify_worker(session, f"{args.base_url}/verify", args.token, deadline, latencies, statuses)
+        for _ in range(args.verify_concurrency)
+    ))
+    return {'latencies': latencies, 'statuses': statuses}
+
+
+def report(name: str, phase: Dict[str, object], duration: float):
+    """Print latency percentiles for a phase, in milliseconds"""
+    latencies = phase['latencies']
+    if not latencies:
+        print(f"{name:>10}: no requests completed")
+        return
+    ms = [latency * 1000 for latency in latencies]
+    print(
+        f"{name:>10}: {len(ms) / duration:8.1f} req/s  "
+        f"p50 {percentile(ms, 0.50):7.1f} ms  p95 {percentile(ms, 0.95):7.1f} ms  "
+        f"p99 {percentile(ms, 0.99):7.1f} ms  max {max(ms):7.1f} ms  "
+        f"mean {statistics.mean(ms):7.1f} ms  statuses {dict(phase['statuses'])}"
+    )
+
+
+async def run(args: argparse.Namespace):
+    """Measure /verify on its own, then while /ldap/login is saturated"""
+    connector = aiohttp.TCPConnector(limit=args.login_concurrency + args.verify_concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        baseline = await measure_verify(session, args)
+        
+        stop = asyncio.Event()
+        login_statuses: Counter = Counter()
+        credentials = {'username': args.username, 'password': args.password}
+        logins = [
+            asyncio.create_task(
+                login_worker(session, f"{args.base_url}/ldap/login", credentials, stop, login_statuses)
+            )
+            for _ in range(args.login_concurrency)
+        ]
+        
+        # Let the login backlog build up before measuring
+        await asyncio.sleep(args.warmup)
+        loaded = await measure_verify(session, args)
+        
+        stop.set()
+        await asyncio.gather(*logins)
+    
+    print(f"{args.verify_concurrency} /verify clients, {args.login_concurrency} /ldap/login clients, "
+          f"{args.duration:.0f}s per phase")
+    report('baseline', baseline, args.duration)
+    report('saturated', loaded, args.duration)
+    print(f"{'logins':>10}: statuses {dict(login_statuses)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/verify latency under /ldap/login load")
+    parser.add_argument('--base-url', default='http://localhost:8000/api/v1/auth', help="Auth router URL")
+    parser.add_argument('--token', required=True, help="Access token sent to /verify")
+    parser.add_argument('--username', required=True, help="LDAP username for /ldap/login")
+    parser.add_argument('--password', required=True, help="LDAP password for /ldap/login")
+    parser.add_argument('--login-concurrency', type=int, default=64, help="Concurrent /ldap/login clients")
+    parser.add_argument('--verify-concurrency', type=int, default=4, help="Concurrent /verify clients")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds per measured phase")
+    parser.add_argument('--warmup', type=float, default=5.0, help="Seconds of login load before measuring")
+    parser.add_argument('--request-timeout', type=float, default=60.0, help="Per-request timeout in seconds")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
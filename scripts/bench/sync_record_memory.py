@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the records the IDCS → LDAP sync keeps in memory
+
+Builds N synthetic IDCS SCIM user resources and measures, with
+tracemalloc, how much memory stays allocated once they are turned into
+sync records:
+
+  legacy   plain dataclass holding the whole SCIM resource (pre-slots layout)
+  mapped   SyncUser from sync_records.py, mapped attributes only
+  raw      SyncUser with SYNC_RETAIN_RAW_RECORDS enabled
+
+Mapped attributes are resolved from the default SYNC_USER_MAPPING. Run
+from the project root:
+
+    python3 scripts/bench/sync_record_memory.py --records 100000
+"""
+
+import gc
+import sys
+import json
+import argparse
+import tracemalloc
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sync_records import SyncUser, pack_raw_record, compile_mapping, extract_mapped_attributes
+
+# Default SYNC_USER_MAPPING (LDAP attribute → SCIM path)
+USER_MAPPING = {
+    'uid': 'userName',
+    'mail': 'emails[0].value',
+    'givenName': 'name.givenName',
+    'sn': 'name.familyName',
+}
+
+
+@dataclass
+class LegacySyncUser:
+    """SyncUser as it was before slots and attribute mapping"""
+    user_id: str
+    username: str
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    display_name: Optional[str] = None
+    groups: List[str] = None
+    source: str = 'unknown'
+    attributes: Dict[str, Any] = None
+    fingerprint: Optional[str] = None
+    
+    def __post_init__(self):
+        if self.groups is None:
+            self.groups = []
+        if self.attributes is None:
+            self.attributes = {}
+
+
+def scim_user(index: int) -> Dict[str, Any]:
+    """A SCIM user resource shaped like an IDCS /admin/v1/Users response entry"""
+    username = f"user{index:06d}"
+    resource = {
+        'schemas': [
+            'urn:ietf:params:scim:schemas:core:2.0:User',
+            'urn:ietf:params:scim:schemas:oracle:idcs:extension:user:User',
+            'urn:ietf:params:scim:schemas:extension:enterprise:2.0:User',
+        ],
+        'id': f"{index:032x}",
+        'externalId': f"ext-{index}",
+        'userName': username,
+        'displayName': f"User {index}",
+        'active': True,
+        'name': {
+            'givenName': 'User',
+            'familyName': f"Number{index}",
+            'formatted': f"User Number{index}",
+        },
+        'emails': [
+            {'value': f"{username}@example.com", 'type': 'work', 'primary': True, 'verified': True},
+            {'value': f"{username}@example.com", 'type': 'recovery', 'primary': False, 'verified': False},
+        ],
+        'phoneNumbers': [{'value': f"+1 555 {index:07d}", 'type': 'work', 'primary': True}],
+        'groups': [
+            {'value': f"{group:032x}", 'display': f"group-{group}", 'type': 'direct',
+             '$ref': f"https://idcs.example.com/admin/v1/Groups/{group:032x}"}
+            for group in range(index % 5 + 1)
+        ],
+        'meta': {
+            'resourceType': 'User',
+            'created': '2024-01-01T00:00:00.000Z',
+            'lastModified': '2024-06-01T12:00:00.000Z',
+            'version': f"{index:x}",
+            'location': f"https://idcs.example.com/admin/v1/Users/{index:032x}",
+        },
+        'urn:ietf:params:scim:schemas:extension:enterprise:2.0:User': {
+            'employeeNumber': str(index),
+            'department': f"Department {index % 40}",
+            'organization': 'Example Corp',
+            'manager': {'value': f"{index // 10:032x}", 'displayName': f"User {index // 10}"},
+        },
+        'urn:ietf:params:scim:schemas:oracle:idcs:extension:user:User': {
+            'isFederatedUser': False,
+            'status': 'active',
+            'creationMechanism': 'sync',
+            'doNotShowGettingStarted': True,
+            'preferredUiLandingPage': 'MyApps',
+        },
+    }
+    # Round-trip through JSON so the record is laid out like a parsed response
+    return json.loads(json.dumps(resource))
+
+
+def build_legacy(user_data: Dict[str, Any]) -> LegacySyncUser:
+    return LegacySyncUser(
+        user_id=user_data.get('id'),
+        username=user_data.get('userName'),
+        email=user_data.get('emails', [{}])[0].get('value'),
+        first_name=user_data.get('name', {}).get('givenName'),
+        last_name=user_data.get('name', {}).get('familyName'),
+        display_name=user_data.get('displayName'),
+        groups=[group.get('display') for group in user_data.get('groups', [])],
+        source='idcs',
+        attributes=user_data
+    )
+
+
+def current_builder(retain: bool) -> Callable[[Dict[str, Any]], SyncUser]:
+    """SyncUser construction as done by IDCSLDAPSynchronizer._iter_idcs_users"""
+    accessors = compile_mapping(USER_MAPPING, 'SYNC_USER_MAPPING')
+    
+    def build(user_data: Dict[str, Any]) -> SyncUser:
+        return SyncUser(
+            user_id=user_data.get('id'),
+            username=user_data.get('userName'),
+            email=user_data.get('emails', [{}])[0].get('value'),
+            first_name=user_data.get('name', {}).get('givenName'),
+            last_name=user_data.get('name', {}).get('familyName'),
+            display_name=user_data.get('displayName'),
+            groups=tuple(group.get('display') for group in user_data.get('groups', [])),
+            source='idcs',
+            attributes=extract_mapped_attributes(user_data, accessors),
+            last_modified=user_data.get('meta', {}).get('lastModified'),
+            raw=pack_raw_record(user_data, retain)
+        )
+    
+    return build
+
+
+def measure(records: int, build: Callable[[Dict[str, Any]], Any]) -> int:
+    """Bytes still allocated after building `records` sync records"""
+    gc.collect()
+    tracemalloc.start()
+    kept = [build(scim_user(index)) for index in range(records)]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync record memory benchmark")
+    parser.add_argument('--records', type=int, default=100_000, help="Number of user records to build")
+    args = parser.parse_args()
+    
+    print(f"Python {sys.version.split()[0]}, {args.records} records")
+    
+    results = [
+        ('legacy', measure(args.records, build_legacy)),
+        ('mapped', measure(args.records, current_builder(retain=False))),
+        ('raw', measure(args.records, current_builder(retain=True))),
+    ]
+    
+    for name, size in results:
+        print(f"{name:>8}: {size / 1024 / 1024:8.1f} MB  ({size / args.records / 1024:.2f} KB/record)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for /verify token verification
+
+Measures how many verifications per second one worker process can serve
+through TokenVerifier.verify:
+
+  decode   every token seen for the first time (a full jwt.decode per call,
+           as /verify did before the claims cache)
+  cached   a working set of tokens that are already in the claims cache
+
+Run from the project root with the backend requirements installed:
+
+    python3 scripts/bench/token_verify_throughput.py --seconds 5
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Callable, List
+
+import jwt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+
+from app.core.config import settings
+from app.services.auth.token_verifier import TokenVerifier
+
+
+def make_tokens(count: int) -> List[str]:
+    """Access tokens shaped like the ones jwt_service issues"""
+    now = int(time.time())
+    return [
+        jwt.encode(
+            {
+                'sub': f"user{index}",
+                'user_id': f"user{index}",
+                'email': f"user{index}@example.com",
+                'groups': ['users', 'staff'],
+                'source': 'idcs',
+                'iss': settings.JWT_ISSUER,
+                'iat': now,
+                'exp': now + 3600,
+                'jti': f"{index:032x}",
+            },
+            settings.JWT_SECRET_KEY,
+            algorithm=settings.JWT_ALGORITHM
+        )
+        for index in range(count)
+    ]
+
+
+def rate(seconds: float, call: Callable[[int], None]) -> float:
+    """Calls per second of `call(i)` over roughly `seconds`"""
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            call(calls)
+            calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/verify token verification throughput")
+    parser.add_argument('--seconds', type=float, default=5.0, help="Seconds per measurement")
+    parser.add_argument('--working-set', type=int, default=1000, help="Distinct tokens in the cached run")
+    args = parser.parse_args()
+    
+    # Enough distinct tokens that the decode run never hits the cache
+    fresh = make_tokens(int(args.seconds * 50_000))
+    verifier = TokenVerifier()
+    
+    def decode(index: int):
+        verifier.verify(fresh[index % len(fresh)])
+        if index % len(fresh) == len(fresh) - 1:
+            verifier.claims_cache.clear()
+    
+    working_set = make_tokens(args.working_set)
+    for token in working_set:
+        verifier.verify(token)
+    
+    def cached(index: int):
+        verifier.verify(working_set[index % len(working_set)])
+    
+    print(f"Python {sys.version.split()[0]}, PyJWT {jwt.__version__}, {settings.JWT_ALGORITHM}")
+    for name, call in (('decode', decode), ('cached', cached)):
+        print(f"{name:>8}: {rate(args.seconds, call):10,.0f} verifications/s per worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -685,6 +685,7 @@ CREATE TABLE IF NOT EXISTS users (
     last_name VARCHAR(100),
     display_name VARCHAR(255),
     source VARCHAR(50) NOT NULL CHECK (source IN ('idcs', 'saml', 'ldap')),
+    sync_fingerprint VARCHAR(64),
     is_active BOOLEAN DEFAULT true,
     last_login TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
@@ -698,6 +699,7 @@ CREATE TABLE IF NOT EXISTS groups (
     display_name VARCHAR(255),
     description TEXT,
     source VARCHAR(50) NOT NULL CHECK (source IN ('idcs', 'ldap', 'local')),
+    sync_fingerprint VARCHAR(64),
     is_active BOOLEAN DEFAULT true,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
@@ -773,6 +775,19 @@ CREATE TABLE IF NOT EXISTS sync_status (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- IDCS sync checkpoint journal (one row per in-progress sync)
+CREATE TABLE IF NOT EXISTS sync_checkpoints (
+    sync_type VARCHAR(50) PRIMARY KEY,
+    phase VARCHAR(50) NOT NULL CHECK (phase IN ('users', 'user_deletions', 'groups', 'group_deletions')),
+    next_start_index INTEGER NOT NULL DEFAULT 1,
+    state JSONB,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Columns added after the initial schema (no-ops on fresh databases)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS sync_fingerprint VARCHAR(64);
+ALTER TABLE groups ADD COLUMN IF NOT EXISTS sync_fingerprint VARCHAR(64);
+
 -- Create indexes
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_user_id ON users(user_id);
@@ -879,7 +894,9 @@ INSERT INTO sync_status (sync_type, status, details) VALUES
     ('idcs_users', 'pending', '{"message": "Initial sync pending"}'),
     ('idcs_groups', 'pending', '{"message": "Initial sync pending"}'),
     ('ldap_users', 'pending', '{"message": "Initial sync pending"}'),
-    ('ldap_groups', 'pending', '{"message": "Initial sync pending"}')
+    ('ldap_groups', 'pending', '{"message": "Initial sync pending"}'),
+    ('full_sync', 'pending', '{"message": "Initial sync pending"}'),
+    ('incremental_sync', 'pending', '{"message": "Initial sync pending"}')
 ON CONFLICT DO NOTHING;
 EOF
 
@@ -9,17 +9,26 @@ This script synchronizes users and groups between OCI IDCS and OpenLDAP.
 import os
 import sys
 import json
+import time
 import logging
 import asyncio
 import argparse
-from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from typing import List, Dict, Any, Optional, Tuple, Set, Iterable, AsyncIterator, Callable, Awaitable
+from dataclasses import dataclass, asdict
 
 import asyncpg
 import aiohttp
 import ldap3
-from ldap3 import Server, Connection, ALL, MODIFY_REPLACE, MODIFY_ADD, MODIFY_DELETE
+from ldap3 import Server, Connection, ALL, NONE, MODIFY_REPLACE, MODIFY_ADD, MODIFY_DELETE
+from ldap3.core.exceptions import LDAPBindError, LDAPOperationResult
+from ldap3.utils.dn import escape_rdn
+
+# OID of the RFC 2696 simple paged results control
+PAGED_RESULTS_CONTROL_OID = '1.2.840.113556.1.4.319'
+
+# Maximum SCIM ids combined into one "id eq ... or ..." lookup filter
+MEMBER_LOOKUP_BATCH_SIZE = 50
 
 # Add the backend directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
@@ -28,48 +37,22 @@ try:
     from app.core.config import settings
     from app.services.auth.idcs_service import IDCSService
     from app.services.auth.ldap_service import LDAPService
+    from app.services.auth.ldap_pool import ldap_cache_keys
+    from app.core.cache import TieredCache
+    from app.core.http import idcs_http
+    from app.services.auth.idcs_admin import IDCSTokenManager, IDCSSCIMClient
 except ImportError as e:
     print(f"Error importing backend modules: {e}")
     print("Make sure you're running this script from the project root directory")
     sys.exit(1)
 
-
-@dataclass
-class SyncUser:
-    """User data structure for synchronization"""
-    user_id: str
-    username: str
-    email: str
-    first_name: Optional[str] = None
-    last_name: Optional[str] = None
-    display_name: Optional[str] = None
-    groups: List[str] = None
-    source: str = 'unknown'
-    attributes: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.groups is None:
-            self.groups = []
-        if self.attributes is None:
-            self.attributes = {}
-
-
-@dataclass
-class SyncGroup:
-    """Group data structure for synchronization"""
-    group_id: str
-    group_name: str
-    display_name: Optional[str] = None
-    description: Optional[str] = None
-    members: List[str] = None
-    source: str = 'unknown'
-    attributes: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.members is None:
-            self.members = []
-        if self.attributes is None:
-            self.attributes = {}
+from sync_delta import (
+    FailedWatermark, latest_timestamp, oldest_failure, next_watermark,
+    attribute_values, single_value, compute_fingerprint
+)
+from sync_records import (
+    SyncUser, SyncGroup, pack_raw_record, compile_mapping, extract_mapped_attributes
+)
 
 
 @dataclass
@@ -78,10 +61,12 @@ class SyncStats:
     users_processed: int = 0
     users_created: int = 0
     users_updated: int = 0
+    users_unchanged: int = 0
     users_deleted: int = 0
     groups_processed: int = 0
     groups_created: int = 0
     groups_updated: int = 0
+    groups_unchanged: int = 0
     groups_deleted: int = 0
     errors: List[str] = None
     
@@ -90,6 +75,152 @@ class SyncStats:
             self.errors = []
 
 
+class SyncDatabaseWriter:
+    """
+    Buffered writer for synchronization bookkeeping rows.
+    
+    Users and groups are queued and upserted with executemany once the
+    buffer holds `batch_size` rows or `flush_seconds` have elapsed since the
+    previous flush. One timestamp is taken per flushed batch.
+    """
+    
+    USER_UPSERT_QUERY = """
+    INSERT INTO sso_platform.users (user_id, email, first_name, last_name, display_name, source, sync_fingerprint, updated_at)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    ON CONFLICT (user_id) DO UPDATE SET
+        email = EXCLUDED.email,
+        first_name = EXCLUDED.first_name,
+        last_name = EXCLUDED.last_name,
+        display_name = EXCLUDED.display_name,
+        sync_fingerprint = EXCLUDED.sync_fingerprint,
+        updated_at = EXCLUDED.updated_at
+    """
+    
+    GROUP_UPSERT_QUERY = """
+    INSERT INTO sso_platform.groups (group_name, display_name, description, source, sync_fingerprint, updated_at)
+    VALUES ($1, $2, $3, $4, $5, $6)
+    ON CONFLICT (group_name) DO UPDATE SET
+        display_name = EXCLUDED.display_name,
+        description = EXCLUDED.description,
+        sync_fingerprint = EXCLUDED.sync_fingerprint,
+        updated_at = EXCLUDED.updated_at
+    """
+    
+    def __init__(self, db_pool: asyncpg.Pool, logger: logging.Logger, batch_size: int, flush_seconds: int):
+        self.db_pool = db_pool
+        self.logger = logger
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        
+        self._user_rows: List[Tuple[Any, ...]] = []
+        self._group_rows: List[Tuple[Any, ...]] = []
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+        
+        # Rows that could not be written, across all flushes
+        self.failed_rows = 0
+        self.errors: List[str] = []
+    
+    async def add_user(self, user: SyncUser):
+        """Queue a user row for upsert"""
+        self._user_rows.append((
+            user.user_id,
+            user.email,
+            user.first_name,
+            user.last_name,
+            user.display_name,
+            user.source,
+            user.fingerprint
+        ))
+        await self._flush_if_due()
+    
+    async def add_group(self, group: SyncGroup):
+        """Queue a group row for upsert"""
+        self._group_rows.append((
+            group.group_name,
+            group.display_name,
+            group.description,
+            group.source,
+            group.fingerprint
+        ))
+        await self._flush_if_due()
+    
+    async def _flush_if_due(self):
+        """Flush when the size or time threshold has been reached"""
+        pending = len(self._user_rows) + len(self._group_rows)
+        if pending >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_seconds:
+            await self.flush()
+    
+    async def flush(self) -> bool:
+        """
+        Write all queued rows to the database.
+        
+        Each batch is written in one transaction. If that fails (e.g. one
+        row violates a constraint), the batch is retried row by row so only
+        the offending rows are lost. Returns False if any row could not be
+        written; those rows are counted in `failed_rows` and described in
+        `errors`.
+        """
+        async with self._lock:
+            user_rows, self._user_rows = self._user_rows, []
+            group_rows, self._group_rows = self._group_rows, []
+            self._last_flush = time.monotonic()
+            
+            if not user_rows and not group_rows:
+                return True
+            
+            updated_at = datetime.now(timezone.utc)
+            user_rows = [row + (updated_at,) for row in user_rows]
+            group_rows = [row + (updated_at,) for row in group_rows]
+            
+            try:
+                async with self.db_pool.acquire() as connection:
+                    async with connection.transaction():
+                        if user_rows:
+                            await connection.executemany(self.USER_UPSERT_QUERY, user_rows)
+                        if group_rows:
+                            await connection.executemany(self.GROUP_UPSERT_QUERY, group_rows)
+                
+                self.logger.debug(f"Flushed {len(user_rows)} users and {len(group_rows)} groups to database")
+                return True
+                
+            except Exception as e:
+                self.logger.warning(
+                    f"Batch upsert of {len(user_rows)} users and {len(group_rows)} groups failed, "
+                    f"retrying row by row: {e}"
+                )
+            
+            failed = await self._write_rows_individually('user', self.USER_UPSERT_QUERY, user_rows)
+            failed += await self._write_rows_individually('group', self.GROUP_UPSERT_QUERY, group_rows)
+            return failed == 0
+    
+    async def _write_rows_individually(self, kind: str, query: str, rows: List[Tuple[Any, ...]]) -> int:
+        """Upsert rows one at a time; returns the number that failed"""
+        failed = 0
+        if not rows:
+            return failed
+        
+        try:
+            async with self.db_pool.acquire() as connection:
+                for row in rows:
+                    try:
+                        await connection.execute(query, *row)
+                    except Exception as e:
+                        failed += 1
+                        self._record_failure(f"Failed to write {kind} {row[0]} to database: {e}")
+        except Exception as e:
+            # Could not even get a connection: every remaining row is lost
+            failed = len(rows)
+            self._record_failure(f"Failed to write {len(rows)} {kind}s to database: {e}")
+        
+        self.failed_rows += failed
+        return failed
+    
+    def _record_failure(self, message: str):
+        self.logger.error(message)
+        self.errors.append(message)
+
+
 class IDCSLDAPSynchronizer:
     """
     Main synchronization class for IDCS ↔ LDAP sync
@@ -102,12 +233,41 @@ class IDCSLDAPSynchronizer:
         
         # Services
         self.idcs_service = None
+        self.idcs_tokens = None
+        self.scim_client = None
         self.ldap_service = None
-        self.db_connection = None
+        self.ldap_search_connection = None
+        self.ldap_cache = None
+        self.db_pool = None
+        self.db_writer = None
         
         # Configuration
         self.user_mapping = settings.sync_user_mapping_dict
         self.group_mapping = settings.sync_group_mapping_dict
+        self.user_accessors = compile_mapping(self.user_mapping, 'SYNC_USER_MAPPING')
+        self.group_accessors = compile_mapping(self.group_mapping, 'SYNC_GROUP_MAPPING')
+        
+        # Bound in-flight reconciliations by the LDAP connection pool size
+        self.concurrency = max(1, min(settings.SYNC_CONCURRENCY, settings.LDAP_POOL_MAX_SIZE))
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        
+        # Incremental sync state (meta.lastModified high-water marks)
+        self.incremental = False
+        self.watermarks: Dict[str, Optional[str]] = {'users': None, 'groups': None}
+        self.observed_watermarks: Dict[str, Optional[str]] = {'users': None, 'groups': None}
+        
+        # Oldest meta.lastModified of an entry that failed to apply; the
+        # watermark must stay below it so the next delta run retries it
+        self.failed_watermarks: Dict[str, FailedWatermark] = {'users': None, 'groups': None}
+        
+        # SCIM user id → LDAP DN, used to translate group memberships
+        self.member_dn_index: Dict[str, str] = {}
+        
+        # LDAP username → DN of users present in LDAP, used to resolve
+        # members the user sync did not index (loaded on first use)
+        self.ldap_user_dns: Optional[Dict[str, str]] = None
+        # Checkpoint journal is only written by run_full_sync
+        self.checkpointing = False
         
     def _setup_logging(self) -> logging.Logger:
         """Setup logging configuration"""
@@ -140,21 +300,43 @@ class IDCSLDAPSynchronizer:
         self.logger.info("Initializing synchronization services...")
         
         try:
-            # Initialize IDCS service
+            # Initialize IDCS service on the shared keep-alive connection pool
             if settings.FEATURE_OAUTH_LOGIN or settings.FEATURE_SAML_LOGIN:
+                await idcs_http.start()
                 self.idcs_service = IDCSService()
                 await self.idcs_service.initialize()
+                
+                # SCIM listing uses one cached client-credentials token
+                self.idcs_tokens = IDCSTokenManager()
+                await self.idcs_tokens.start()
+                self.scim_client = IDCSSCIMClient(self.idcs_tokens)
                 self.logger.info("IDCS service initialized")
             
             # Initialize LDAP service
             if settings.FEATURE_DIRECT_LDAP_LOGIN or settings.FEATURE_LDAP_SYNC:
                 self.ldap_service = LDAPService()
                 await self.ldap_service.initialize()
+                self.ldap_search_connection = await asyncio.to_thread(self._open_ldap_search_connection)
                 self.logger.info("LDAP service initialized")
             
-            # Initialize database connection
-            self.db_connection = await asyncpg.connect(settings.DATABASE_URL)
-            self.logger.info("Database connection established")
+            # Shared LDAP login cache; entries this job modifies are evicted
+            if settings.LDAP_CACHE_ENABLED and settings.LDAP_CACHE_REDIS_ENABLED:
+                self.ldap_cache = TieredCache('ldap', max_size=1, ttl=settings.LDAP_CACHE_TTL, redis_enabled=True)
+                await self.ldap_cache.initialize(subscribe=False)
+            
+            # Initialize database pool (one connection per sync worker)
+            self.db_pool = await asyncpg.create_pool(
+                settings.DATABASE_URL,
+                min_size=1,
+                max_size=self.concurrency
+            )
+            self.db_writer = SyncDatabaseWriter(
+                self.db_pool,
+                self.logger,
+                batch_size=settings.SYNC_DB_BATCH_SIZE,
+                flush_seconds=settings.SYNC_DB_FLUSH_SECONDS
+            )
+            self.logger.info("Database connection pool established")
             
         except Exception as e:
             self.logger.error(f"Failed to initialize services: {e}")
@@ -162,12 +344,26 @@ class IDCSLDAPSynchronizer:
     
     async def cleanup(self):
         """Cleanup resources"""
-        if self.db_connection:
-            await self.db_connection.close()
+        if self.ldap_search_connection:
+            await asyncio.to_thread(self.ldap_search_connection.unbind)
+            self.ldap_search_connection = None
+        if self.ldap_cache:
+            await self.ldap_cache.close()
+            self.ldap_cache = None
+        if self.db_writer:
+            await self.db_writer.flush()
+            self.db_writer = None
+        if self.db_pool:
+            await self.db_pool.close()
+            self.db_pool = None
+        if self.idcs_tokens:
+            await self.idcs_tokens.close()
+            self.idcs_tokens = None
+        await idcs_http.close()
         self.logger.info("Cleanup completed")
     
-    async def sync_users_idcs_to_ldap(self) -> bool:
-        """Synchronize users from IDCS to LDAP"""
+    async def sync_users_idcs_to_ldap(self, start_index: int = 1) -> bool:
+        """Synchronize users from IDCS to LDAP, optionally resuming at a SCIM startIndex"""
         if not self.idcs_service or not self.ldap_service:
             self.logger.warning("IDCS or LDAP service not available for user sync")
             return False
@@ -175,36 +371,59 @@ class IDCSLDAPSynchronizer:
         self.logger.info("Starting IDCS → LDAP user synchronization...")
         
         try:
-            # Get users from IDCS
-            idcs_users = await self._get_idcs_users()
-            self.logger.info(f"Retrieved {len(idcs_users)} users from IDCS")
-            
             # Get existing users from LDAP
-            ldap_users = await self._get_ldap_users()
-            ldap_user_map = {user.username: user for user in ldap_users}
+            ldap_user_map = await self._get_ldap_user_index()
+            self.ldap_user_dns = {
+                username: self._user_dn(username, ldap_user) for username, ldap_user in ldap_user_map.items()
+            }
             
-            # Process each IDCS user
-            for idcs_user in idcs_users:
-                self.stats.users_processed += 1
+            # Stream users from IDCS page by page
+            idcs_usernames = set()
+            async for idcs_users, next_start_index in self._iter_idcs_users(start_index):
+                fingerprints = await self._load_user_fingerprints([user.user_id for user in idcs_users])
+                
+                # Reconcile the page concurrently; results come back in page order
+                results = await asyncio.gather(*(
+                    self._reconcile_user(
+                        idcs_user,
+                        ldap_user_map.get(idcs_user.username),
+                        fingerprints.get(idcs_user.user_id)
+                    )
+                    for idcs_user in idcs_users
+                ))
                 
-                try:
-                    if idcs_user.username in ldap_user_map:
-                        # Update existing user
-                        await self._update_ldap_user(idcs_user, ldap_user_map[idcs_user.username])
+                for idcs_user, (outcome, error_msg) in zip(idcs_users, results):
+                    idcs_usernames.add(idcs_user.username)
+                    self.stats.users_processed += 1
+                    
+                    # Index only users that exist in LDAP; a member DN for a
+                    # failed create would be rejected by the group modify
+                    ldap_user = ldap_user_map.get(idcs_user.username)
+                    if ldap_user is not None or outcome == 'created':
+                        self.member_dn_index[idcs_user.user_id] = self._user_dn(idcs_user.username, ldap_user)
+                    
+                    if outcome == 'created':
+                        self.stats.users_created += 1
+                    elif outcome == 'updated':
                         self.stats.users_updated += 1
+                    elif outcome == 'unchanged':
+                        self.stats.users_unchanged += 1
                     else:
-                        # Create new user
-                        await self._create_ldap_user(idcs_user)
-                        self.stats.users_created += 1
-                        
-                except Exception as e:
-                    error_msg = f"Failed to sync user {idcs_user.username}: {e}"
-                    self.logger.error(error_msg)
-                    self.stats.errors.append(error_msg)
+                        self.stats.errors.append(error_msg)
+                        self._observe_failure('users', idcs_user.last_modified)
+                
+                await self._commit_checkpoint('users', next_start_index)
+            
+            self.logger.info(f"Retrieved {len(idcs_usernames)} users from IDCS")
             
             # Handle deletions if enabled
-            if settings.SYNC_DELETE_MISSING_USERS:
-                await self._delete_missing_ldap_users(idcs_users, ldap_users)
+            # Deletions need the complete IDCS user set, so skip them on delta or resumed runs
+            if settings.SYNC_DELETE_MISSING_USERS and not self.incremental:
+                if start_index > 1:
+                    self.logger.warning("Skipping LDAP user deletions for a resumed sync")
+                else:
+                    await self._commit_checkpoint('user_deletions', 1)
+                    await self._delete_missing_ldap_users(idcs_usernames, ldap_user_map.values())
             
             self.logger.info("IDCS → LDAP user synchronization completed")
             return True
@@ -213,8 +432,8 @@ class IDCSLDAPSynchronizer:
             self.logger.error(f"User synchronization failed: {e}")
             return False
     
-    async def sync_groups_idcs_to_ldap(self) -> bool:
-        """Synchronize groups from IDCS to LDAP"""
+    async def sync_groups_idcs_to_ldap(self, start_index: int = 1) -> bool:
+        """Synchronize groups from IDCS to LDAP, optionally resuming at a SCIM startIndex"""
         if not self.idcs_service or not self.ldap_service:
             self.logger.warning("IDCS or LDAP service not available for group sync")
             return False
@@ -222,36 +441,62 @@ class IDCSLDAPSynchronizer:
         self.logger.info("Starting IDCS → LDAP group synchronization...")
         
         try:
-            # Get groups from IDCS
-            idcs_groups = await self._get_idcs_groups()
-            self.logger.info(f"Retrieved {len(idcs_groups)} groups from IDCS")
-            
             # Get existing groups from LDAP
-            ldap_groups = await self._get_ldap_groups()
-            ldap_group_map = {group.group_name: group for group in ldap_groups}
+            ldap_group_map = await self._get_ldap_group_index()
             
-            # Process each IDCS group
-            for idcs_group in idcs_groups:
-                self.stats.groups_processed += 1
+            # Stream groups from IDCS page by page
+            idcs_group_names = set()
+            async for idcs_groups, next_start_index in self._iter_idcs_groups(start_index):
+                fingerprints = await self._load_group_fingerprints([group.group_name for group in idcs_groups])
+                
+                # Fingerprint the page first so only changed groups need member lookups
+                changed_members = set()
+                for idcs_group in idcs_groups:
+                    idcs_group.fingerprint = self._group_fingerprint(idcs_group)
+                    if (idcs_group.group_name not in ldap_group_map
+                            or idcs_group.fingerprint != fingerprints.get(idcs_group.group_name)):
+                        changed_members.update(idcs_group.members)
                 
-                try:
-                    if idcs_group.group_name in ldap_group_map:
-                        # Update existing group
-                        await self._update_ldap_group(idcs_group, ldap_group_map[idcs_group.group_name])
+                # Look up member ids missing from the DN index once per page,
+                # rather than from each concurrently reconciled group
+                await self._resolve_member_dns(changed_members)
+                
+                # Reconcile the page concurrently; results come back in page order
+                results = await asyncio.gather(*(
+                    self._reconcile_group(
+                        idcs_group,
+                        ldap_group_map.get(idcs_group.group_name),
+                        fingerprints.get(idcs_group.group_name)
+                    )
+                    for idcs_group in idcs_groups
+                ))
+                
+                for idcs_group, (outcome, error_msg) in zip(idcs_groups, results):
+                    idcs_group_names.add(idcs_group.group_name)
+                    self.stats.groups_processed += 1
+                    
+                    if outcome == 'created':
+                        self.stats.groups_created += 1
+                    elif outcome == 'updated':
                         self.stats.groups_updated += 1
+                    elif outcome == 'unchanged':
+                        self.stats.groups_unchanged += 1
                     else:
-                        # Create new group
-                        await self._create_ldap_group(idcs_group)
-                        self.stats.groups_created += 1
-                        
-                except Exception as e:
-                    error_msg = f"Failed to sync group {idcs_group.group_name}: {e}"
-                    self.logger.error(error_msg)
-                    self.stats.errors.append(error_msg)
+                        self.stats.errors.append(error_msg)
+                        self._observe_failure('groups', idcs_group.last_modified)
+                
+                await self._commit_checkpoint('groups', next_start_index)
+            
+            self.logger.info(f"Retrieved {len(idcs_group_names)} groups from IDCS")
             
             # Handle deletions if enabled
-            if settings.SYNC_DELETE_MISSING_GROUPS:
-                await self._delete_missing_ldap_groups(idcs_groups, ldap_groups)
+            # Deletions need the complete IDCS group set, so skip them on delta or resumed runs
+            if settings.SYNC_DELETE_MISSING_GROUPS and not self.incremental:
+                if start_index > 1:
+                    self.logger.warning("Skipping LDAP group deletions for a resumed sync")
+                else:
+                    await self._commit_checkpoint('group_deletions', 1)
+                    await self._delete_missing_ldap_groups(idcs_group_names, ldap_group_map.values())
             
             self.logger.info("IDCS → LDAP group synchronization completed")
             return True
@@ -260,6 +505,164 @@ class IDCSLDAPSynchronizer:
             self.logger.error(f"Group synchronization failed: {e}")
             return False
     
+    async def _reconcile_user(
+        self,
+        idcs_user: SyncUser,
+        ldap_user: Optional[SyncUser],
+        stored_fingerprint: Optional[str]
+    ) -> Tuple[str, Optional[str]]:
+        """Create or update a single LDAP user, returning (outcome, error message)"""
+        async with self.semaphore:
+            try:
+                idcs_user.fingerprint = compute_fingerprint(
+                    self._map_user_attributes_idcs_to_ldap(idcs_user)
+                )
+                
+                if ldap_user is not None:
+                    # Same mapped attributes as the last successful sync
+                    if idcs_user.fingerprint == stored_fingerprint:
+                        return 'unchanged', None
+                    
+                    # Update existing user
+                    changed = await self._update_ldap_user(idcs_user, ldap_user)
+                    return ('updated' if changed else 'unchanged'), None
+                
+                # Create new user
+                await self._create_ldap_user(idcs_user)
+                return 'created', None
+                
+            except Exception as e:
+                error_msg = f"Failed to sync user {idcs_user.username}: {e}"
+                self.logger.error(error_msg)
+                return 'error', error_msg
+    
+    async def _reconcile_group(
+        self,
+        idcs_group: SyncGroup,
+        ldap_group: Optional[SyncGroup],
+        stored_fingerprint: Optional[str]
+    ) -> Tuple[str, Optional[str]]:
+        """Create or update a single LDAP group, returning (outcome, error message)"""
+        async with self.semaphore:
+            try:
+                # Same attributes and members as the last successful sync
+                if ldap_group is not None and idcs_group.fingerprint == stored_fingerprint:
+                    return 'unchanged', None
+                
+                # Members that could not be mapped are missing from LDAP, so
+                # store no fingerprint and reconcile the group again next run
+                _, unresolved = self._member_dns(idcs_group)
+                if unresolved:
+                    idcs_group.fingerprint = None
+                
+                if ldap_group is not None:
+                    # Update existing group
+                    changed = await self._update_ldap_group(idcs_group, ldap_group)
+                    return ('updated' if changed else 'unchanged'), None
+                
+                # Create new group
+                await self._create_ldap_group(idcs_group)
+                return 'created', None
+                
+            except Exception as e:
+                error_msg = f"Failed to sync group {idcs_group.group_name}: {e}"
+                self.logger.error(error_msg)
+                return 'error', error_msg
+    
+    @staticmethod
+    def _user_dn(username: str, ldap_user: Optional[SyncUser]) -> str:
+        """DN of an LDAP user, derived from the username when not yet in LDAP"""
+        if ldap_user is not None and ldap_user.attributes.get('dn'):
+            return ldap_user.attributes['dn']
+        return f"{settings.LDAP_USER_ID_ATTR}={escape_rdn(username)},{settings.LDAP_USER_DN}"
+    
+    @staticmethod
+    def _normalize_dn(dn: str) -> str:
+        """Normalize a DN for comparison (case and spacing between RDNs)"""
+        return ','.join(rdn.strip() for rdn in dn.split(',')).lower()
+    
+    def _group_fingerprint(self, group: SyncGroup) -> str:
+        """Fingerprint of a group's mapped attributes and SCIM member ids"""
+        group_attrs = self._map_group_attributes_idcs_to_ldap(group)
+        group_attrs['member'] = sorted(group.members)
+        return compute_fingerprint(group_attrs)
+    
+    async def _resolve_member_dns(self, member_ids: Iterable[str]):
+        """
+        Look up SCIM ids missing from the DN index (e.g. on delta runs).
+        
+        Only users present in LDAP are indexed; the rest stay unresolved.
+        """
+        missing = sorted({member_id for member_id in member_ids if member_id not in self.member_dn_index})
+        if not missing:
+            return
+        
+        if self.ldap_user_dns is None:
+            ldap_user_map = await self._get_ldap_user_index()
+            self.ldap_user_dns = {
+                username: self._user_dn(username, ldap_user) for username, ldap_user in ldap_user_map.items()
+            }
+        
+        for start in range(0, len(missing), MEMBER_LOOKUP_BATCH_SIZE):
+            batch = missing[start:start + MEMBER_LOOKUP_BATCH_SIZE]
+            scim_filter = ' or '.join(f'id eq "{member_id}"' for member_id in batch)
+            
+            async for page, _ in self._iter_idcs_pages(self.scim_client.list_users, scim_filter):
+                for user_data in page:
+                    member_dn = self.ldap_user_dns.get(user_data.get('userName'))
+                    if user_data.get('id') and member_dn:
+                        self.member_dn_index[user_data['id']] = member_dn
+    
+    def _member_dns(self, group: SyncGroup) -> Tuple[List[str], List[str]]:
+        """Translate SCIM member ids to LDAP DNs, returning the DNs and the unresolved ids"""
+        member_dns = []
+        unresolved = []
+        for member_id in group.members:
+            member_dn = self.member_dn_index.get(member_id)
+            if member_dn:
+                member_dns.append(member_dn)
+            else:
+                self.logger.debug(f"Skipping unresolved member {member_id} of group {group.group_name}")
+                unresolved.append(member_id)
+        return member_dns, unresolved
+    
+    @staticmethod
+    def _chunk_member_modifications(operation: str, member_dns: List[str]) -> List[List[Tuple[str, str, Any]]]:
+        """Split a member add/delete into modify requests of bounded size"""
+        chunk_size = max(1, settings.SYNC_MEMBER_CHUNK_SIZE)
+        return [
+            [(operation, settings.LDAP_GROUP_MEMBER_ATTR, member_dns[start:start + chunk_size])]
+            for start in range(0, len(member_dns), chunk_size)
+        ]
+    
+    async def _load_user_fingerprints(self, user_ids: List[str]) -> Dict[str, str]:
+        """Load stored fingerprints for a page of users"""
+        try:
+            query = """
+            SELECT user_id, sync_fingerprint FROM sso_platform.users
+            WHERE user_id = ANY($1::varchar[])
+            """
+            rows = await self.db_pool.fetch(query, user_ids)
+            return {row['user_id']: row['sync_fingerprint'] for row in rows}
+            
+        except Exception as e:
+            self.logger.error(f"Failed to load user fingerprints: {e}")
+            return {}
+    
+    async def _load_group_fingerprints(self, group_names: List[str]) -> Dict[str, str]:
+        """Load stored fingerprints for a page of groups"""
+        try:
+            query = """
+            SELECT group_name, sync_fingerprint FROM sso_platform.groups
+            WHERE group_name = ANY($1::varchar[])
+            """
+            rows = await self.db_pool.fetch(query, group_names)
+            return {row['group_name']: row['sync_fingerprint'] for row in rows}
+            
+        except Exception as e:
+            self.logger.error(f"Failed to load group fingerprints: {e}")
+            return {}
+    
     async def sync_users_ldap_to_idcs(self) -> bool:
         """Synchronize users from LDAP to IDCS"""
         # Note: This is typically read-only from LDAP to IDCS
@@ -274,108 +677,276 @@ class IDCSLDAPSynchronizer:
         self.logger.info("LDAP → IDCS group sync not implemented (typically read-only)")
         return True
     
-    async def _get_idcs_users(self) -> List[SyncUser]:
-        """Get users from IDCS"""
-        users = []
+    async def _iter_idcs_pages(
+        self,
+        list_resources: Callable[..., Awaitable[Dict[str, Any]]],
+        scim_filter: Optional[str] = None,
+        start_index: int = 1
+    ) -> AsyncIterator[Tuple[List[Dict[str, Any]], int]]:
+        """
+        Page through an IDCS SCIM listing using startIndex/count.
+        
+        Yields each page with the startIndex of the page after it. The
+        request for the next page is issued before the current page is
+        yielded, so at most one page is in flight while the caller reconciles
+        the previous one against LDAP.
+        """
+        page_size = max(1, settings.SYNC_BATCH_SIZE)
+        extra_params = {'filter': scim_filter} if scim_filter else {}
+        next_page = asyncio.ensure_future(
+            list_resources(start_index=start_index, count=page_size, **extra_params)
+        )
+        
+        try:
+            while next_page is not None:
+                page_data = await next_page
+                next_page = None
+                
+                resources = page_data.get('Resources', [])
+                total_results = page_data.get('totalResults', 0)
+                start_index += len(resources)
+                
+                # Prefetch the next page while this one is being processed
+                if resources and start_index <= total_results:
+                    next_page = asyncio.ensure_future(
+                        list_resources(start_index=start_index, count=page_size, **extra_params)
+                    )
+                
+                yield resources, start_index
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+    
+    async def _iter_idcs_users(self, start_index: int = 1) -> AsyncIterator[Tuple[List[SyncUser], int]]:
+        """Get users from IDCS, one SCIM page at a time"""
         try:
-            # Use IDCS service to get users
-            idcs_users_data = await self.idcs_service.list_users()
-            
-            for user_data in idcs_users_data.get('Resources', []):
-                user = SyncUser(
-                    user_id=user_data.get('id'),
-                    username=user_data.get('userName'),
-                    email=user_data.get('emails', [{}])[0].get('value'),
-                    first_name=user_data.get('name', {}).get('givenName'),
-                    last_name=user_data.get('name', {}).get('familyName'),
-                    display_name=user_data.get('displayName'),
-                    groups=[group.get('display') for group in user_data.get('groups', [])],
-                    source='idcs',
-                    attributes=user_data
-                )
-                users.append(user)
+            async for page, next_start_index in self._iter_idcs_pages(
+                self.scim_client.list_users, self._delta_filter('users'), start_index
+            ):
+                users = []
+                for user_data in page:
+                    self._observe_last_modified('users', user_data)
+                    user = SyncUser(
+                        user_id=user_data.get('id'),
+                        username=user_data.get('userName'),
+                        email=user_data.get('emails', [{}])[0].get('value'),
+                        first_name=user_data.get('name', {}).get('givenName'),
+                        last_name=user_data.get('name', {}).get('familyName'),
+                        display_name=user_data.get('displayName'),
+                        groups=tuple(group.get('display') for group in user_data.get('groups', [])),
+                        source='idcs',
+                        attributes=extract_mapped_attributes(user_data, self.user_accessors),
+                        last_modified=user_data.get('meta', {}).get('lastModified'),
+                        raw=pack_raw_record(user_data, settings.SYNC_RETAIN_RAW_RECORDS)
+                    )
+                    users.append(user)
+                
+                yield users, next_start_index
                 
         except Exception as e:
             self.logger.error(f"Failed to get IDCS users: {e}")
             raise
-        
-        return users
     
-    async def _get_idcs_groups(self) -> List[SyncGroup]:
-        """Get groups from IDCS"""
-        groups = []
+    async def _iter_idcs_groups(self, start_index: int = 1) -> AsyncIterator[Tuple[List[SyncGroup], int]]:
+        """Get groups from IDCS, one SCIM page at a time"""
         try:
-            # Use IDCS service to get groups
-            idcs_groups_data = await self.idcs_service.list_groups()
-            
-            for group_data in idcs_groups_data.get('Resources', []):
-                group = SyncGroup(
-                    group_id=group_data.get('id'),
-                    group_name=group_data.get('displayName'),
-                    display_name=group_data.get('displayName'),
-                    description=group_data.get('description'),
-                    members=[member.get('value') for member in group_data.get('members', [])],
-                    source='idcs',
-                    attributes=group_data
-                )
-                groups.append(group)
+            async for page, next_start_index in self._iter_idcs_pages(
+                self.scim_client.list_groups, self._delta_filter('groups'), start_index
+            ):
+                groups = []
+                for group_data in page:
+                    self._observe_last_modified('groups', group_data)
+                    group = SyncGroup(
+                        group_id=group_data.get('id'),
+                        group_name=group_data.get('displayName'),
+                        display_name=group_data.get('displayName'),
+                        description=group_data.get('description'),
+                        members=tuple(member.get('value') for member in group_data.get('members', [])),
+                        source='idcs',
+                        attributes=extract_mapped_attributes(group_data, self.group_accessors),
+                        last_modified=group_data.get('meta', {}).get('lastModified'),
+                        raw=pack_raw_record(group_data, settings.SYNC_RETAIN_RAW_RECORDS)
+                    )
+                    groups.append(group)
+                
+                yield groups, next_start_index
                 
         except Exception as e:
             self.logger.error(f"Failed to get IDCS groups: {e}")
             raise
+    
+    def _delta_filter(self, resource: str) -> Optional[str]:
+        """Build the SCIM filter for an incremental fetch, if any"""
+        if not self.incremental or not self.watermarks.get(resource):
+            return None
+        return f'meta.lastModified gt "{self.watermarks[resource]}"'
+    
+    def _observe_last_modified(self, resource: str, resource_data: Dict[str, Any]):
+        """Track the highest meta.lastModified seen for a resource type"""
+        self.observed_watermarks[resource] = latest_timestamp(
+            self.observed_watermarks.get(resource),
+            resource_data.get('meta', {}).get('lastModified')
+        )
+    
+    def _observe_failure(self, resource: str, last_modified: Optional[str]):
+        """Track the oldest meta.lastModified among entries that failed to apply"""
+        self.failed_watermarks[resource] = oldest_failure(self.failed_watermarks.get(resource), last_modified)
+    
+    def _open_ldap_search_connection(self) -> Connection:
+        """Open the read-only connection used for paged directory scans"""
+        server = Server(settings.LDAP_SERVER, use_ssl=settings.LDAP_USE_SSL, get_info=NONE)
+        connection = Connection(
+            server,
+            user=settings.LDAP_BIND_DN,
+            password=settings.LDAP_BIND_PASSWORD,
+            receive_timeout=settings.LDAP_POOL_TIMEOUT
+        )
+        if settings.LDAP_USE_TLS and not settings.LDAP_USE_SSL:
+            connection.open()
+            connection.start_tls()
+        if not connection.bind():
+            result = connection.result or {}
+            connection.unbind()
+            raise LDAPBindError(
+                f"LDAP bind as {settings.LDAP_BIND_DN} failed: {result.get('description')} {result.get('message', '')}".rstrip()
+            )
+        return connection
+    
+    def _search_ldap_page(
+        self,
+        search_base: str,
+        search_filter: str,
+        search_scope: str,
+        attributes: List[str],
+        cookie: Optional[bytes]
+    ) -> Tuple[List[Dict[str, Any]], Optional[bytes]]:
+        """Fetch one page of entries with the paged results control"""
+        connection = self.ldap_search_connection
+        connection.search(
+            search_base,
+            search_filter,
+            search_scope=search_scope,
+            attributes=attributes,
+            paged_size=settings.LDAP_PAGE_SIZE,
+            paged_cookie=cookie
+        )
         
-        return groups
+        entries = []
+        for response in connection.response or []:
+            if response.get('type') != 'searchResEntry':
+                continue
+            entry = {'dn': response['dn']}
+            for attr, value in response['attributes'].items():
+                # Flatten single-valued attributes; keep membership lists intact
+                if isinstance(value, list) and len(value) == 1 and attr != settings.LDAP_GROUP_MEMBER_ATTR:
+                    value = value[0]
+                entry[attr] = value
+            entries.append(entry)
+        
+        # A scan that stops early (sizeLimitExceeded, timeLimitExceeded, ...)
+        # would otherwise yield a silently truncated index
+        result = connection.result or {}
+        if result.get('result') != 0:
+            raise LDAPOperationResult(
+                result=result.get('result'),
+                description=result.get('description'),
+                dn=search_base,
+                message=f"Paged search under {search_base} failed: {result.get('message', '')}"
+            )
+        
+        controls = result.get('controls', {})
+        next_cookie = controls.get(PAGED_RESULTS_CONTROL_OID, {}).get('value', {}).get('cookie')
+        return entries, next_cookie or None
+    
+    async def _iter_ldap_entries(
+        self,
+        search_base: str,
+        search_filter: str,
+        search_scope: str,
+        attributes: List[str]
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream a directory subtree one page at a time (RFC 2696).
+        
+        Each page is fetched off the event loop so IDCS prefetching keeps
+        running while the directory answers.
+        """
+        cookie = None
+        while True:
+            entries, cookie = await asyncio.to_thread(
+                self._search_ldap_page, search_base, search_filter, search_scope, attributes, cookie
+            )
+            yield entries
+            if not cookie:
+                break
     
-    async def _get_ldap_users(self) -> List[SyncUser]:
-        """Get users from LDAP"""
-        users = []
+    async def _get_ldap_user_index(self) -> Dict[str, SyncUser]:
+        """Build a username → user index from a paged LDAP scan"""
+        users = {}
+        attributes = sorted({
+            settings.LDAP_USER_ID_ATTR, 'mail', 'givenName', 'sn', 'displayName',
+            *self.user_mapping.keys()
+        })
+        
         try:
-            # Use LDAP service to get users
-            ldap_users_data = await self.ldap_service.search_users()
-            
-            for user_data in ldap_users_data:
-                user = SyncUser(
-                    user_id=user_data.get('uid'),
-                    username=user_data.get('uid'),
-                    email=user_data.get('mail'),
-                    first_name=user_data.get('givenName'),
-                    last_name=user_data.get('sn'),
-                    display_name=user_data.get('displayName'),
-                    groups=user_data.get('groups', []),
-                    source='ldap',
-                    attributes=user_data
-                )
-                users.append(user)
-                
+            async for page in self._iter_ldap_entries(
+                settings.LDAP_USER_DN,
+                settings.LDAP_USER_FILTER.format(username='*'),
+                settings.LDAP_USER_SEARCH_SCOPE,
+                attributes
+            ):
+                for user_data in page:
+                    username = user_data.get(settings.LDAP_USER_ID_ATTR)
+                    users[username] = SyncUser(
+                        user_id=username,
+                        username=username,
+                        email=user_data.get('mail'),
+                        first_name=user_data.get('givenName'),
+                        last_name=user_data.get('sn'),
+                        display_name=user_data.get('displayName'),
+                        source='ldap',
+                        attributes=user_data
+                    )
+                    
         except Exception as e:
             self.logger.error(f"Failed to get LDAP users: {e}")
             raise
         
+        self.logger.info(f"Indexed {len(users)} users from LDAP")
         return users
     
-    async def _get_ldap_groups(self) -> List[SyncGroup]:
-        """Get groups from LDAP"""
-        groups = []
+    async def _get_ldap_group_index(self) -> Dict[str, SyncGroup]:
+        """Build a group name → group index from a paged LDAP scan"""
+        groups = {}
+        attributes = sorted({
+            settings.LDAP_GROUP_NAME_ATTR, 'description', settings.LDAP_GROUP_MEMBER_ATTR,
+            *self.group_mapping.keys()
+        })
+        
         try:
-            # Use LDAP service to get groups
-            ldap_groups_data = await self.ldap_service.search_groups()
-            
-            for group_data in ldap_groups_data:
-                group = SyncGroup(
-                    group_id=group_data.get('cn'),
-                    group_name=group_data.get('cn'),
-                    display_name=group_data.get('cn'),
-                    description=group_data.get('description'),
-                    members=group_data.get('members', []),
-                    source='ldap',
-                    attributes=group_data
-                )
-                groups.append(group)
-                
+            async for page in self._iter_ldap_entries(
+                settings.LDAP_GROUP_DN,
+                settings.LDAP_GROUP_FILTER.format(groupname='*'),
+                settings.LDAP_GROUP_SEARCH_SCOPE,
+                attributes
+            ):
+                for group_data in page:
+                    group_name = group_data.get(settings.LDAP_GROUP_NAME_ATTR)
+                    groups[group_name] = SyncGroup(
+                        group_id=group_name,
+                        group_name=group_name,
+                        display_name=group_name,
+                        description=single_value(group_data.get('description')),
+                        members=tuple(group_data.get(settings.LDAP_GROUP_MEMBER_ATTR, ())),
+                        source='ldap',
+                        attributes=group_data
+                    )
+                    
         except Exception as e:
             self.logger.error(f"Failed to get LDAP groups: {e}")
             raise
         
+        self.logger.info(f"Indexed {len(groups)} groups from LDAP")
         return groups
     
     async def _create_ldap_user(self, user: SyncUser):
@@ -391,6 +962,7 @@ class IDCSLDAPSynchronizer:
             # Create user in LDAP
             await self.ldap_service.create_user(user.username, ldap_attributes)
             self.logger.info(f"Created LDAP user: {user.username}")
+            await self._invalidate_ldap_cache(usernames=[user.username])
             
             # Update database
             await self._update_user_in_database(user)
@@ -399,26 +971,32 @@ class IDCSLDAPSynchronizer:
             self.logger.error(f"Failed to create LDAP user {user.username}: {e}")
             raise
     
-    async def _update_ldap_user(self, idcs_user: SyncUser, ldap_user: SyncUser):
-        """Update an existing user in LDAP"""
-        if self.dry_run:
-            self.logger.info(f"[DRY RUN] Would update LDAP user: {idcs_user.username}")
-            return
-        
+    async def _update_ldap_user(self, idcs_user: SyncUser, ldap_user: SyncUser) -> bool:
+        """Update an existing user in LDAP, returning whether LDAP was modified"""
         try:
             # Compare attributes and build modification list
             modifications = self._build_user_modifications(idcs_user, ldap_user)
             
+            if self.dry_run:
+                if modifications:
+                    self.logger.info(f"[DRY RUN] Would update LDAP user: {idcs_user.username}")
+                return bool(modifications)
+            
             if modifications:
                 # Update user in LDAP
                 await self.ldap_service.modify_user(idcs_user.username, modifications)
                 self.logger.info(f"Updated LDAP user: {idcs_user.username}")
-                
-                # Update database
-                await self._update_user_in_database(idcs_user)
+                await self._invalidate_ldap_cache(
+                    usernames=[idcs_user.username],
+                    dns=[self._user_dn(idcs_user.username, ldap_user)]
+                )
             else:
                 self.logger.debug(f"No changes needed for user: {idcs_user.username}")
-                
+            
+            # Record the new fingerprint even when LDAP already matched
+            await self._update_user_in_database(idcs_user)
+            return bool(modifications)
+            
         except Exception as e:
             self.logger.error(f"Failed to update LDAP user {idcs_user.username}: {e}")
             raise
@@ -433,10 +1011,22 @@ class IDCSLDAPSynchronizer:
             # Map IDCS attributes to LDAP attributes
             ldap_attributes = self._map_group_attributes_idcs_to_ldap(group)
             
+            # groupOfNames requires a member, so the first chunk goes into the add
+            member_dns, _ = self._member_dns(group)
+            chunk_size = max(1, settings.SYNC_MEMBER_CHUNK_SIZE)
+            ldap_attributes[settings.LDAP_GROUP_MEMBER_ATTR] = (
+                member_dns[:chunk_size] or [settings.LDAP_GROUP_PLACEHOLDER_MEMBER]
+            )
+            
             # Create group in LDAP
             await self.ldap_service.create_group(group.group_name, ldap_attributes)
             self.logger.info(f"Created LDAP group: {group.group_name}")
             
+            # Add the remaining members in bounded chunks
+            for member_modifications in self._chunk_member_modifications(MODIFY_ADD, member_dns[chunk_size:]):
+                await self.ldap_service.modify_group(group.group_name, member_modifications)
+            await self._invalidate_ldap_cache(dns=member_dns)
+            
             # Update database
             await self._update_group_in_database(group)
             
@@ -444,34 +1034,57 @@ class IDCSLDAPSynchronizer:
             self.logger.error(f"Failed to create LDAP group {group.group_name}: {e}")
             raise
     
-    async def _update_ldap_group(self, idcs_group: SyncGroup, ldap_group: SyncGroup):
-        """Update an existing group in LDAP"""
-        if self.dry_run:
-            self.logger.info(f"[DRY RUN] Would update LDAP group: {idcs_group.group_name}")
-            return
-        
+    async def _update_ldap_group(self, idcs_group: SyncGroup, ldap_group: SyncGroup) -> bool:
+        """Update an existing group in LDAP, returning whether LDAP was modified"""
         try:
             # Compare attributes and build modification list
             modifications = self._build_group_modifications(idcs_group, ldap_group)
+            members_to_add, members_to_remove = self._diff_group_members(idcs_group, ldap_group)
+            changed = bool(modifications or members_to_add or members_to_remove)
+            
+            if self.dry_run:
+                if changed:
+                    self.logger.info(
+                        f"[DRY RUN] Would update LDAP group: {idcs_group.group_name} "
+                        f"(+{len(members_to_add)}/-{len(members_to_remove)} members)"
+                    )
+                return changed
             
             if modifications:
-                # Update group in LDAP
+                # Update group attributes in LDAP
                 await self.ldap_service.modify_group(idcs_group.group_name, modifications)
-                self.logger.info(f"Updated LDAP group: {idcs_group.group_name}")
-                
-                # Update database
-                await self._update_group_in_database(idcs_group)
+            
+            # Apply membership changes in bounded chunks
+            for member_modifications in (
+                self._chunk_member_modifications(MODIFY_ADD, members_to_add) +
+                self._chunk_member_modifications(MODIFY_DELETE, members_to_remove)
+            ):
+                await self.ldap_service.modify_group(idcs_group.group_name, member_modifications)
+            
+            if changed:
+                self.logger.info(
+                    f"Updated LDAP group: {idcs_group.group_name} "
+                    f"(+{len(members_to_add)}/-{len(members_to_remove)} members)"
+                )
+                # A renamed group changes every member's cached group list
+                affected_dns = (
+                    list(ldap_group.members) + members_to_add if modifications
+                    else members_to_add + members_to_remove
+                )
+                await self._invalidate_ldap_cache(dns=affected_dns)
             else:
                 self.logger.debug(f"No changes needed for group: {idcs_group.group_name}")
-                
+            
+            # Record the new fingerprint even when LDAP already matched
+            await self._update_group_in_database(idcs_group)
+            return changed
+            
         except Exception as e:
             self.logger.error(f"Failed to update LDAP group {idcs_group.group_name}: {e}")
             raise
     
-    async def _delete_missing_ldap_users(self, idcs_users: List[SyncUser], ldap_users: List[SyncUser]):
+    async def _delete_missing_ldap_users(self, idcs_usernames: Set[str], ldap_users: Iterable[SyncUser]):
         """Delete users from LDAP that don't exist in IDCS"""
-        idcs_usernames = {user.username for user in idcs_users}
-        
         for ldap_user in ldap_users:
             if ldap_user.username not in idcs_usernames:
                 if self.dry_run:
@@ -480,16 +1093,18 @@ class IDCSLDAPSynchronizer:
                     try:
                         await self.ldap_service.delete_user(ldap_user.username)
                         self.logger.info(f"Deleted LDAP user: {ldap_user.username}")
+                        await self._invalidate_ldap_cache(
+                            usernames=[ldap_user.username],
+                            dns=[self._user_dn(ldap_user.username, ldap_user)]
+                        )
                         self.stats.users_deleted += 1
                     except Exception as e:
                         error_msg = f"Failed to delete LDAP user {ldap_user.username}: {e}"
                         self.logger.error(error_msg)
                         self.stats.errors.append(error_msg)
     
-    async def _delete_missing_ldap_groups(self, idcs_groups: List[SyncGroup], ldap_groups: List[SyncGroup]):
+    async def _delete_missing_ldap_groups(self, idcs_group_names: Set[str], ldap_groups: Iterable[SyncGroup]):
         """Delete groups from LDAP that don't exist in IDCS"""
-        idcs_group_names = {group.group_name for group in idcs_groups}
-        
         for ldap_group in ldap_groups:
             if ldap_group.group_name not in idcs_group_names:
                 if self.dry_run:
@@ -498,12 +1113,24 @@ class IDCSLDAPSynchronizer:
                     try:
                         await self.ldap_service.delete_group(ldap_group.group_name)
                         self.logger.info(f"Deleted LDAP group: {ldap_group.group_name}")
+                        await self._invalidate_ldap_cache(dns=ldap_group.members)
                         self.stats.groups_deleted += 1
                     except Exception as e:
                         error_msg = f"Failed to delete LDAP group {ldap_group.group_name}: {e}"
                         self.logger.error(error_msg)
                         self.stats.errors.append(error_msg)
     
+    async def _invalidate_ldap_cache(self, usernames: Iterable[str] = (), dns: Iterable[str] = ()):
+        """Evict LDAP login cache entries for users whose entry or groups changed"""
+        if not self.ldap_cache:
+            return
+        
+        keys = [key for username in usernames for key in ldap_cache_keys(username=username)]
+        keys += [key for dn in dns for key in ldap_cache_keys(dn=dn)]
+        chunk_size = max(1, settings.SYNC_MEMBER_CHUNK_SIZE)
+        for start in range(0, len(keys), chunk_size):
+            await self.ldap_cache.delete(*keys[start:start + chunk_size])
+    
     def _map_user_attributes_idcs_to_ldap(self, user: SyncUser) -> Dict[str, Any]:
         """Map IDCS user attributes to LDAP format"""
         ldap_attrs = {}
@@ -518,14 +1145,8 @@ class IDCSLDAPSynchronizer:
         if user.display_name:
             ldap_attrs['displayName'] = user.display_name
         
-        # Apply custom mappings from configuration
-        for ldap_attr, idcs_path in self.user_mapping.items():
-            try:
-                value = self._get_nested_value(user.attributes, idcs_path)
-                if value:
-                    ldap_attrs[ldap_attr] = value
-            except Exception as e:
-                self.logger.debug(f"Failed to map attribute {ldap_attr}: {e}")
+        # Apply custom mappings resolved when the record was fetched
+        ldap_attrs.update(user.attributes)
         
         return ldap_attrs
     
@@ -539,55 +1160,24 @@ class IDCSLDAPSynchronizer:
         if group.description:
             ldap_attrs['description'] = group.description
         
-        # Apply custom mappings from configuration
-        for ldap_attr, idcs_path in self.group_mapping.items():
-            try:
-                value = self._get_nested_value(group.attributes, idcs_path)
-                if value:
-                    ldap_attrs[ldap_attr] = value
-            except Exception as e:
-                self.logger.debug(f"Failed to map group attribute {ldap_attr}: {e}")
+        # Apply custom mappings resolved when the record was fetched
+        ldap_attrs.update(group.attributes)
         
         return ldap_attrs
     
-    def _get_nested_value(self, data: Dict[str, Any], path: str) -> Any:
-        """Get nested value from dictionary using dot notation"""
-        keys = path.split('.')
-        value = data
-        
-        for key in keys:
-            if '[' in key and ']' in key:
-                # Handle array notation like emails[0].value
-                array_key, index_part = key.split('[')
-                index = int(index_part.split(']')[0])
-                value = value.get(array_key, [])[index]
-            else:
-                value = value.get(key)
-                
-            if value is None:
-                break
-        
-        return value
-    
     def _build_user_modifications(self, idcs_user: SyncUser, ldap_user: SyncUser) -> List[Tuple[str, str, Any]]:
         """Build LDAP modification list for user updates"""
         modifications = []
         
-        # Compare email
-        if idcs_user.email != ldap_user.email:
-            modifications.append((MODIFY_REPLACE, 'mail', [idcs_user.email]))
-        
-        # Compare first name
-        if idcs_user.first_name != ldap_user.first_name:
-            modifications.append((MODIFY_REPLACE, 'givenName', [idcs_user.first_name]))
-        
-        # Compare last name
-        if idcs_user.last_name != ldap_user.last_name:
-            modifications.append((MODIFY_REPLACE, 'sn', [idcs_user.last_name]))
+        # Compare every mapped attribute, including custom SYNC_USER_MAPPING entries
+        ldap_attrs = {attr.lower(): value for attr, value in ldap_user.attributes.items()}
+        desired_attrs = self._map_user_attributes_idcs_to_ldap(idcs_user)
         
-        # Compare display name
-        if idcs_user.display_name != ldap_user.display_name:
-            modifications.append((MODIFY_REPLACE, 'displayName', [idcs_user.display_name]))
+        for attr, value in desired_attrs.items():
+            desired = attribute_values(value)
+            current = attribute_values(ldap_attrs.get(attr.lower()))
+            if sorted(desired) != sorted(current):
+                modifications.append((MODIFY_REPLACE, attr, desired))
         
         return modifications
     
@@ -599,80 +1189,214 @@ class IDCSLDAPSynchronizer:
         if idcs_group.display_name != ldap_group.display_name:
             modifications.append((MODIFY_REPLACE, 'cn', [idcs_group.display_name]))
         
-        # Compare description
-        if idcs_group.description != ldap_group.description:
-            modifications.append((MODIFY_REPLACE, 'description', [idcs_group.description]))
+        # Compare description as a single value; an empty replace clears it
+        description = single_value(idcs_group.description)
+        if description != single_value(ldap_group.description):
+            modifications.append((MODIFY_REPLACE, 'description', [description] if description else []))
         
-        # Compare members
-        idcs_members = set(idcs_group.members)
-        ldap_members = set(ldap_group.members)
+        return modifications
+    
+    def _diff_group_members(self, idcs_group: SyncGroup, ldap_group: SyncGroup) -> Tuple[List[str], List[str]]:
+        """
+        Compute member DNs to add and remove, comparing DNs to DNs.
         
-        if idcs_members != ldap_members:
-            # Calculate member differences
-            members_to_add = idcs_members - ldap_members
-            members_to_remove = ldap_members - idcs_members
-            
-            if members_to_add:
-                modifications.append((MODIFY_ADD, 'member', list(members_to_add)))
-            if members_to_remove:
-                modifications.append((MODIFY_DELETE, 'member', list(members_to_remove)))
+        The placeholder member is added while a group has no members and
+        dropped once it has real ones. Adds are applied before deletes, so
+        the group is never left empty. When some IDCS members could not be
+        mapped to a DN, existing LDAP members may be exactly those users,
+        so nothing but the placeholder is removed.
+        """
+        member_dns, unresolved = self._member_dns(idcs_group)
+        placeholder = settings.LDAP_GROUP_PLACEHOLDER_MEMBER
+        placeholder_key = self._normalize_dn(placeholder)
         
-        return modifications
+        desired = {self._normalize_dn(dn): dn for dn in member_dns}
+        if not desired and not unresolved:
+            desired = {placeholder_key: placeholder}
+        current = {self._normalize_dn(dn): dn for dn in ldap_group.members}
+        
+        members_to_add = [desired[key] for key in desired.keys() - current.keys()]
+        removable = current.keys() - desired.keys()
+        if unresolved:
+            self.logger.warning(
+                f"{len(unresolved)} members of group {idcs_group.group_name} could not be mapped; "
+                f"keeping existing LDAP members"
+            )
+            removable &= {placeholder_key}
+        members_to_remove = [current[key] for key in removable]
+        return sorted(members_to_add), sorted(members_to_remove)
     
     async def _update_user_in_database(self, user: SyncUser):
-        """Update user information in database"""
+        """Queue user information for the batched database writer"""
+        await self.db_writer.add_user(user)
+    
+    async def _update_group_in_database(self, group: SyncGroup):
+        """Queue group information for the batched database writer"""
+        await self.db_writer.add_group(group)
+    
+    async def _select_sync_mode(self, force_full: bool = False) -> bool:
+        """
+        Decide whether this run can be incremental.
+        
+        A delta run needs a watermark from a previous successful run and a
+        successful full sync within SYNC_FULL_INTERVAL_HOURS.
+        """
+        if force_full or not settings.SYNC_INCREMENTAL_ENABLED:
+            return False
+        
         try:
             query = """
-            INSERT INTO sso_platform.users (user_id, email, first_name, last_name, display_name, source, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-            ON CONFLICT (user_id) DO UPDATE SET
-                email = EXCLUDED.email,
-                first_name = EXCLUDED.first_name,
-                last_name = EXCLUDED.last_name,
-                display_name = EXCLUDED.display_name,
-                updated_at = EXCLUDED.updated_at
+            SELECT sync_type, last_sync, details
+            FROM sso_platform.sync_status
+            WHERE sync_type IN ('full_sync', 'incremental_sync') AND status = 'success'
+            ORDER BY last_sync DESC
             """
-            
-            await self.db_connection.execute(
-                query,
-                user.user_id,
-                user.email,
-                user.first_name,
-                user.last_name,
-                user.display_name,
-                user.source,
-                datetime.now(timezone.utc)
-            )
+            rows = await self.db_pool.fetch(query)
             
         except Exception as e:
-            self.logger.error(f"Failed to update user in database: {e}")
+            self.logger.error(f"Failed to load sync watermark: {e}")
+            return False
+        
+        if not rows:
+            self.logger.info("No previous successful sync found, running full sync")
+            return False
+        
+        details = rows[0]['details']
+        if isinstance(details, str):
+            details = json.loads(details)
+        watermarks = (details or {}).get('watermarks', {})
+        
+        if not watermarks.get('users') or not watermarks.get('groups'):
+            self.logger.info("Sync watermark missing, running full sync")
+            return False
+        
+        last_full_sync = next((row['last_sync'] for row in rows if row['sync_type'] == 'full_sync'), None)
+        full_interval = timedelta(hours=settings.SYNC_FULL_INTERVAL_HOURS)
+        if last_full_sync is None or datetime.now(timezone.utc) - last_full_sync >= full_interval:
+            self.logger.info("Full sync interval elapsed, running full sync")
+            return False
+        
+        self.watermarks = {'users': watermarks['users'], 'groups': watermarks['groups']}
+        return True
     
-    async def _update_group_in_database(self, group: SyncGroup):
-        """Update group information in database"""
+    def _next_watermarks(self) -> Dict[str, Optional[str]]:
+        """Merge the observed high-water marks with the previous ones"""
+        return {
+            resource: next_watermark(
+                self.watermarks.get(resource),
+                self.observed_watermarks.get(resource),
+                self.failed_watermarks.get(resource)
+            )
+            for resource in ('users', 'groups')
+        }
+    
+    async def _commit_checkpoint(self, phase: str, next_start_index: int):
+        """
+        Record progress after a committed batch.
+        
+        Buffered bookkeeping rows are flushed first. Once any row has failed
+        to write, in this flush or an earlier one, no further checkpoint is
+        recorded: a resumed run then restarts before the entries whose rows
+        were lost instead of skipping them.
+        """
+        if not self.checkpointing or self.dry_run:
+            return
+        
+        if not await self.db_writer.flush() or self.db_writer.failed_rows:
+            self.logger.warning(
+                f"Not checkpointing {phase} at startIndex {next_start_index}: "
+                f"{self.db_writer.failed_rows} bookkeeping rows could not be written"
+            )
+            return
+        
         try:
             query = """
-            INSERT INTO sso_platform.groups (group_name, display_name, description, source, updated_at)
+            INSERT INTO sso_platform.sync_checkpoints (sync_type, phase, next_start_index, state, updated_at)
             VALUES ($1, $2, $3, $4, $5)
-            ON CONFLICT (group_name) DO UPDATE SET
-                display_name = EXCLUDED.display_name,
-                description = EXCLUDED.description,
+            ON CONFLICT (sync_type) DO UPDATE SET
+                phase = EXCLUDED.phase,
+                next_start_index = EXCLUDED.next_start_index,
+                state = EXCLUDED.state,
                 updated_at = EXCLUDED.updated_at
             """
+            state = {
+                "incremental": self.incremental,
+                "watermarks": self.watermarks,
+                "observed_watermarks": self.observed_watermarks,
+                "stats": asdict(self.stats)
+            }
             
-            await self.db_connection.execute(
+            await self.db_pool.execute(
                 query,
-                group.group_name,
-                group.display_name,
-                group.description,
-                group.source,
+                'idcs_ldap',
+                phase,
+                next_start_index,
+                json.dumps(state),
                 datetime.now(timezone.utc)
             )
             
         except Exception as e:
-            self.logger.error(f"Failed to update group in database: {e}")
+            self.logger.error(f"Failed to write sync checkpoint: {e}")
+    
+    async def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Load the checkpoint left by an interrupted run, if any"""
+        try:
+            query = """
+            SELECT phase, next_start_index, state, updated_at
+            FROM sso_platform.sync_checkpoints
+            WHERE sync_type = $1
+            """
+            row = await self.db_pool.fetchrow(query, 'idcs_ldap')
+            
+        except Exception as e:
+            self.logger.error(f"Failed to load sync checkpoint: {e}")
+            return None
+        
+        if row is None:
+            return None
+        
+        state = row['state']
+        if isinstance(state, str):
+            state = json.loads(state)
+        
+        return {
+            "phase": row['phase'],
+            "next_start_index": row['next_start_index'],
+            "state": state or {},
+            "updated_at": row['updated_at']
+        }
+    
+    def _restore_checkpoint_state(self, state: Dict[str, Any]):
+        """Restore sync mode, watermarks and stats from a checkpoint"""
+        self.incremental = state.get('incremental', False)
+        self.watermarks = state.get('watermarks') or {'users': None, 'groups': None}
+        self.observed_watermarks = state.get('observed_watermarks') or {'users': None, 'groups': None}
+        self.stats = SyncStats(**state.get('stats', {}))
+    
+    async def _clear_checkpoint(self):
+        """Remove the checkpoint after a successful run"""
+        if self.dry_run:
+            return
+        
+        try:
+            await self.db_pool.execute(
+                "DELETE FROM sso_platform.sync_checkpoints WHERE sync_type = $1",
+                'idcs_ldap'
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to clear sync checkpoint: {e}")
     
     async def _update_sync_status(self, sync_type: str, status: str, details: Dict[str, Any]):
-        """Update synchronization status in database"""
+        """
+        Update synchronization status in database.
+        
+        Skipped on dry runs: they change nothing, so they must neither move
+        the watermarks nor replace the last real run in the sync history.
+        """
+        if self.dry_run:
+            self.logger.info(f"Dry run, not recording {sync_type} status '{status}'")
+            return
+        
         try:
             query = """
             UPDATE sso_platform.sync_status 
@@ -680,7 +1404,7 @@ class IDCSLDAPSynchronizer:
             WHERE sync_type = $5
             """
             
-            await self.db_connection.execute(
+            await self.db_pool.execute(
                 query,
                 datetime.now(timezone.utc),
                 status,
@@ -699,17 +1423,20 @@ class IDCSLDAPSynchronizer:
         print("="*50)
         print(f"Timestamp: {datetime.now().isoformat()}")
         print(f"Mode: {'DRY RUN' if self.dry_run else 'LIVE'}")
+        print(f"Sync: {'INCREMENTAL' if self.incremental else 'FULL'}")
         print()
         print("USERS:")
         print(f"  Processed: {self.stats.users_processed}")
         print(f"  Created:   {self.stats.users_created}")
         print(f"  Updated:   {self.stats.users_updated}")
+        print(f"  Unchanged: {self.stats.users_unchanged}")
         print(f"  Deleted:   {self.stats.users_deleted}")
         print()
         print("GROUPS:")
         print(f"  Processed: {self.stats.groups_processed}")
         print(f"  Created:   {self.stats.groups_created}")
         print(f"  Updated:   {self.stats.groups_updated}")
+        print(f"  Unchanged: {self.stats.groups_unchanged}")
         print(f"  Deleted:   {self.stats.groups_deleted}")
         print()
         print(f"ERRORS: {len(self.stats.errors)}")
@@ -718,18 +1445,61 @@ class IDCSLDAPSynchronizer:
                 print(f"  - {error}")
         print("="*50)
     
-    async def run_full_sync(self):
-        """Run complete synchronization"""
-        self.logger.info("Starting full synchronization...")
+    async def run_full_sync(self, force_full: bool = False, resume: bool = False):
+        """
+        Run complete synchronization; the caller initializes and cleans up.
+        
+        Unless `force_full` is set, only IDCS resources modified since the
+        last recorded watermark are fetched when a recent full sync exists.
+        With `resume`, an interrupted run continues from its last checkpoint.
+        """
+        sync_type = "full_sync"
         
         try:
-            await self.initialize()
+            checkpoint = await self._load_checkpoint() if resume else None
+            phase, start_index = 'users', 1
             
-            # Sync users IDCS → LDAP
-            user_sync_success = await self.sync_users_idcs_to_ldap()
+            if checkpoint:
+                self._restore_checkpoint_state(checkpoint['state'])
+                phase, start_index = checkpoint['phase'], checkpoint['next_start_index']
+                self.logger.info(
+                    f"Resuming synchronization from checkpoint ({phase}, startIndex {start_index}, "
+                    f"saved {checkpoint['updated_at']})"
+                )
+            else:
+                if resume:
+                    self.logger.info("No sync checkpoint found, starting from the beginning")
+                self.incremental = await self._select_sync_mode(force_full)
+            
+            sync_type = "incremental_sync" if self.incremental else "full_sync"
+            self.logger.info(f"Starting {'incremental' if self.incremental else 'full'} synchronization...")
+            self.checkpointing = True
+            
+            # Sync users IDCS → LDAP (deletions rerun in full on resume)
+            user_sync_success = True
+            if phase in ('users', 'user_deletions'):
+                user_start_index = start_index if phase == 'users' else 1
+                user_sync_success = await self.sync_users_idcs_to_ldap(user_start_index)
+                if user_sync_success:
+                    await self._commit_checkpoint('groups', 1)
+                start_index = 1
             
             # Sync groups IDCS → LDAP
-            group_sync_success = await self.sync_groups_idcs_to_ldap()
+            group_sync_success = True
+            if user_sync_success:
+                group_start_index = start_index if phase == 'groups' else 1
+                group_sync_success = await self.sync_groups_idcs_to_ldap(group_start_index)
+            
+            # Write any bookkeeping rows still buffered; rows that could not
+            # be written make the run a partial failure
+            await self.db_writer.flush()
+            self.stats.errors.extend(self.db_writer.errors)
+            if self.db_writer.failed_rows:
+                user_sync_success = group_sync_success = False
+            
+            # Only forget the checkpoint once every phase has completed
+            if user_sync_success and group_sync_success:
+                await self._clear_checkpoint()
             
             # Update sync status
             status = "success" if (user_sync_success and group_sync_success) else "partial_failure"
@@ -739,32 +1509,32 @@ class IDCSLDAPSynchronizer:
                         "processed": self.stats.users_processed,
                         "created": self.stats.users_created,
                         "updated": self.stats.users_updated,
+                        "unchanged": self.stats.users_unchanged,
                         "deleted": self.stats.users_deleted
                     },
                     "groups": {
                         "processed": self.stats.groups_processed,
                         "created": self.stats.groups_created,
                         "updated": self.stats.groups_updated,
+                        "unchanged": self.stats.groups_unchanged,
                         "deleted": self.stats.groups_deleted
                     }
                 },
-                "errors": self.stats.errors
+                "errors": self.stats.errors,
+                "watermarks": self._next_watermarks()
             }
             
-            await self._update_sync_status("full_sync", status, details)
+            await self._update_sync_status(sync_type, status, details)
             
             self.print_stats()
-            self.logger.info("Full synchronization completed")
+            self.logger.info(f"{'Incremental' if self.incremental else 'Full'} synchronization completed")
             
             return len(self.stats.errors) == 0
             
         except Exception as e:
             self.logger.error(f"Full synchronization failed: {e}")
-            await self._update_sync_status("full_sync", "error", {"error": str(e)})
+            await self._update_sync_status(sync_type, "error", {"error": str(e)})
             return False
-            
-        finally:
-            await self.cleanup()
 
 
 async def main():
@@ -773,6 +1543,8 @@ async def main():
     parser.add_argument("--dry-run", action="store_true", help="Run in dry-run mode (no changes)")
     parser.add_argument("--users-only", action="store_true", help="Sync users only")
     parser.add_argument("--groups-only", action="store_true", help="Sync groups only")
+    parser.add_argument("--full", action="store_true", help="Force a full sync instead of an incremental one")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted sync from its last checkpoint")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose logging")
     
     args = parser.parse_args()
@@ -798,7 +1570,7 @@ async def main():
         elif args.groups_only:
             success = await synchronizer.sync_groups_idcs_to_ldap()
         else:
-            success = await synchronizer.run_full_sync()
+            success = await synchronizer.run_full_sync(force_full=args.full, resume=args.resume)
         
         return 0 if success else 1
         
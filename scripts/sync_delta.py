@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Incremental sync bookkeeping for sync-idcs_ldap.py
+
+Pure functions over SCIM meta.lastModified timestamps and mapped attribute
+sets, kept free of backend and directory dependencies so the watermark and
+fingerprint rules can be tested on their own.
+"""
+
+import json
+import hashlib
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Union
+
+# Oldest meta.lastModified of an entry that failed to apply, or True when a
+# failed entry had no timestamp at all
+FailedWatermark = Union[str, bool, None]
+
+
+def parse_scim_datetime(value: str) -> datetime:
+    """Parse a SCIM (RFC 3339) timestamp"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def format_scim_datetime(value: datetime) -> str:
+    """Format a timestamp the way SCIM filters expect (UTC, millisecond precision)"""
+    return value.astimezone(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def latest_timestamp(current: Optional[str], last_modified: Optional[str]) -> Optional[str]:
+    """The later of a high-water mark and a newly seen meta.lastModified"""
+    if not last_modified:
+        return current
+    if current is None or parse_scim_datetime(last_modified) > parse_scim_datetime(current):
+        return last_modified
+    return current
+
+
+def oldest_failure(current: FailedWatermark, last_modified: Optional[str]) -> FailedWatermark:
+    """Fold the meta.lastModified of a failed entry into the oldest failure seen"""
+    if current is True or not last_modified:
+        return True
+    if current is None or parse_scim_datetime(last_modified) < parse_scim_datetime(current):
+        return last_modified
+    return current
+
+
+def next_watermark(
+    previous: Optional[str],
+    observed: Optional[str],
+    failed: FailedWatermark = None
+) -> Optional[str]:
+    """
+    The watermark to record after a run.
+    
+    Normally the newest meta.lastModified observed. It stops 1 ms short of
+    the oldest entry that failed to apply, so the next delta run
+    ("lastModified gt watermark") picks that entry up again, and it never
+    moves back before `previous`.
+    """
+    if failed is True:
+        observed = None
+    elif failed:
+        ceiling = parse_scim_datetime(failed) - timedelta(milliseconds=1)
+        if not observed or parse_scim_datetime(observed) > ceiling:
+            observed = format_scim_datetime(ceiling)
+    
+    if previous and (not observed or parse_scim_datetime(previous) > parse_scim_datetime(observed)):
+        return previous
+    return observed
+
+
+def attribute_values(value: Any) -> List[str]:
+    """Normalize a single- or multi-valued attribute to a list of strings"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value if item is not None]
+    return [str(value)]
+
+
+def single_value(value: Any) -> Optional[str]:
+    """
+    A single-valued attribute as a string, or None when it is unset.
+    
+    ldap3 returns an empty list for an absent attribute and IDCS sends null
+    or omits it, so both sides are folded to the same form before comparing.
+    """
+    values = [item for item in attribute_values(value) if item]
+    return values[0] if values else None
+
+
+def compute_fingerprint(ldap_attrs: Dict[str, Any]) -> str:
+    """Stable SHA-256 fingerprint of a mapped LDAP attribute set"""
+    canonical = {
+        attr.lower(): attribute_values(value)
+        for attr, value in ldap_attrs.items()
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
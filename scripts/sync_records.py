@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Sync record types for sync-idcs_ldap.py
+
+The records the synchronizer keeps in memory while reconciling a page and
+the compiled attribute mappings that fill them, kept free of backend and
+directory dependencies so their layout can be measured on its own (see
+scripts/bench/sync_record_memory.py).
+"""
+
+import re
+import json
+import zlib
+from typing import Any, Dict, Optional, Tuple
+from dataclasses import dataclass
+
+# One segment of a SCIM attribute path, e.g. "emails[0]" or "givenName"
+PATH_SEGMENT_PATTERN = re.compile(r'^([^\[\]]+)(?:\[(\d+)\])?$')
+
+# Compiled attribute path: (key, optional list index) per segment
+AttributePath = Tuple[Tuple[str, Optional[int]], ...]
+
+
+@dataclass(slots=True)
+class SyncUser:
+    """
+    User data structure for synchronization.
+    
+    `attributes` holds only the mapped LDAP attributes. The full source
+    record is kept as a compressed blob in `raw` when SYNC_RETAIN_RAW_RECORDS
+    is enabled, and decoded on demand through `raw_attributes`.
+    """
+    user_id: str
+    username: str
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    display_name: Optional[str] = None
+    groups: Tuple[str, ...] = ()
+    source: str = 'unknown'
+    attributes: Dict[str, Any] = None
+    fingerprint: Optional[str] = None
+    last_modified: Optional[str] = None
+    raw: Optional[bytes] = None
+    
+    def __post_init__(self):
+        if self.attributes is None:
+            self.attributes = {}
+    
+    @property
+    def raw_attributes(self) -> Dict[str, Any]:
+        """Decode the retained source record"""
+        return unpack_raw_record(self.raw)
+
+
+@dataclass(slots=True)
+class SyncGroup:
+    """
+    Group data structure for synchronization.
+    
+    Like SyncUser, only mapped attributes are kept in `attributes`.
+    """
+    group_id: str
+    group_name: str
+    display_name: Optional[str] = None
+    description: Optional[str] = None
+    members: Tuple[str, ...] = ()
+    source: str = 'unknown'
+    attributes: Dict[str, Any] = None
+    fingerprint: Optional[str] = None
+    last_modified: Optional[str] = None
+    raw: Optional[bytes] = None
+    
+    def __post_init__(self):
+        if self.attributes is None:
+            self.attributes = {}
+    
+    @property
+    def raw_attributes(self) -> Dict[str, Any]:
+        """Decode the retained source record"""
+        return unpack_raw_record(self.raw)
+
+
+def pack_raw_record(record: Dict[str, Any], retain: bool) -> Optional[bytes]:
+    """Compress a source record if raw retention is enabled"""
+    if not retain:
+        return None
+    return zlib.compress(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+
+
+def unpack_raw_record(raw: Optional[bytes]) -> Dict[str, Any]:
+    """Decode a record compressed by pack_raw_record"""
+    if raw is None:
+        return {}
+    return json.loads(zlib.decompress(raw))
+
+
+def compile_attribute_path(path: str) -> AttributePath:
+    """
+    Compile a dotted SCIM path such as "emails[0].value" into accessor steps.
+    
+    Raises ValueError for malformed paths so mapping errors surface when the
+    synchronizer is constructed rather than per record.
+    """
+    steps = []
+    for segment in path.split('.'):
+        match = PATH_SEGMENT_PATTERN.match(segment.strip())
+        if not match:
+            raise ValueError(f"Invalid attribute path segment '{segment}' in '{path}'")
+        key, index = match.groups()
+        steps.append((key, int(index) if index is not None else None))
+    return tuple(steps)
+
+
+def resolve_attribute_path(data: Dict[str, Any], steps: AttributePath) -> Any:
+    """Walk a record along compiled accessor steps, returning None when absent"""
+    value = data
+    for key, index in steps:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+        if index is not None:
+            if not isinstance(value, list) or index >= len(value):
+                return None
+            value = value[index]
+        if value is None:
+            return None
+    return value
+
+
+def compile_mapping(mapping: Dict[str, str], setting_name: str) -> Tuple[Tuple[str, AttributePath], ...]:
+    """Compile an LDAP attribute → SCIM path mapping into accessors"""
+    accessors = []
+    for ldap_attr, idcs_path in mapping.items():
+        try:
+            accessors.append((ldap_attr, compile_attribute_path(idcs_path)))
+        except ValueError as e:
+            raise ValueError(f"Invalid {setting_name} entry '{ldap_attr}:{idcs_path}': {e}")
+    return tuple(accessors)
+
+
+def extract_mapped_attributes(
+    data: Dict[str, Any],
+    accessors: Tuple[Tuple[str, AttributePath], ...]
+) -> Dict[str, Any]:
+    """Resolve a SCIM record to the mapped LDAP attributes, dropping the rest"""
+    mapped = {}
+    for ldap_attr, steps in accessors:
+        value = resolve_attribute_path(data, steps)
+        if value:
+            mapped[ldap_attr] = value
+    return mapped